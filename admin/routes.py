@@ -1,6 +1,7 @@
 import logging
 from flask import Blueprint, jsonify, request
 from admin.services import dump_google_sheet_data_to_db
+from utils.helpers import require_admin_token
 
 # Configure Blueprint and logging
 admin_blueprint = Blueprint("admin", __name__)
@@ -96,3 +97,38 @@ def debug_google_creds():
     else:
         all_vars = {k: "SET" for k in os.environ.keys() if "GOOGLE" in k.upper()}
         return jsonify({"status": "NOT_FOUND", "google_vars": all_vars, "total_env_vars": len(os.environ)})
+
+@admin_blueprint.route("/debug/runtime", methods=["GET"])
+@require_admin_token
+def debug_runtime():
+    """Estado de los executors de E/S y de segundo plano (cola, hilos ocupados, rechazos) y de los circuit breakers."""
+    from utils.executor import background_executor, io_executor
+    from utils.resilience import breakers_status
+    from cards.cache import cache_stats
+    from cards.assets import assets_stats
+    return jsonify({"status": "debug", "io_executor": io_executor.stats(),
+                    "background_executor": background_executor.stats(), "circuit_breakers": breakers_status(),
+                    "card_cache": cache_stats(), "card_assets": assets_stats()})
+
+@admin_blueprint.route("/ready", methods=["GET"])
+def readiness():
+    """Readiness: 503 hasta que termina el primer calentamiento."""
+    from admin.warmup import is_ready
+    if is_ready():
+        return jsonify({"status": "ready"}), 200
+    return jsonify({"status": "warming_up"}), 503
+
+@admin_blueprint.route("/warmup", methods=["GET"])
+def warmup_status_route():
+    """Estado del calentamiento: pasos, duración y errores."""
+    from admin.warmup import warmup_status
+    return jsonify(warmup_status())
+
+@admin_blueprint.route("/warmup", methods=["POST"])
+@require_admin_token
+def warmup_route():
+    """Lanza el calentamiento ahora (p.ej. tras cambiar las hot keys)."""
+    from admin.warmup import start_warmup, warmup_status
+    from flask import current_app
+    started = start_warmup(current_app._get_current_object())
+    return jsonify({"started": started, **warmup_status()}), 202
@@ -0,0 +1,199 @@
+"""
+Calentamiento tras un despliegue o un arranque en frío.
+
+Se lanza en segundo plano desde el hook `post_worker_init` de gunicorn (WARMUP_ON_START) o con
+POST /admin/warmup, y deja listo lo que si no pagarían las primeras peticiones:
+
+- mongo: abre el pool (ping) y crea los índices de las copias locales.
+- tokens: token de Client Credentials de Spotify y lista de modelos de Gemini.
+- datos: `types` y `descriptors` (este último queda en memoria para las cartas).
+- cartas: fuentes e iconos precargados para cada tamaño de carta (CARD_SIZES).
+- hot keys: racks más pedidos, leídos de `warmup_hot_keys` ({kind, key}); si no hay ninguno,
+  las playlists de GENRE_PLAYLIST_ID_MAP. kind: spotify_playlist | lastfm_tag | lastfm_country.
+- workers: retoma los scrobbles que quedaron en cola.
+- modules: importa las dependencias pesadas que la app ya no carga al arrancar (HEAVY_MODULES),
+  para que la primera carta o la primera llamada a Gemini no las paguen.
+
+Cada paso se mide y un fallo no detiene los demás. /admin/ready responde 503 mientras hay un
+calentamiento lanzado y no ha terminado; si no se ha lanzado ninguno (flask run, python app.py,
+WARMUP_ON_START=false) no hay nada que esperar.
+"""
+import importlib
+import threading
+import time
+from concurrent.futures import wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from config import Config
+from db import mongo
+from logging_config import logger
+from utils.executor import background_executor
+
+HOT_KEYS_COLLECTION = 'warmup_hot_keys'
+# Se importan en segundo plano con el servidor ya escuchando (cartas y Gemini)
+HEAVY_MODULES = (
+    'numpy', 'cv2', 'PIL.Image', 'sklearn.cluster', 'scipy.cluster.vq', 'google.generativeai',
+)
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {"status": "pending", "steps": {}}
+_done = threading.Event()  # se activa tras el primer calentamiento y ya no se desactiva
+
+# --------------------------
+# Pasos
+# --------------------------
+
+def _warm_mongo():
+    mongo.db.command('ping')
+    from spotify import library as spotify_library, playlists
+    from discogs import library as discogs_library
+    from lastfm import scrobbles
+    spotify_library._collections()
+    playlists._collection()
+    discogs_library._collections()
+    scrobbles._collections()
+
+
+def _warm_tokens():
+    from spotify.services import get_client_access_token
+    from llm.services import get_available_models
+    get_client_access_token()
+    get_available_models()
+
+
+def _warm_data():
+    from cards.mongo_utils import load_descriptors
+    list(mongo.db['types'].find({}, {"_id": 0, "name": 1, "genres": 1}))
+    load_descriptors()
+
+
+def _warm_card_assets():
+    from cards.extra_card_refactor import preload_assets
+    from cards.services import CARD_SIZES, card_size
+    preload_assets(resolutions=[card_size(size)[1] for size in CARD_SIZES])
+
+
+def _hot_keys() -> List[Dict[str, str]]:
+    keys = list(mongo.db[HOT_KEYS_COLLECTION].find({}, {"_id": 0, "kind": 1, "key": 1}))
+    if keys:
+        return keys
+    from spotify.services import GENRE_PLAYLIST_ID_MAP
+    return [{"kind": "spotify_playlist", "key": name} for name in GENRE_PLAYLIST_ID_MAP]
+
+
+def _prime(hot_key: Dict[str, str]):
+    kind, key = hot_key.get("kind"), hot_key.get("key")
+    if kind == "spotify_playlist":
+        from spotify.services import get_playlist_albums_spotify
+        get_playlist_albums_spotify(playlist=key)
+    elif kind == "lastfm_tag":
+        from lastfm.services import TAG_CHART_SIZE, get_tag_recommendations
+        get_tag_recommendations(key, per_page=TAG_CHART_SIZE)
+    elif kind == "lastfm_country":
+        from lastfm.services import get_country_top_albums
+        get_country_top_albums(key)
+    else:
+        logger.warning(f"Warm-up: hot key desconocida {hot_key}")
+
+
+def _warm_hot_keys():
+    pool = background_executor.limited(Config.WARMUP_WORKERS)
+    hot_keys = _hot_keys()
+    futures = {pool.submit(_prime, hot_key): hot_key for hot_key in hot_keys}
+    # Un solo plazo para todo el paso, no WARMUP_STEP_TIMEOUT por cada key
+    done, pending = wait(futures, timeout=Config.WARMUP_STEP_TIMEOUT)
+    for future in pending:
+        future.cancel()
+    failed = [future for future in done if future.exception() is not None]
+    for future in failed:
+        logger.warning(f"Warm-up: no se pudo precargar {futures[future]}: {str(future.exception())}")
+    if pending or failed:
+        raise RuntimeError(f"{len(pending)} de {len(hot_keys)} hot keys sin terminar en "
+                           f"{Config.WARMUP_STEP_TIMEOUT}s y {len(failed)} con error")
+
+
+def _start_workers():
+    from lastfm.scrobble_queue import start_scrobble_worker
+    # Scrobbles encolados antes del reinicio
+    start_scrobble_worker()
+
+
+def _import_heavy_modules():
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Warm-up: no se pudo importar {name}: {str(e)}")
+
+
+STEPS: List[tuple] = [
+    ("mongo", _warm_mongo),
+    ("tokens", _warm_tokens),
+    ("data", _warm_data),
+    ("card_assets", _warm_card_assets),
+    ("hot_keys", _warm_hot_keys),
+    ("workers", _start_workers),
+    ("modules", _import_heavy_modules),
+]
+
+# --------------------------
+# Ejecución
+# --------------------------
+
+def _run_step(name: str, fn: Callable[[], Any]):
+    start = time.perf_counter()
+    try:
+        fn()
+        result = {"status": "ok"}
+    except Exception as e:
+        logger.warning(f"Warm-up: falló el paso {name}: {str(e)}")
+        result = {"status": "error", "error": str(e)}
+    result["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    with _lock:
+        _state["steps"][name] = result
+
+
+def run_warmup(app=None):
+    """Ejecuta todos los pasos (dentro del contexto de la app si se pasa)."""
+    with _lock:
+        _state.update({"status": "running", "started_at": datetime.utcnow(), "steps": {}})
+    start = time.perf_counter()
+    context = app.app_context() if app is not None and hasattr(app, 'app_context') else None
+    if context:
+        context.push()
+    try:
+        for name, fn in STEPS:
+            _run_step(name, fn)
+    finally:
+        if context:
+            context.pop()
+        with _lock:
+            _state.update({"status": "done", "finished_at": datetime.utcnow(),
+                           "ms": round((time.perf_counter() - start) * 1000, 1)})
+        _done.set()
+        logger.info(f"Warm-up terminado en {_state['ms']} ms: {_state['steps']}")
+
+
+def start_warmup(app=None) -> bool:
+    """Lanza el calentamiento en un hilo propio; False si ya está en marcha."""
+    with _lock:
+        if _state["status"] == "running":
+            return False
+        _state["status"] = "running"
+    threading.Thread(target=run_warmup, args=(app,), name="warmup", daemon=True).start()
+    return True
+
+
+def is_ready() -> bool:
+    """
+    Listo tras el primer calentamiento, o si no se ha lanzado ninguno: solo el hook de gunicorn lo
+    lanza al arrancar, y lo hace antes de que el worker acepte peticiones.
+    """
+    return _done.is_set() or _state["status"] == "pending"
+
+
+def warmup_status() -> Dict[str, Any]:
+    with _lock:
+        state = {**_state, "steps": dict(_state["steps"])}
+    return {**state, "ready": is_ready()}
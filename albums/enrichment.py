@@ -0,0 +1,95 @@
+"""
+Enriquecimiento persistido en el documento del álbum (stale-while-revalidate).
+
+Cada fuente externa se guarda en `enrichment.<fuente>` como {"data": ..., "fetched_at": ...}.
+Las lecturas se sirven desde Mongo; las fuentes que superan su ventana de frescura
+(ENRICHMENT_MAX_AGE, p.ej. "spotify=86400,discogs=604800") se refrescan en segundo plano.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from bson import ObjectId
+
+from config import Config
+from db import mongo
+from logging_config import logger
+from utils.executor import background_executor
+from utils.resilience import parse_source_map
+
+ENRICHMENT_FIELD = 'enrichment'
+
+# Ventanas de frescura por defecto (segundos)
+DEFAULT_MAX_AGE = {
+    'spotify': 24 * 3600,
+    'lastfm': 24 * 3600,
+    'discogs': 7 * 24 * 3600,
+    'musicbrainz': 30 * 24 * 3600,
+}
+MAX_AGE = parse_source_map(Config.ENRICHMENT_MAX_AGE, DEFAULT_MAX_AGE)
+
+# Los refrescos usan el executor de segundo plano, con ENRICHMENT_WORKERS como máximo simultáneo
+_refresh_executor = background_executor.limited(Config.ENRICHMENT_WORKERS)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def split_enrichment(album: Dict[str, Any], sources: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str], List[str]]:
+    """
+    Saca `enrichment` del documento y clasifica las fuentes pedidas.
+    Devuelve (datos guardados por fuente, fuentes caducadas, fuentes que faltan).
+    """
+    stored = album.pop(ENRICHMENT_FIELD, None) or {}
+    now = datetime.utcnow()
+    data: Dict[str, Dict[str, Any]] = {}
+    stale: List[str] = []
+    missing: List[str] = []
+    for src in sources:
+        entry = stored.get(src)
+        if not entry or not entry.get('fetched_at'):
+            missing.append(src)
+            continue
+        data[src] = entry.get('data') or {}
+        max_age = timedelta(seconds=MAX_AGE.get(src, 24 * 3600))
+        if now - entry['fetched_at'] > max_age:
+            stale.append(src)
+    return data, stale, missing
+
+
+def save_enrichment(collection_name: str, album_id: str, results: Dict[str, Dict[str, Any]]):
+    """Guarda los resultados por fuente en el documento, con su fetched_at."""
+    if not results:
+        return
+    now = datetime.utcnow()
+    update = {f"{ENRICHMENT_FIELD}.{src}": {"data": data, "fetched_at": now} for src, data in results.items()}
+    try:
+        mongo.db[collection_name].update_one({"_id": ObjectId(album_id)}, {"$set": update})
+    except Exception as e:
+        logger.warning("No se pudo guardar el enriquecimiento de %s/%s: %s", collection_name, album_id, e)
+
+
+def schedule_refresh(collection_name: str, album_id: str, sources: List[str], fetch: Callable[[], Dict[str, Dict[str, Any]]]):
+    """
+    Refresca en segundo plano las fuentes caducadas de un álbum.
+    `fetch` devuelve {fuente: datos}; un mismo álbum/fuentes no se refresca dos veces a la vez.
+    """
+    key = (collection_name, album_id, tuple(sorted(sources)))
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def job():
+        try:
+            save_enrichment(collection_name, album_id, fetch())
+        except Exception as e:
+            logger.warning("Refresco en segundo plano de %s/%s fallido: %s", collection_name, album_id, e)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    future = _refresh_executor.submit(job)
+    if future.done() and future.exception() is not None:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        logger.warning("No se pudo programar el refresco de %s/%s: %s", collection_name, album_id, future.exception())
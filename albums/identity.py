@@ -0,0 +1,212 @@
+"""
+Mapa de identidades entre proveedores (spotify_id <-> mbid <-> discogs_id <-> _id de DB).
+
+Cada documento de `album_identities` agrupa los ids confirmados de un mismo álbum:
+{"spotify_id", "mbid", "discogs_id", "db_ids": ["<colección>:<_id>"], "confidence", "updated_at"}.
+Los detalles lo rellenan con lo que obtienen y las búsquedas por ID lo consultan primero,
+de modo que las siguientes llamadas van directas al endpoint por ID de cada proveedor.
+"""
+import threading
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, Optional
+
+from config import Config
+from db import mongo
+from logging_config import logger
+
+IDENTITY_COLLECTION = 'album_identities'
+ID_FIELDS = ('spotify_id', 'mbid', 'discogs_id')
+
+# Campo de id que aporta el resultado (ya formateado) de cada fuente
+SOURCE_ID_FIELDS = {
+    'spotify': 'spotify_id',
+    'discogs': 'discogs_id',
+    'lastfm': 'mbid',
+    'musicbrainz': 'mbid',
+}
+
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def _identities():
+    global _indexes_ready
+    collection = mongo.db[IDENTITY_COLLECTION]
+    if not _indexes_ready:
+        with _indexes_lock:
+            if not _indexes_ready:
+                for field in ID_FIELDS + ('db_ids',):
+                    collection.create_index(field, sparse=True)
+                _indexes_ready = True
+    return collection
+
+
+def _db_key(collection_name: Optional[str], db_id: Optional[str]) -> Optional[str]:
+    return f"{collection_name}:{db_id}" if collection_name and db_id else None
+
+
+def _normalize(value: Any) -> str:
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('#text') or ''
+    return str(value or '').strip().lower()
+
+
+def match_confidence(title: Optional[str], artist: Optional[str], candidate: Dict[str, Any]) -> float:
+    """Parecido (0-1) entre título/artista de referencia y los de un resultado de proveedor."""
+    if not title or not artist or not candidate:
+        return 0.0
+    cand_title = _normalize(candidate.get('title') or candidate.get('name'))
+    cand_artist = _normalize(candidate.get('artist'))
+    if not cand_title or not cand_artist:
+        return 0.0
+    title_ratio = SequenceMatcher(None, _normalize(title), cand_title).ratio()
+    artist_ratio = SequenceMatcher(None, _normalize(artist), cand_artist).ratio()
+    return round(min(title_ratio, artist_ratio), 3)
+
+
+def lookup_identity(
+    collection_name: Optional[str] = None,
+    db_id: Optional[str] = None,
+    spotify_id: Optional[str] = None,
+    mbid: Optional[str] = None,
+    discogs_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Ids conocidos del álbum a partir de cualquiera de ellos: {spotify_id, mbid, discogs_id, db_id}.
+    db_id solo se devuelve si corresponde a collection_name.
+    """
+    clauses = [{field: str(value)} for field, value in (('spotify_id', spotify_id), ('mbid', mbid), ('discogs_id', discogs_id)) if value]
+    if _db_key(collection_name, db_id):
+        clauses.append({"db_ids": _db_key(collection_name, db_id)})
+    if not clauses:
+        return {}
+    try:
+        doc = _identities().find_one({"$or": clauses}, sort=[("confidence", -1)])
+    except Exception as e:
+        logger.warning("Identity lookup failed: %s", e)
+        return {}
+    if not doc:
+        return {}
+    return _known_ids(doc, collection_name)
+
+
+def lookup_identities(collection_name: Optional[str], lookups: Dict[Any, Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """
+    lookup_identity de varias búsquedas {clave: {db_id, spotify_id, mbid, discogs_id}} con una sola
+    consulta. Devuelve {clave: ids conocidos} para las que están en el mapa.
+    """
+    values: Dict[str, set] = {field: set() for field in ID_FIELDS}
+    db_keys = set()
+    for item in lookups.values():
+        for field in ID_FIELDS:
+            if item.get(field):
+                values[field].add(str(item[field]))
+        if _db_key(collection_name, item.get('db_id')):
+            db_keys.add(_db_key(collection_name, item.get('db_id')))
+    clauses = [{field: {"$in": sorted(found)}} for field, found in values.items() if found]
+    if db_keys:
+        clauses.append({"db_ids": {"$in": sorted(db_keys)}})
+    if not clauses:
+        return {}
+    try:
+        docs = list(_identities().find({"$or": clauses}).sort("confidence", -1))
+    except Exception as e:
+        logger.warning("Identity batch lookup failed: %s", e)
+        return {}
+
+    found: Dict[Any, Dict[str, Any]] = {}
+    for key, item in lookups.items():
+        db_key = _db_key(collection_name, item.get('db_id'))
+        # docs va ordenado por confianza: la primera coincidencia es la que devolvería lookup_identity
+        doc = next((d for d in docs
+                    if any(item.get(field) and d.get(field) == str(item[field]) for field in ID_FIELDS)
+                    or (db_key and db_key in d.get('db_ids', []))), None)
+        if doc:
+            found[key] = _known_ids(doc, collection_name)
+    return found
+
+
+def _known_ids(doc: Dict[str, Any], collection_name: Optional[str]) -> Dict[str, Any]:
+    found = {field: doc[field] for field in ID_FIELDS if doc.get(field)}
+    prefix = f"{collection_name}:" if collection_name else None
+    for key in doc.get('db_ids', []):
+        if prefix and key.startswith(prefix):
+            found['db_id'] = key[len(prefix):]
+            break
+    return found
+
+
+def record_identity(ids: Dict[str, Any], confidence: float, collection_name: Optional[str] = None):
+    """
+    Guarda (o completa) una correspondencia de ids. Hace falta al menos una pareja.
+    Un id distinto ya registrado con más confianza no se sobrescribe.
+    """
+    clean = {field: str(ids[field]) for field in ID_FIELDS if ids.get(field)}
+    db_key = _db_key(collection_name, ids.get('db_id'))
+    if len(clean) + (1 if db_key else 0) < 2:
+        return
+    clauses = [{field: value} for field, value in clean.items()]
+    if db_key:
+        clauses.append({"db_ids": db_key})
+    try:
+        collection = _identities()
+        existing = collection.find_one({"$or": clauses}, sort=[("confidence", -1)])
+        if existing:
+            if any(existing.get(field) and existing[field] != value for field, value in clean.items()) \
+                    and existing.get('confidence', 0) > confidence:
+                return
+            known = all(existing.get(field) == value for field, value in clean.items()) \
+                and (not db_key or db_key in existing.get('db_ids', []))
+            if known and existing.get('confidence', 0) >= confidence:
+                return
+        update = {"$set": {**clean, "updated_at": datetime.utcnow()}, "$max": {"confidence": confidence}}
+        if db_key:
+            update["$addToSet"] = {"db_ids": db_key}
+        if existing:
+            collection.update_one({"_id": existing["_id"]}, update)
+        else:
+            collection.update_one({"$or": clauses}, update, upsert=True)
+    except Exception as e:
+        logger.warning("Identity record failed: %s", e)
+
+
+def record_from_results(
+    collection_name: Optional[str],
+    db_album: Optional[Dict[str, Any]],
+    results: Dict[str, Dict[str, Any]],
+    exact: Dict[str, Any],
+    title: Optional[str],
+    artist: Optional[str],
+):
+    """
+    Registra los ids que aparecen en un detalle.
+    - exact: ids de los que no hay duda (pedidos por el llamante, del mapa o buscados por ID).
+    - Los resultados obtenidos por búsqueda de título solo cuentan si su parecido con
+      título/artista supera IDENTITY_MIN_CONFIDENCE; la confianza guardada es la menor.
+    """
+    ids = {field: value for field, value in exact.items() if value}
+    confidence = 1.0
+    if db_album and db_album.get('_id') and str(db_album['_id']) != str(ids.get('db_id')):
+        # Documento de DB encontrado por título/artista: cuenta según su parecido
+        same_spotify = ids.get('spotify_id') and db_album.get('spotify_id') == ids['spotify_id']
+        score = 1.0 if same_spotify else match_confidence(title, artist, db_album)
+        if score >= Config.IDENTITY_MIN_CONFIDENCE:
+            ids['db_id'] = str(db_album['_id'])
+            confidence = min(confidence, score)
+    if ids.get('db_id') and db_album and db_album.get('spotify_id'):
+        ids.setdefault('spotify_id', db_album['spotify_id'])
+    for src, data in results.items():
+        field = SOURCE_ID_FIELDS.get(src)
+        value = data.get(field) if field and isinstance(data, dict) else None
+        if not value:
+            continue
+        if ids.get(field):
+            # Ya conocido (o distinto del que es seguro): no aporta nada
+            continue
+        score = match_confidence(title, artist, data)
+        if score < Config.IDENTITY_MIN_CONFIDENCE:
+            continue
+        ids[field] = value
+        confidence = min(confidence, score)
+    record_identity(ids, confidence, collection_name)
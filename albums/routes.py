@@ -1,6 +1,10 @@
-from flask import Blueprint, jsonify, request
+import json
 
+from flask import Blueprint, Response, jsonify, request
+
+from config import Config
 from lastfm.services import get_user_top_albums
+from logging_config import logger
 from utils.constants import Collections, Parameters, ParametersValues, Routes
 from utils.helpers import handle_response, log_route_info, require_admin_token
 from albums.services import (
@@ -33,6 +37,8 @@ from albums.services import (
     get_album_by_mbid,
     get_album_by_discogs_id,
     get_album_details,
+    get_album_details_batch,
+    iter_album_details,
     get_album_of_the_day,
     move_album_service,
     update_album_service,
@@ -55,7 +61,7 @@ albums_blueprint = Blueprint(Parameters.ALBUMS, __name__)
 @log_route_info
 def albums(collection_name, **params):
     if collection_name == Collections.SPOTIFY:
-        return get_saved_albums_from_spotify(**params)
+        return get_saved_albums_spotify(**params)
     else:
         return get_all_albums(collection_name=collection_name, **params)
 
@@ -361,10 +367,8 @@ def get_album_detail_by_discogs_id(collection_name):
         lastfm_user_id=lastfm_user_id
     )
 
-# Get Album Details (prioritizing IDs)
-@albums_blueprint.route(f'/{ParametersValues.COLLECTION}/{Routes.DETAIL}/{Routes.ALL}/', methods=['GET'])
-@log_route_info
-def get_album_details_route(collection_name):
+def _album_details_args() -> dict:
+    """Parámetros comunes de /detail/all/ y /detail/stream/ (None si falta el identificador)."""
     db_id = request.args.get('db_id')
     spotify_id = request.args.get('spotify_id')
     mbid = request.args.get('mbid')
@@ -376,7 +380,7 @@ def get_album_details_route(collection_name):
     lastfm_user_id = request.args.get('lastfm_user_id')
 
     if not (db_id or spotify_id or mbid or discogs_id or (title and artist)):
-        return jsonify({"error": "Provide at least one ID (db_id, spotify_id, mbid, discogs_id) or both 'title' and 'artist'"}), 400
+        return None
 
     # --- NEW: allow caller to specify which external sources to query ---
     # Example: ?sources=db,spotify,lastfm  (default: all)
@@ -388,13 +392,15 @@ def get_album_details_route(collection_name):
     # Optional timeout (seconds) for parallel external calls
     timeout_param = request.args.get('sources_timeout')
     try:
-        # If the client does not provide a timeout, we leave it as None (wait for all sources).
+        # If the client does not provide a timeout, we leave it as None (per-source default deadlines).
         sources_timeout = int(timeout_param) if timeout_param is not None and timeout_param != "" else None
     except ValueError:
         sources_timeout = None
 
-    return get_album_details(
-        collection_name=collection_name,
+    # refresh=true: ignora el enriquecimiento guardado y consulta las fuentes en línea
+    refresh = request.args.get('refresh', 'false').lower() == 'true'
+
+    return dict(
         db_id=db_id,
         spotify_id=spotify_id,
         mbid=mbid,
@@ -405,9 +411,86 @@ def get_album_details_route(collection_name):
         discogs_user_id=discogs_user_id,
         lastfm_user_id=lastfm_user_id,
         sources=sources,
-        sources_timeout=sources_timeout
+        sources_timeout=sources_timeout,
+        refresh=refresh
     )
 
+# Get Album Details (prioritizing IDs)
+@albums_blueprint.route(f'/{ParametersValues.COLLECTION}/{Routes.DETAIL}/{Routes.ALL}/', methods=['GET'])
+@log_route_info
+def get_album_details_route(collection_name):
+    args = _album_details_args()
+    if args is None:
+        return jsonify({"error": "Provide at least one ID (db_id, spotify_id, mbid, discogs_id) or both 'title' and 'artist'"}), 400
+    return get_album_details(collection_name=collection_name, **args)
+
+# Get Album Details progressively (Server-Sent Events: db, one per source, done)
+@albums_blueprint.route(f'/{ParametersValues.COLLECTION}/{Routes.DETAIL}/{Routes.STREAM}/', methods=['GET'])
+@log_route_info
+def get_album_details_stream_route(collection_name):
+    args = _album_details_args()
+    if args is None:
+        return jsonify({"error": "Provide at least one ID (db_id, spotify_id, mbid, discogs_id) or both 'title' and 'artist'"}), 400
+
+    def generate():
+        for event, source, payload in iter_album_details(collection_name=collection_name, **args):
+            data = {"source": source, **payload} if event == 'source' else payload
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Get Album Details in batch (one NDJSON line per album, in input order)
+# Body: {"items": [{"db_id": ...}, {"spotify_id": ...}, {"title": ..., "artist": ...}], "sources": "db,spotify", ...}
+@albums_blueprint.route(f'/{ParametersValues.COLLECTION}/{Routes.DETAIL}/{Routes.BATCH}/', methods=['POST'])
+@log_route_info
+def get_album_details_batch_route(collection_name):
+    body = request.get_json(silent=True) or {}
+    items = body.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Provide a non-empty 'items' list"}), 400
+    if len(items) > Config.DETAILS_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {Config.DETAILS_BATCH_MAX_ITEMS} items per batch"}), 400
+    for item in items:
+        if not isinstance(item, dict) or not (
+            item.get('db_id') or item.get('spotify_id') or item.get('mbid') or item.get('discogs_id')
+            or (item.get('title') and item.get('artist'))
+        ):
+            return jsonify({"error": "Each item needs an ID (db_id, spotify_id, mbid, discogs_id) or both 'title' and 'artist'"}), 400
+
+    sources = body.get('sources')
+    if isinstance(sources, str):
+        sources = [s.strip().lower() for s in sources.split(',') if s.strip()]
+    try:
+        sources_timeout = int(body['sources_timeout']) if body.get('sources_timeout') not in (None, "") else None
+    except (TypeError, ValueError):
+        sources_timeout = None
+
+    # Identidades, DB y llamadas se resuelven antes de empezar a responder: un fallo aquí es un 500
+    try:
+        results = get_album_details_batch(
+            collection_name=collection_name,
+            items=items,
+            spotify_user_id=body.get('spotify_user_id'),
+            discogs_user_id=body.get('discogs_user_id'),
+            lastfm_user_id=body.get('lastfm_user_id'),
+            sources=sources,
+            sources_timeout=sources_timeout,
+        )
+    except Exception as e:
+        logger.error(f"Error in album details batch: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to get album details batch"}), 500
+
+    def generate():
+        try:
+            for index, album in results:
+                yield json.dumps({"index": index, "album": album}, default=str) + "\n"
+        except Exception as e:
+            # La respuesta ya empezó con 200: el fallo va como última línea
+            logger.error(f"Error streaming album details batch: {str(e)}", exc_info=True)
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 #####################
 # SPOTIFY ENDPOINTS #
 #####################
@@ -4,19 +4,29 @@ Clean, consolidated albums service module.
 - Eliminadas definiciones repetidas/duplicadas.
 - Helpers agrupados: DB helpers, external fetchers (Spotify, Discogs, LastFM, MusicBrainz).
 - get_album_details: paralelo, configurable (sources, sources_timeout), merge con prioridad.
+  Plazos por fuente y circuit breakers por proveedor (utils/resilience.py).
+  Peticiones idénticas concurrentes se agrupan en una sola (single-flight).
+- iter_album_details: el mismo detalle como eventos (DB, cada fuente, fusionado) para SSE.
+- get_album_details_batch: varios álbumes con búsquedas deduplicadas y llamadas agrupadas por proveedor.
 - Conserva firmas públicas usadas por routes.py.
 """
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from urllib.parse import unquote
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, TimeoutError as FuturesTimeoutError, wait
+import threading
 import time
 import pytz
-import requests
 from bson import ObjectId
 
+from config import Config
 from utils.constants import Parameters
 from utils.helpers import build_format_filter, create_case_insensitive_regex, execute_paginated_query
+from utils.executor import ExecutorSaturated, io_executor
+from utils.resilience import get_breaker, get_source_timeout
+from utils.singleflight import SingleFlight
+from albums.enrichment import ENRICHMENT_FIELD, save_enrichment, schedule_refresh, split_enrichment
+from albums.identity import lookup_identities, lookup_identity, record_from_results
 from db import mongo
 from logging_config import logger
 
@@ -24,6 +34,7 @@ from logging_config import logger
 from lastfm.services import get_album_info_lastfm, make_lastfm_request
 from spotify.services import make_spotify_request, format_album as format_album_spotify
 from discogs.services import make_discogs_request, format_release as format_album_discogs
+from musicbrainz.services import get_album_musicbrainz, search_album_musicbrainz
 
 # -----------------------
 # Basic query utilities
@@ -404,7 +415,8 @@ def get_new_releases(
             {"$limit": per_page}
         ])
     
-    # 5. Ejecutar consulta principal
+    # 5. Ejecutar consulta principal (sin el enriquecimiento guardado)
+    pipeline.append({"$project": {ENRICHMENT_FIELD: 0}})
     albums = list(mongo.db[collection_name].aggregate(pipeline))
     
     # 6. Contar total (pipeline separado para evitar límite BSON)
@@ -531,7 +543,8 @@ def get_anniversary_albums(
             {"$limit": per_page}
         ])
     
-    # Obtener resultados
+    # Obtener resultados (sin el enriquecimiento guardado)
+    pipeline.append({"$project": {ENRICHMENT_FIELD: 0}})
     albums = list(mongo.db[collection_name].aggregate(pipeline))
     
     # Contar total (sin paginación)
@@ -622,7 +635,7 @@ def get_albums_by_type_service(
         {"$sort": {"random": 1}},
         {"$skip": (page - 1) * per_page if page > 0 else 0},
         {"$limit": per_page},
-        {"$project": {"type": 0, "random": 0, "matchScore": 0, "genreMatches": 0, "subgenreMatches": 0}},
+        {"$project": {"type": 0, "random": 0, "matchScore": 0, "genreMatches": 0, "subgenreMatches": 0, ENRICHMENT_FIELD: 0}},
         {"$count": "total"}
     ]
 
@@ -684,7 +697,7 @@ def get_albums_by_type_service(
         {"$sort": {"random": 1}},
         {"$skip": (page - 1) * per_page if page > 0 else 0},
         {"$limit": per_page},
-        {"$project": {"type": 0, "random": 0, "matchScore": 0, "genreMatches": 0, "subgenreMatches": 0}},
+        {"$project": {"type": 0, "random": 0, "matchScore": 0, "genreMatches": 0, "subgenreMatches": 0, ENRICHMENT_FIELD: 0}},
         {"$skip": (page - 1) * per_page},
         {"$limit": per_page}
     ]
@@ -700,18 +713,23 @@ def get_albums_by_type_service(
 # -----------------------
 # DB helpers
 # -----------------------
-def _get_album_from_mongo(collection_name: str, title: str, artist: str) -> Dict[str, Any]:
+def _album_projection(with_enrichment: bool = False) -> Optional[Dict[str, int]]:
+    return None if with_enrichment else {ENRICHMENT_FIELD: 0}
+
+def _get_album_from_mongo(collection_name: str, title: str, artist: str, with_enrichment: bool = False) -> Dict[str, Any]:
+    if not title or not artist:
+        return {}  # una regex vacía coincidiría con cualquier álbum
     album = mongo.db[collection_name].find_one({
         "title": create_case_insensitive_regex(title),
         "artist": create_case_insensitive_regex(artist)
-    })
+    }, _album_projection(with_enrichment))
     if album:
         album["_id"] = str(album["_id"])
     return album or {}
 
-def _get_album_by_db_id(db_id: str, collection_name: str) -> Dict[str, Any]:
+def _get_album_by_db_id(db_id: str, collection_name: str, with_enrichment: bool = False) -> Dict[str, Any]:
     try:
-        album = mongo.db[collection_name].find_one({"_id": ObjectId(db_id)})
+        album = mongo.db[collection_name].find_one({"_id": ObjectId(db_id)}, _album_projection(with_enrichment))
         if album:
             album["_id"] = str(album["_id"])
             return album
@@ -719,16 +737,67 @@ def _get_album_by_db_id(db_id: str, collection_name: str) -> Dict[str, Any]:
         logger.warning("DB lookup by id failed: %s", e)
     return {}
 
-def _get_album_db_by_spotify_id(spotify_id: str, collection_name: str = Parameters.ALBUMS) -> Dict[str, Any]:
+def _get_album_db_by_external_id(field: str, value: str, collection_name: str = Parameters.ALBUMS, with_enrichment: bool = False) -> Dict[str, Any]:
+    """Álbum de DB por un id de proveedor (spotify_id, mbid o discogs_id), sin llamar al proveedor."""
     try:
-        album = mongo.db[collection_name].find_one({"spotify_id": spotify_id})
+        album = mongo.db[collection_name].find_one({field: value}, _album_projection(with_enrichment))
         if album:
             album["_id"] = str(album["_id"])
             return album
     except Exception as e:
-        logger.warning("DB lookup by spotify_id failed: %s", e)
+        logger.warning("DB lookup by %s failed: %s", field, e)
     return {}
 
+def _get_album_db_by_spotify_id(spotify_id: str, collection_name: str = Parameters.ALBUMS, with_enrichment: bool = False) -> Dict[str, Any]:
+    return _get_album_db_by_external_id("spotify_id", spotify_id, collection_name, with_enrichment)
+
+def _find_albums_batch(collection_name: str, lookups: Dict[tuple, Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Resuelve varias búsquedas (db_id, spotify_id, mbid, discogs_id o título/artista) con una sola
+    consulta $or/$in. Devuelve {clave: documento} para las que tienen coincidencia (con enriquecimiento).
+    """
+    object_ids, pairs = [], []
+    external_ids: Dict[str, List[str]] = {'spotify_id': [], 'mbid': [], 'discogs_id': []}
+    for item in lookups.values():
+        if item.get('db_id') and ObjectId.is_valid(item['db_id']):
+            object_ids.append(ObjectId(item['db_id']))
+        for field, values in external_ids.items():
+            if item.get(field):
+                values.append(item[field])
+        if item.get('title') and item.get('artist'):
+            pairs.append((create_case_insensitive_regex(item['title']), create_case_insensitive_regex(item['artist'])))
+    clauses = []
+    if object_ids:
+        clauses.append({"_id": {"$in": object_ids}})
+    clauses.extend({field: {"$in": values}} for field, values in external_ids.items() if values)
+    clauses.extend({"title": title, "artist": artist} for title, artist in pairs)
+    if not clauses:
+        return {}
+    try:
+        docs = list(mongo.db[collection_name].find({"$or": clauses}))
+    except Exception as e:
+        logger.warning("DB batch lookup failed: %s", e)
+        return {}
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+
+    # Misma precedencia que el detalle individual: db_id, spotify_id, mbid, discogs_id y después título/artista
+    found: Dict[tuple, Dict[str, Any]] = {}
+    by_id = {doc["_id"]: doc for doc in docs}
+    by_field = {field: {doc.get(field): doc for doc in docs if doc.get(field)} for field in external_ids}
+    for key, item in lookups.items():
+        doc = by_id.get(item.get('db_id'))
+        for field in external_ids:
+            doc = doc or (by_field[field].get(item[field]) if item.get(field) else None)
+        if not doc and item.get('title') and item.get('artist'):
+            title_re = create_case_insensitive_regex(item['title'])
+            artist_re = create_case_insensitive_regex(item['artist'])
+            doc = next((d for d in docs if isinstance(d.get("title"), str) and isinstance(d.get("artist"), str)
+                        and title_re.search(d["title"]) and artist_re.search(d["artist"])), None)
+        if doc:
+            found[key] = doc
+    return found
+
 # -----------------------
 # External fetchers
 # Single-purpose, return {} on failure
@@ -741,6 +810,11 @@ def _spotify_by_id(spotify_id: str, spotify_user_id: Optional[str] = None) -> Di
         logger.debug("spotify_by_id error: %s", e)
         return {}
 
+def _spotify_by_ids(spotify_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Varios álbumes de Spotify en una sola llamada (albums?ids=, máximo SPOTIFY_BATCH_SIZE)."""
+    data = make_spotify_request(endpoint="albums", ids=",".join(spotify_ids), no_user_neccessary=True)
+    return {album["id"]: format_album_spotify(album) or {} for album in data.get("albums", []) if album}
+
 def _spotify_by_title(title: str, artist: str, spotify_user_id: Optional[str] = None) -> Dict[str, Any]:
     try:
         params = {"endpoint": "search", "q": f"album:{title} artist:{artist}", "type": "album", "limit": 1, "no_user_neccessary": not spotify_user_id}
@@ -777,15 +851,7 @@ def _discogs_by_title(title: str, artist: str, discogs_user_id: Optional[str] =
 
 def _lastfm_by_mbid(mbid: str, artist: Optional[str] = None, title: Optional[str] = None, user: Optional[str] = None) -> Dict[str, Any]:
     try:
-        params = {}
-        if mbid:
-            params["mbid"] = mbid
-        else:
-            params["artist"] = artist
-            params["album"] = title
-        if user:
-            params["username"] = user
-        return get_album_info_lastfm(**params) or {}
+        return get_album_info_lastfm(artist=artist, album=title, mbid=mbid, user=user) or {}
     except Exception as e:
         logger.debug("lastfm_by_mbid error: %s", e)
         return {}
@@ -794,22 +860,15 @@ def _lastfm_by_title(title: str, artist: str, user: Optional[str] = None) -> Dic
     return _lastfm_by_mbid(None, artist=artist, title=title, user=user)
 
 def _musicbrainz_by_mbid(mbid: str) -> Dict[str, Any]:
-    # Reuse existing 'get_album_by_mbid' behavior if that uses MusicBrainz; here return lightweight placeholder
     try:
-        return get_album_by_mbid(mbid) or {}
-    except Exception:
+        return get_album_musicbrainz(mbid) or {}
+    except Exception as e:
+        logger.debug("musicbrainz_by_mbid error: %s", e)
         return {}
 
 def _musicbrainz_by_title(title: str, artist: str) -> Dict[str, Any]:
     try:
-        # perform direct MusicBrainz search (same approach used previously)
-        headers = {"User-Agent": "Discana/1.0 (contact@your-email.com)"}
-        search_url = "https://musicbrainz.org/ws/2/release/"
-        params = {"query": f"artist:{artist} AND release:{title}", "fmt": "json"}
-        r = requests.get(search_url, params=params, headers=headers, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        return data or {}
+        return search_album_musicbrainz(title, artist) or {}
     except Exception as e:
         logger.debug("musicbrainz_by_title error: %s", e)
         return {}
@@ -817,8 +876,9 @@ def _musicbrainz_by_title(title: str, artist: str) -> Dict[str, Any]:
 # -----------------------
 # Public wrappers (used by routes)
 # -----------------------
-def get_album_by_spotify_id(spotify_id: str, collection_name: str = Parameters.ALBUMS, spotify_user_id: str = None, discogs_user_id: str = None, lastfm_user_id: str = None, **kwargs) -> Dict[str, Any]:
+def get_album_by_spotify_id(spotify_id: str, collection_name: str = Parameters.ALBUMS, spotify_user_id: str = None, discogs_user_id: str = None, lastfm_user_id: str = None, album: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
     try:
+        ids = {**lookup_identity(collection_name, spotify_id=spotify_id), "spotify_id": spotify_id}
         data = _spotify_by_id(spotify_id, spotify_user_id)
         if not data:
             return {}
@@ -827,7 +887,8 @@ def get_album_by_spotify_id(spotify_id: str, collection_name: str = Parameters.A
         artist = data.get("artist") or data.get("artists") or ""
         if isinstance(artist, list):
             artist = ", ".join([a.get("name", "") for a in artist])
-        return get_album_by_title_and_artist(title=title, artist=artist, collection_name=collection_name, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id)
+        # El álbum ya obtenido por ID es el resultado de Spotify; no se vuelve a buscar por título
+        return get_album_by_title_and_artist(title=title, artist=artist, collection_name=collection_name, album=album, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id, prefetched={"spotify": data}, ids=ids)
     except Exception as e:
         logger.warning("get_album_by_spotify_id failed: %s", e)
         return {}
@@ -839,7 +900,7 @@ def get_album_by_db_id(db_id: str, collection_name: str = Parameters.ALBUMS, spo
             return {"error": "Album not found in MongoDB"}
         spotify_id = album.get("spotify_id")
         if spotify_id:
-            return get_album_by_spotify_id(spotify_id=spotify_id, collection_name=collection_name, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id)
+            return get_album_by_spotify_id(spotify_id=spotify_id, collection_name=collection_name, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id, album=album)
         return album
     except Exception as e:
         logger.warning("get_album_by_db_id failed: %s", e)
@@ -847,27 +908,37 @@ def get_album_by_db_id(db_id: str, collection_name: str = Parameters.ALBUMS, spo
 
 def get_album_by_mbid(mbid: str, collection_name: str = Parameters.ALBUMS, spotify_user_id: str = None, discogs_user_id: str = None, lastfm_user_id: str = None, **kwargs) -> Dict[str, Any]:
     try:
-        lf = get_album_info_lastfm(mbid=mbid)
-        title = lf.get("name") or lf.get("title") or ""
-        artist = lf.get("artist", {}).get("name", "") if isinstance(lf.get("artist"), dict) else lf.get("artist", "")
-        return get_album_by_title_and_artist(title=title, artist=artist, collection_name=collection_name, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id)
+        ids = {**lookup_identity(collection_name, mbid=mbid), "mbid": mbid}
+        # Título/artista del propio release de MusicBrainz; Last.fm solo si MusicBrainz no lo conoce
+        prefetched = {"musicbrainz": _musicbrainz_by_mbid(mbid)}
+        title, artist = prefetched["musicbrainz"].get("title", ""), prefetched["musicbrainz"].get("artist", "")
+        if not title or not artist:
+            lf = prefetched["lastfm"] = _lastfm_by_mbid(mbid, user=lastfm_user_id)
+            title = lf.get("name") or lf.get("title") or ""
+            artist = lf.get("artist", {}).get("name", "") if isinstance(lf.get("artist"), dict) else lf.get("artist", "")
+        if not title or not artist:
+            return {}
+        return get_album_by_title_and_artist(title=title, artist=artist, collection_name=collection_name, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id, prefetched=prefetched, ids=ids)
     except Exception as e:
         logger.warning("get_album_by_mbid failed: %s", e)
         return {}
 
 def get_album_by_discogs_id(discogs_id: str, collection_name: str = Parameters.ALBUMS, spotify_user_id: str = None, discogs_user_id: str = None, lastfm_user_id: str = None, **kwargs) -> Dict[str, Any]:
     try:
+        ids = {**lookup_identity(collection_name, discogs_id=discogs_id), "discogs_id": discogs_id}
         res = make_discogs_request(endpoint=f"releases/{discogs_id}")
         title = res.get("title") or res.get("name", "")
         artist = ", ".join(a.get("name") for a in res.get("artists", [])) if isinstance(res.get("artists"), list) else ""
-        return get_album_by_title_and_artist(title=title, artist=artist, collection_name=collection_name, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id)
+        if not title or not artist:
+            return {}
+        return get_album_by_title_and_artist(title=title, artist=artist, collection_name=collection_name, spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id, prefetched={"discogs": format_album_discogs(res) or {}}, ids=ids)
     except Exception as e:
         logger.warning("get_album_by_discogs_id failed: %s", e)
         return {}
 
 def get_album_by_id(album_id: str, collection_name: str = Parameters.ALBUMS, **kwargs) -> Dict[str, Any]:
     try:
-        album = mongo.db[collection_name].find_one({"_id": ObjectId(album_id)})
+        album = mongo.db[collection_name].find_one({"_id": ObjectId(album_id)}, _album_projection())
         if album:
             album["_id"] = str(album["_id"])
         return album or {}
@@ -876,7 +947,7 @@ def get_album_by_id(album_id: str, collection_name: str = Parameters.ALBUMS, **k
         return {}
 
 # -----------------------
-# Composed title+artist search (synchronous)
+# Composed title+artist search (parallel fan-out)
 # -----------------------
 def get_album_by_title_and_artist(
     title: str,
@@ -891,21 +962,38 @@ def get_album_by_title_and_artist(
     invoke_lastfm: bool = True,
     invoke_discogs: bool = True,
     invoke_musicbrainz: bool = True,
+    prefetched: Optional[Dict[str, Dict[str, Any]]] = None,
+    sources_timeout: Optional[int] = None,
+    ids: Optional[Dict[str, Any]] = None,
     **kwargs
 ) -> Dict[str, Any]:
+    """
+    Álbum de DB con el resultado de cada proveedor en album[<fuente>].
+    Los proveedores se consultan en paralelo con el mismo motor (plazos y circuit breakers)
+    que get_album_details; `prefetched` aporta resultados ya obtenidos por ID y `ids`
+    (spotify_id, mbid, discogs_id, db_id seguros) evita las búsquedas por título.
+    """
     title = unquote(title)
     artist = unquote(artist)
     album = album or {}
+    prefetched = prefetched or {}
+    ids = ids or {}
+    if invoke_db and not album and ids.get('db_id'):
+        album = _get_album_by_db_id(ids['db_id'], collection_name)
     if invoke_db and not album:
         album = _get_album_from_mongo(collection_name, title, artist)
-    if invoke_lastfm and "lastfm" not in album:
-        album["lastfm"] = _lastfm_by_title(title, artist, lastfm_user_id)
-    if invoke_spotify and "spotify" not in album:
-        album["spotify"] = _spotify_by_title(title, artist, spotify_user_id)
-    if invoke_discogs and "discogs" not in album:
-        album["discogs"] = _discogs_by_title(title, artist, discogs_user_id)
-    if invoke_musicbrainz and "musicbrainz" not in album:
-        album["musicbrainz"] = _musicbrainz_by_title(title, artist)
+    invoked = [('lastfm', invoke_lastfm), ('spotify', invoke_spotify), ('discogs', invoke_discogs), ('musicbrainz', invoke_musicbrainz)]
+    wanted = [src for src, invoke in invoked if invoke and src not in album]
+    pending = [src for src in wanted if src not in prefetched]
+    users = dict(spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id)
+    calls = _build_source_calls(
+        pending, title=title, artist=artist,
+        spotify_id=ids.get('spotify_id'), discogs_id=ids.get('discogs_id'), mbid=ids.get('mbid'), **users
+    )
+    results, _ = _fetch_sources(calls, sources_timeout)
+    for src in wanted:
+        album[src] = prefetched[src] if src in prefetched else results.get(src, {})
+    record_from_results(collection_name, album, {src: album.get(src) or {} for src in wanted}, ids, title, artist)
     return album
 
 # -----------------------
@@ -933,9 +1021,190 @@ def _merge_results(primary: Dict[str, Any], secondary: Dict[str, Any]) -> Dict[s
             merged[k] = v
     return merged
 
+def _build_source_calls(
+    sources: List[str],
+    spotify_id: Optional[str] = None,
+    discogs_id: Optional[str] = None,
+    mbid: Optional[str] = None,
+    title: Optional[str] = None,
+    artist: Optional[str] = None,
+    spotify_user_id: Optional[str] = None,
+    discogs_user_id: Optional[str] = None,
+    lastfm_user_id: Optional[str] = None,
+) -> List[Tuple[str, Any, tuple]]:
+    """Lista de (fuente, fetcher, args) priorizando IDs frente a búsqueda por título/artista."""
+    calls = []
+    if 'spotify' in sources:
+        if spotify_id:
+            calls.append(('spotify', _spotify_by_id, (spotify_id, spotify_user_id)))
+        elif title and artist:
+            calls.append(('spotify', _spotify_by_title, (title, artist, spotify_user_id)))
+    if 'discogs' in sources:
+        if discogs_id:
+            calls.append(('discogs', _discogs_by_id, (discogs_id,)))
+        elif title and artist:
+            calls.append(('discogs', _discogs_by_title, (title, artist, discogs_user_id)))
+    if 'lastfm' in sources:
+        if mbid:
+            calls.append(('lastfm', _lastfm_by_mbid, (mbid, artist, title, lastfm_user_id)))
+        elif title and artist:
+            calls.append(('lastfm', _lastfm_by_title, (title, artist, lastfm_user_id)))
+    if 'musicbrainz' in sources:
+        if mbid:
+            calls.append(('musicbrainz', _musicbrainz_by_mbid, (mbid,)))
+        elif title and artist:
+            calls.append(('musicbrainz', _musicbrainz_by_title, (title, artist)))
+    return calls
+
+def _iter_fetch_sources(calls: List[Tuple[str, Any, tuple]], sources_timeout: Optional[int] = None):
+    """Lanza las llamadas en paralelo (omitiendo circuitos abiertos) y genera (fuente, estado, resultado) según terminan."""
+    tasks = {}
+    # Executor compartido, con un máximo de REQUEST_MAX_CONCURRENCY llamadas simultáneas por petición
+    pool = io_executor.limited(Config.REQUEST_MAX_CONCURRENCY)
+    for src, fn, args in calls:
+        if not get_breaker(src).allow_request():
+            yield src, 'skipped', None
+            continue
+        tasks[pool.submit(fn, *args)] = src
+    if tasks:
+        yield from _iter_source_results(tasks, sources_timeout)
+
+def _fetch_sources(calls: List[Tuple[str, Any, tuple]], sources_timeout: Optional[int] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Ejecuta las llamadas en paralelo y devuelve (resultados, estados)."""
+    external_results: Dict[str, Dict[str, Any]] = {}
+    sources_status: Dict[str, str] = {}
+    for src, status, res in _iter_fetch_sources(calls, sources_timeout):
+        sources_status[src] = status
+        if res:
+            external_results[src] = res
+    return external_results, sources_status
+
+def _persistable_results(results: Dict[str, Dict[str, Any]], statuses: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Solo se guardan las fuentes que respondieron (también las vacías, para no repetirlas)."""
+    return {src: results.get(src, {}) for src, status in statuses.items() if status in ('ok', 'empty')}
+
+def _iter_source_results(tasks: Dict[Any, str], sources_timeout: Optional[int] = None):
+    """
+    Espera a cada fuente hasta su propio plazo y genera (fuente, estado, resultado) según terminan.
+    Las fuentes que no terminan a tiempo se marcan como 'timeout' y se descartan.
+    """
+    start = time.monotonic()
+    deadlines = {
+        fut: start + (sources_timeout if sources_timeout is not None else get_source_timeout(src))
+        for fut, src in tasks.items()
+    }
+    pending = set(tasks)
+    while pending:
+        now = time.monotonic()
+        expired = {fut for fut in pending if deadlines[fut] <= now}
+        for fut in expired:
+            fut.cancel()
+            logger.debug("external %s timeout", tasks[fut])
+            yield tasks[fut], 'timeout', None
+        pending -= expired
+        if not pending:
+            break
+        done, pending = wait(pending, timeout=min(deadlines[f] for f in pending) - now, return_when=FIRST_COMPLETED)
+        for fut in done:
+            src = tasks[fut]
+            try:
+                res = fut.result()
+            except ExecutorSaturated:
+                yield src, 'busy', None
+                continue
+            except Exception as e:
+                logger.debug("external %s failed: %s", src, e)
+                yield src, 'error', None
+                continue
+            yield src, ('ok' if res else 'empty'), res
+
+def _assemble_details(
+    collection_name: str,
+    result: Dict[str, Any],
+    external_results: Dict[str, Dict[str, Any]],
+    sources_status: Dict[str, str],
+    stored: Dict[str, Dict[str, Any]],
+    stale: List[str],
+    ids: Dict[str, Any],
+    refresh: bool = False,
+    exact_ids: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Guarda lo obtenido en el documento, completa con el enriquecimiento guardado,
+    programa el refresco de lo caducado, registra las identidades y fusiona por prioridad.
+    exact_ids: ids seguros (del llamante o del mapa de identidades).
+    """
+    album_id = result.get('_id')
+    if album_id:
+        save_enrichment(collection_name, album_id, _persistable_results(external_results, sources_status))
+        for src, data in stored.items():
+            if src in sources_status and sources_status[src] in ('ok', 'empty'):
+                continue
+            if data:
+                external_results.setdefault(src, data)
+            sources_status.setdefault(src, 'stale' if src in stale else 'cached')
+        stale_calls = [] if refresh else _build_source_calls(stale, **ids)
+        if stale_calls:
+            schedule_refresh(
+                collection_name, album_id, [src for src, _, _ in stale_calls],
+                lambda: _persistable_results(*_fetch_sources(stale_calls, None))
+            )
+
+    record_from_results(collection_name, result, external_results, exact_ids or {}, ids.get('title'), ids.get('artist'))
+
+    # Merge results according to priority
+    priority = ['spotify', 'discogs', 'lastfm', 'musicbrainz']
+    merged = dict(result or {})
+    for src in priority:
+        if src in external_results:
+            merged = _merge_results(merged, external_results[src])
+
+    # Final fallback DB search by title+artist
+    title, artist = ids.get('title'), ids.get('artist')
+    if not merged and title and artist:
+        final_db = _get_album_from_mongo(collection_name, title, artist)
+        if final_db:
+            merged = _merge_results(merged, final_db)
+
+    if merged and sources_status:
+        merged["sources_status"] = sources_status
+    return merged or {}
+
 # -----------------------
 # Main: parallel get_album_details
 # -----------------------
+def _is_not_found(outcome: Tuple[Dict[str, Any], Dict[str, str]]) -> bool:
+    """
+    "No encontrado" solo si la DB no lo tiene y todas las fuentes consultadas respondieron vacío:
+    un timeout, un error o un circuito abierto no se recuerdan.
+    """
+    merged, sources_status = outcome
+    return merged == {} and all(status == 'empty' for status in sources_status.values())
+
+# Agrupa peticiones de detalle idénticas y recuerda los "no encontrado" durante ALBUM_NOT_FOUND_TTL
+_details_flight = SingleFlight(negative_ttl=Config.ALBUM_NOT_FOUND_TTL, is_negative=_is_not_found)
+
+def _details_key(
+    collection_name: str,
+    db_id: Optional[str],
+    spotify_id: Optional[str],
+    mbid: Optional[str],
+    discogs_id: Optional[str],
+    title: Optional[str],
+    artist: Optional[str],
+    spotify_user_id: Optional[str],
+    discogs_user_id: Optional[str],
+    lastfm_user_id: Optional[str],
+    sources: Optional[List[str]],
+) -> tuple:
+    """Clave normalizada de una búsqueda de detalle."""
+    def norm(value: Optional[str]) -> Optional[str]:
+        return unquote(value).strip().lower() if value else None
+    return (
+        collection_name, db_id, spotify_id, norm(mbid), discogs_id, norm(title), norm(artist),
+        spotify_user_id, discogs_user_id, lastfm_user_id, tuple(sorted(_normalize_sources(sources))),
+    )
+
 def get_album_details(
     collection_name: str,
     db_id: Optional[str] = None,
@@ -948,13 +1217,73 @@ def get_album_details(
     discogs_user_id: Optional[str] = None,
     lastfm_user_id: Optional[str] = None,
     sources: Optional[List[str]] = None,
-    sources_timeout: Optional[int] = None
+    sources_timeout: Optional[int] = None,
+    refresh: bool = False
 ) -> Dict[str, Any]:
     """
-    Parallelized album detail aggregation.
+    Detalle de álbum con single-flight: los llamantes concurrentes con la misma búsqueda
+    (colección, ids, título, artista, fuentes) comparten una única ejecución.
+    """
+    key = _details_key(collection_name, db_id, spotify_id, mbid, discogs_id, title, artist,
+                       spotify_user_id, discogs_user_id, lastfm_user_id, sources) + (refresh,)
+    result, _ = _details_flight.do(
+        key, _get_album_details,
+        collection_name=collection_name,
+        db_id=db_id,
+        spotify_id=spotify_id,
+        mbid=mbid,
+        discogs_id=discogs_id,
+        title=title,
+        artist=artist,
+        spotify_user_id=spotify_user_id,
+        discogs_user_id=discogs_user_id,
+        lastfm_user_id=lastfm_user_id,
+        sources=sources,
+        sources_timeout=sources_timeout,
+        refresh=refresh,
+    )
+    # Copia para que ningún llamante modifique el resultado compartido
+    return dict(result) if isinstance(result, dict) else result
+
+def _get_album_details(**kwargs) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Detalle completo: consume iter_album_details y devuelve (documento final, estado de cada fuente)."""
+    merged: Dict[str, Any] = {}
+    sources_status: Dict[str, str] = {}
+    for event, src, payload in iter_album_details(**kwargs):
+        if event == 'source':
+            sources_status[src] = payload["status"]
+        elif event in ('done', 'error'):
+            merged = payload
+    return merged, sources_status
+
+def iter_album_details(
+    collection_name: str,
+    db_id: Optional[str] = None,
+    spotify_id: Optional[str] = None,
+    mbid: Optional[str] = None,
+    discogs_id: Optional[str] = None,
+    title: Optional[str] = None,
+    artist: Optional[str] = None,
+    spotify_user_id: Optional[str] = None,
+    discogs_user_id: Optional[str] = None,
+    lastfm_user_id: Optional[str] = None,
+    sources: Optional[List[str]] = None,
+    sources_timeout: Optional[int] = None,
+    refresh: bool = False
+):
+    """
+    Parallelized album detail aggregation, as a stream of events (evento, fuente, datos):
+    - ('db', 'db', documento) en cuanto se resuelve la DB (documento vacío si no hay coincidencia).
+    - ('source', fuente, {"status": ..., "data": ...}) por cada fuente, según va terminando.
+    - ('done', None, documento fusionado) al final; ('error', None, {"error": ...}) si algo falla.
     - sources controls which sources to call (db, spotify, discogs, lastfm, musicbrainz).
-    - sources_timeout (seconds): None => wait for all; int => bounded wait.
+    - sources_timeout (seconds): None => plazo por defecto de cada fuente (SOURCE_TIMEOUTS);
+      int => plazo común para todas las fuentes.
+    - Los proveedores con el circuit breaker abierto se omiten.
     - Merge priority: DB/local values preferred, then spotify, discogs, lastfm, musicbrainz.
+    - Si el álbum está en DB, el enriquecimiento por fuente se guarda en el documento y se sirve
+      desde Mongo; las fuentes caducadas se refrescan en segundo plano (refresh=True: en línea).
+    - La respuesta incluye sources_status: {fuente: ok|empty|error|timeout|skipped|busy|cached|stale}.
     """
     try:
         normalized = _normalize_sources(sources)
@@ -962,92 +1291,243 @@ def get_album_details(
 
         result: Dict[str, Any] = {}
 
+        # Mapa de identidades: completa los ids que falten para ir directos a cada endpoint por ID
+        exact_ids = dict(db_id=db_id, spotify_id=spotify_id, mbid=mbid, discogs_id=discogs_id)
+        if db_id or spotify_id or mbid or discogs_id:
+            for field, value in lookup_identity(collection_name, db_id, spotify_id, mbid, discogs_id).items():
+                exact_ids[field] = exact_ids.get(field) or value
+            db_id, spotify_id, mbid, discogs_id = (exact_ids['db_id'], exact_ids['spotify_id'],
+                                                   exact_ids['mbid'], exact_ids['discogs_id'])
+
         # DB shortcuts (fast)
         if 'db' in normalized and db_id:
-            result = _get_album_by_db_id(db_id, collection_name) or {}
+            result = _get_album_by_db_id(db_id, collection_name, with_enrichment=True) or {}
 
         if 'db' in normalized and not result:
             if spotify_id:
-                result = _get_album_db_by_spotify_id(spotify_id, collection_name) or {}
+                result = _get_album_db_by_spotify_id(spotify_id, collection_name, with_enrichment=True) or {}
+            # Solo Mongo: los proveedores se consultan después, una vez, con los ids ya resueltos
             if not result and mbid:
-                result = get_album_by_mbid(mbid, collection_name=collection_name) or {}
+                result = _get_album_db_by_external_id("mbid", mbid, collection_name, with_enrichment=True)
             if not result and discogs_id:
-                result = get_album_by_discogs_id(discogs_id, collection_name=collection_name) or {}
+                result = _get_album_db_by_external_id("discogs_id", discogs_id, collection_name, with_enrichment=True)
             if not result and title and artist:
-                result = _get_album_from_mongo(collection_name, title, artist) or {}
+                result = _get_album_from_mongo(collection_name, title, artist, with_enrichment=True) or {}
+
+        external_sources = [s for s in normalized if s != 'db']
+        album_id = result.get('_id')
+        if album_id:
+            stored, stale, missing = split_enrichment(result, external_sources)
+        else:
+            result.pop(ENRICHMENT_FIELD, None)
+            stored, stale, missing = {}, [], external_sources
+
+        if 'db' in normalized:
+            yield 'db', 'db', dict(result)
 
         # If caller asked only DB, return early
         if sources is not None and set(normalized) == {'db'}:
-            return result or {}
-
-        # Prepare parallel tasks
-        tasks = {}
-        with ThreadPoolExecutor(max_workers=5) as exe:
-            if 'spotify' in normalized:
-                if spotify_id:
-                    tasks[exe.submit(_spotify_by_id, spotify_id, spotify_user_id)] = 'spotify'
-                elif title and artist:
-                    tasks[exe.submit(_spotify_by_title, title, artist, spotify_user_id)] = 'spotify'
-            if 'discogs' in normalized:
-                if discogs_id:
-                    tasks[exe.submit(_discogs_by_id, discogs_id)] = 'discogs'
-                elif title and artist:
-                    tasks[exe.submit(_discogs_by_title, title, artist, discogs_user_id)] = 'discogs'
-            if 'lastfm' in normalized:
-                if mbid:
-                    tasks[exe.submit(_lastfm_by_mbid, mbid, artist, title, lastfm_user_id)] = 'lastfm'
-                elif title and artist:
-                    tasks[exe.submit(_lastfm_by_title, title, artist, lastfm_user_id)] = 'lastfm'
-            if 'musicbrainz' in normalized:
-                if mbid:
-                    tasks[exe.submit(_musicbrainz_by_mbid, mbid)] = 'musicbrainz'
-                elif title and artist:
-                    tasks[exe.submit(_musicbrainz_by_title, title, artist)] = 'musicbrainz'
+            yield 'done', None, result or {}
+            return
 
-            external_results: Dict[str, Dict[str, Any]] = {}
-            start = time.time()
-            if tasks:
-                if sources_timeout is None:
-                    for fut in as_completed(tasks.keys()):
-                        src = tasks[fut]
-                        try:
-                            res = fut.result()
-                            if res:
-                                external_results[src] = res
-                        except Exception as e:
-                            logger.debug("external %s failed: %s", src, e)
-                else:
-                    # bounded wait; as_completed may raise on timeout - handle gracefully
-                    try:
-                        for fut in as_completed(tasks.keys(), timeout=sources_timeout):
-                            src = tasks[fut]
-                            try:
-                                remaining = max(0, sources_timeout - (time.time() - start))
-                                res = fut.result(timeout=remaining)
-                                if res:
-                                    external_results[src] = res
-                            except Exception as e:
-                                logger.debug("external %s failed/timeout: %s", src, e)
-                    except Exception as e:
-                        logger.debug("as_completed timeout or other error: %s", e)
-
-        # Merge results according to priority
-        priority = ['spotify', 'discogs', 'lastfm', 'musicbrainz']
-        merged = dict(result or {})
-        for src in priority:
-            if src in external_results:
-                merged = _merge_results(merged, external_results[src])
-
-        # Final fallback DB search by title+artist
-        if not merged and title and artist:
-            final_db = _get_album_from_mongo(collection_name, title, artist)
-            if final_db:
-                merged = _merge_results(merged, final_db)
-
-        return merged or {}
+        # Con documento en DB: sus ids permiten consultar las fuentes y su enriquecimiento se sirve desde Mongo
+        if album_id:
+            spotify_id = spotify_id or result.get('spotify_id')
+            mbid = mbid or result.get('mbid')
+            discogs_id = discogs_id or result.get('discogs_id')
+            title = title or result.get('title')
+            artist = artist or result.get('artist')
+        inline_sources = external_sources if refresh else missing
+
+        if not refresh:
+            for src, data in stored.items():
+                yield 'source', src, {"status": 'stale' if src in stale else 'cached', "data": data}
+
+        ids = dict(spotify_id=spotify_id, discogs_id=discogs_id, mbid=mbid, title=title, artist=artist,
+                   spotify_user_id=spotify_user_id, discogs_user_id=discogs_user_id, lastfm_user_id=lastfm_user_id)
+        external_results: Dict[str, Dict[str, Any]] = {}
+        sources_status: Dict[str, str] = {}
+        for src, status, res in _iter_fetch_sources(_build_source_calls(inline_sources, **ids), sources_timeout):
+            sources_status[src] = status
+            if res:
+                external_results[src] = res
+            yield 'source', src, {"status": status, "data": res or {}}
+
+        yield 'done', None, _assemble_details(collection_name, result, external_results, sources_status,
+                                              stored, stale, ids, refresh=refresh, exact_ids=exact_ids)
     except Exception as e:
         logger.error("get_album_details unexpected error: %s", e, exc_info=True)
-        return {"error": str(e)}
+        yield 'error', None, {"error": str(e)}
+
+# -----------------------
+# Batch details
+# -----------------------
+SPOTIFY_BATCH_SIZE = 20
+
+
+def _batch_item_key(item: Dict[str, Any]) -> tuple:
+    def norm(value: Any) -> Optional[str]:
+        return unquote(str(value)).strip().lower() if value else None
+    return (item.get('db_id'), item.get('spotify_id'), norm(item.get('mbid')), item.get('discogs_id'),
+            norm(item.get('title')), norm(item.get('artist')))
+
+class _BatchTask:
+    """Llamada del lote; anota cuándo empieza a ejecutarse para contar su plazo desde ese momento."""
+
+    def __init__(self, pool, fn, *args):
+        self.started_at: Optional[float] = None
+        self.started = threading.Event()
+        self.future = pool.submit(self._run, fn, *args)
+        # Si termina sin ejecutarse (cancelada o rechazada), no hay que esperar a que empiece
+        self.future.add_done_callback(lambda _: self.started.set())
+
+    def _run(self, fn, *args):
+        self.started_at = time.monotonic()
+        self.started.set()
+        return fn(*args)
+
+def _wait_source(task: _BatchTask, src: str, start: float, sources_timeout: Optional[int]) -> Tuple[str, Any]:
+    """
+    Espera un resultado del lote hasta el plazo de su fuente, contado desde que la llamada empieza
+    a ejecutarse; en la cola del lote espera como mucho DETAILS_BATCH_QUEUE_TIMEOUT desde el inicio.
+    """
+    future = task.future
+    if not task.started.wait(timeout=max(0.0, start + Config.DETAILS_BATCH_QUEUE_TIMEOUT - time.monotonic())):
+        future.cancel()
+        return 'timeout', None
+    budget = sources_timeout if sources_timeout is not None else get_source_timeout(src)
+    deadline = (task.started_at or time.monotonic()) + budget
+    try:
+        return 'ok', future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FuturesTimeoutError:
+        future.cancel()
+        return 'timeout', None
+    except ExecutorSaturated:
+        return 'busy', None
+    except Exception as e:
+        logger.debug("external %s failed: %s", src, e)
+        return 'error', None
+
+def get_album_details_batch(
+    collection_name: str,
+    items: List[Dict[str, Any]],
+    spotify_user_id: Optional[str] = None,
+    discogs_user_id: Optional[str] = None,
+    lastfm_user_id: Optional[str] = None,
+    sources: Optional[List[str]] = None,
+    sources_timeout: Optional[int] = None,
+):
+    """
+    Detalle de varios álbumes a la vez. Devuelve un generador de (índice, detalle) en el orden de
+    entrada; el mapa de identidades, la DB y el lanzamiento de las llamadas se hacen ya al llamarla
+    (un fallo ahí sale como excepción, no a mitad de la respuesta).
+    - Las búsquedas repetidas se resuelven una sola vez.
+    - Los ids que falten se completan con el mapa de identidades (una consulta para todo el lote).
+    - La DB se consulta con una única query $in/$or.
+    - Spotify por ID se agrupa en llamadas albums?ids= de hasta 20; el resto de fuentes
+      va por el executor compartido, con DETAILS_BATCH_WORKERS llamadas simultáneas por lote.
+      MusicBrainz (1 petición/s) va aparte, de una en una, para no ocupar esos huecos esperando turno.
+    - El plazo de cada llamada cuenta desde que empieza a ejecutarse, no desde el inicio del lote.
+    - Mismo enriquecimiento guardado y sources_status que get_album_details.
+    """
+    normalized = _normalize_sources(sources)
+    external_sources = [s for s in normalized if s != 'db']
+    start = time.monotonic()
+    # Llamadas que no se pueden agrupar: executor compartido con DETAILS_BATCH_WORKERS simultáneas por lote
+    pool = io_executor.limited(Config.DETAILS_BATCH_WORKERS)
+    # MusicBrainz tiene ritmo limitado en todo el proceso: una llamada a la vez, fuera de esos huecos
+    musicbrainz_pool = io_executor.limited(1)
+
+    keys = [_batch_item_key(item) for item in items]
+    unique: Dict[tuple, Dict[str, Any]] = {}
+    for key, item in zip(keys, items):
+        unique.setdefault(key, item)
+
+    # Mapa de identidades: completa los ids que falten (como en el detalle individual)
+    for key, known in lookup_identities(collection_name, unique).items():
+        item = unique[key]
+        unique[key] = {**item, **{field: item.get(field) or value for field, value in known.items()}}
+
+    docs = _find_albums_batch(collection_name, unique) if 'db' in normalized else {}
+
+    plans: Dict[tuple, Dict[str, Any]] = {}
+    spotify_wanted: Dict[str, List[tuple]] = {}
+    for key, item in unique.items():
+        doc = dict(docs.get(key) or {})
+        ids = dict(
+            spotify_id=item.get('spotify_id') or doc.get('spotify_id'),
+            discogs_id=item.get('discogs_id'),
+            mbid=item.get('mbid'),
+            title=item.get('title') or doc.get('title'),
+            artist=item.get('artist') or doc.get('artist'),
+            spotify_user_id=spotify_user_id,
+            discogs_user_id=discogs_user_id,
+            lastfm_user_id=lastfm_user_id,
+        )
+        if doc.get('_id'):
+            stored, stale, missing = split_enrichment(doc, external_sources)
+        else:
+            doc.pop(ENRICHMENT_FIELD, None)
+            stored, stale, missing = {}, [], list(external_sources)
+        exact_ids = {field: item.get(field) for field in ('db_id', 'spotify_id', 'mbid', 'discogs_id')}
+        plans[key] = {"doc": doc, "ids": ids, "exact_ids": exact_ids, "stored": stored, "stale": stale, "tasks": {}, "status": {}}
+
+        if 'spotify' in missing and ids['spotify_id']:
+            spotify_wanted.setdefault(ids['spotify_id'], []).append(key)
+            missing = [src for src in missing if src != 'spotify']
+        for src, fn, args in _build_source_calls(missing, **ids):
+            if not get_breaker(src).allow_request():
+                plans[key]["status"][src] = 'skipped'
+                continue
+            task = _BatchTask(musicbrainz_pool if src == 'musicbrainz' else pool, fn, *args)
+            plans[key]["tasks"][src] = (task, None)
+
+    spotify_ids = list(spotify_wanted)
+    spotify_allowed = bool(spotify_ids) and get_breaker('spotify').allow_request()
+    for i in range(0, len(spotify_ids), SPOTIFY_BATCH_SIZE):
+        chunk = spotify_ids[i:i + SPOTIFY_BATCH_SIZE]
+        task = _BatchTask(pool, _spotify_by_ids, chunk) if spotify_allowed else None
+        for spotify_id in chunk:
+            for key in spotify_wanted[spotify_id]:
+                if task is None:
+                    plans[key]["status"]['spotify'] = 'skipped'
+                else:
+                    plans[key]["tasks"]['spotify'] = (task, spotify_id)
+
+    logger.info("get_album_details_batch items=%d unique=%d db_hits=%d spotify_calls=%d",
+                len(items), len(unique), len(docs), -(-len(spotify_ids) // SPOTIFY_BATCH_SIZE) if spotify_allowed else 0)
+    return _iter_batch_results(collection_name, keys, plans, start, sources_timeout)
+
+def _iter_batch_results(
+    collection_name: str,
+    keys: List[tuple],
+    plans: Dict[tuple, Dict[str, Any]],
+    start: float,
+    sources_timeout: Optional[int],
+):
+    """Espera las llamadas ya lanzadas de cada búsqueda y genera (índice, detalle) en el orden de entrada."""
+    finished: Dict[tuple, Dict[str, Any]] = {}
+    for index, key in enumerate(keys):
+        if key not in finished:
+            plan = plans[key]
+            external_results: Dict[str, Dict[str, Any]] = {}
+            sources_status = dict(plan["status"])
+            for src, (task, spotify_id) in plan["tasks"].items():
+                status, res = _wait_source(task, src, start, sources_timeout)
+                if spotify_id and res is not None:
+                    res = res.get(spotify_id) or {}
+                if status == 'ok' and not res:
+                    status = 'empty'
+                if res:
+                    external_results[src] = res
+                sources_status[src] = status
+            try:
+                finished[key] = _assemble_details(collection_name, plan["doc"], external_results, sources_status,
+                                                  plan["stored"], plan["stale"], plan["ids"], exact_ids=plan["exact_ids"])
+            except Exception as e:
+                logger.error("get_album_details_batch item error: %s", e, exc_info=True)
+                finished[key] = {"error": str(e)}
+        yield index, dict(finished[key])
 
 # -----------------------
 # CRUD & small helpers
@@ -1121,7 +1601,7 @@ def find_album_collection_service(album_id: str = None, spotify_id: str = None,
         if not query:
             continue
         try:
-            album = mongo.db[collection].find_one(query)
+            album = mongo.db[collection].find_one(query, _album_projection())
             if album:
                 album["_id"] = str(album.get("_id"))
                 return {"collection": collection, "album": album}, 200
@@ -1136,7 +1616,7 @@ def get_album_of_the_day(collection_name: str = Parameters.ALBUMS, **kwargs) ->
     Selecciona el álbum usando el día del año como índice cíclico sobre la lista ordenada por _id.
     """
     try:
-        albums = list(mongo.db[collection_name].find({}).sort("_id", 1))
+        albums = list(mongo.db[collection_name].find({}, _album_projection()).sort("_id", 1))
         total = len(albums)
         if total == 0:
             return {"error": "No albums found in collection"}
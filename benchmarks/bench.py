@@ -0,0 +1,278 @@
+"""
+Benchmark de extremo a extremo de la API a partir de un escenario en formato .http.
+
+Lanza N clientes concurrentes que eligen rutas según su peso ("# @weight N") durante un tiempo
+o un número de peticiones, y saca por ruta: peticiones, errores, p50/p95/p99/media (ms) y
+rendimiento (req/s). Con --json guarda el resultado y con --baseline lo compara con uno anterior.
+
+Solo usa la librería estándar.
+
+Uso:
+    python benchmarks/bench.py benchmarks/scenarios/default.http --concurrency 8 --duration 60 --json out.json
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_fixtures import CATALOG  # noqa: E402
+
+_VARIABLE = re.compile(r"\{\{\s*([^}]+?)\s*\}\}")
+
+# --------------------------
+# Escenario
+# --------------------------
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: str = ""
+    weight: int = 1
+
+
+def parse_scenarios(path: str, overrides: Optional[Dict[str, str]] = None) -> List[Scenario]:
+    """Bloques "### nombre" con línea de petición, cabeceras y cuerpo (como resquest.http)."""
+    variables: Dict[str, str] = {}
+    scenarios: List[Scenario] = []
+    current: Optional[Scenario] = None
+    in_body = False
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    for line in lines + ["###"]:
+        stripped = line.strip()
+        if stripped.startswith("###"):
+            if current and current.method:
+                current.body = current.body.strip()
+                scenarios.append(current)
+            current = Scenario(name=stripped.lstrip("#").strip(), method="", url="")
+            in_body = False
+            continue
+        if stripped.startswith("@") and "=" in stripped and not (current and current.method):
+            name, _, value = stripped[1:].partition("=")
+            variables[name.strip()] = value.strip()
+            continue
+        if current is None:
+            continue
+        if stripped.startswith("#"):
+            match = re.match(r"#\s*@weight\s+(\d+)", stripped)
+            if match:
+                current.weight = int(match.group(1))
+            continue
+        if not current.method:
+            if stripped:
+                parts = stripped.split()
+                current.method, current.url = parts[0].upper(), parts[1]
+            continue
+        if in_body:
+            current.body += line + "\n"
+        elif not stripped:
+            in_body = True
+        elif ":" in stripped:
+            name, _, value = stripped.partition(":")
+            current.headers[name.strip()] = value.strip()
+    variables.update(overrides or {})
+
+    def resolve(text: str) -> str:
+        return _VARIABLE.sub(lambda m: variables.get(m.group(1), m.group(0)), text)
+
+    for scenario in scenarios:
+        scenario.url = resolve(resolve(scenario.url))
+        scenario.body = resolve(scenario.body)
+        scenario.headers = {k: resolve(v) for k, v in scenario.headers.items()}
+    return [s for s in scenarios if s.weight > 0]
+
+
+def render(scenario: Scenario, rnd: random.Random):
+    """Sustituye {{$album.*}} por un álbum aleatorio del catálogo (codificado en la URL)."""
+    album = rnd.choice(CATALOG)
+
+    def value(m, encode):
+        name = m.group(1)
+        if not name.startswith("$album."):
+            return m.group(0)
+        raw = str(album.get(name[len("$album."):], ""))
+        return quote(raw, safe="") if encode else raw
+
+    url = _VARIABLE.sub(lambda m: value(m, True), scenario.url)
+    body = _VARIABLE.sub(lambda m: value(m, False), scenario.body)
+    return url, body
+
+# --------------------------
+# Ejecución
+# --------------------------
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, name: str, elapsed: float, status: int):
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            self.statuses[name][status] += 1
+            if status == 0 or status >= 500:
+                self.errors[name] += 1
+
+
+def _connection(url: str, timeout: float):
+    parts = urlsplit(url)
+    cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    return cls(parts.netloc, timeout=timeout)
+
+
+def worker(scenarios: List[Scenario], weights: List[int], results: Results, deadline: float,
+           budget: Optional[List[int]], budget_lock: threading.Lock, timeout: float, seed: int):
+    rnd = random.Random(seed)
+    connections: Dict[str, http.client.HTTPConnection] = {}
+    while time.monotonic() < deadline:
+        if budget is not None:
+            with budget_lock:
+                if budget[0] <= 0:
+                    break
+                budget[0] -= 1
+        scenario = rnd.choices(scenarios, weights=weights)[0]
+        url, body = render(scenario, rnd)
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        status = 0
+        start = time.perf_counter()
+        try:
+            conn = connections.get(parts.netloc) or _connection(url, timeout)
+            connections[parts.netloc] = conn
+            conn.request(scenario.method, path, body=body.encode("utf-8") if body else None, headers=scenario.headers)
+            response = conn.getresponse()
+            response.read()  # incluye el tiempo hasta el último byte (SSE / NDJSON)
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connections.pop(parts.netloc, None)
+        results.add(scenario.name, time.perf_counter() - start, status)
+    for conn in connections.values():
+        conn.close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results: Results, elapsed: float) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    all_latencies = []
+    total_errors = 0
+    for name, values in results.latencies.items():
+        all_latencies.extend(values)
+        total_errors += results.errors[name]
+        summary[name] = _row(values, results.errors[name], elapsed)
+        summary[name]["status"] = dict(results.statuses[name])
+    summary["TOTAL"] = _row(all_latencies, total_errors, elapsed)
+    return summary
+
+
+def _row(values: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "mean_ms": round(sum(values) / len(values) * 1000, 1) if values else 0.0,
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def print_table(summary: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None):
+    header = f"{'ruta':<48} {'req':>7} {'err':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'media':>9} {'req/s':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in summary.items():
+        line = (f"{name[:48]:<48} {row['requests']:>7} {row['errors']:>5} {row['p50_ms']:>9} "
+                f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['mean_ms']:>9} {row['rps']:>8}")
+        base = (baseline or {}).get(name)
+        if base and base.get("p95_ms"):
+            delta = (row["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+            line += f"   p95 {delta:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la API a partir de un escenario .http")
+    parser.add_argument("scenario", help="Fichero .http (p.ej. benchmarks/scenarios/default.http)")
+    parser.add_argument("--base-url", help="Sobrescribe @baseUrl del escenario")
+    parser.add_argument("--var", action="append", default=[], help="Sobrescribe una variable: nombre=valor")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--requests", type=int, default=None, help="Número total de peticiones (en lugar de duración)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Segundos de calentamiento que no cuentan")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--only", help="Ejecuta solo los escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Guarda el resumen en este fichero")
+    parser.add_argument("--baseline", help="Resumen JSON anterior con el que comparar p95")
+    args = parser.parse_args()
+
+    overrides = dict(v.split("=", 1) for v in args.var)
+    if args.base_url:
+        overrides["baseUrl"] = args.base_url
+    scenarios = parse_scenarios(args.scenario, overrides)
+    if args.only:
+        scenarios = [s for s in scenarios if args.only.lower() in s.name.lower()]
+    if not scenarios:
+        sys.exit("El escenario no tiene peticiones")
+    weights = [s.weight for s in scenarios]
+
+    def run(duration: float, total: Optional[int]) -> Tuple[Results, float]:
+        results = Results()
+        budget = [total] if total is not None else None
+        budget_lock = threading.Lock()
+        deadline = time.monotonic() + (duration if total is None else 24 * 3600)
+        threads = [threading.Thread(target=worker, args=(scenarios, weights, results, deadline, budget, budget_lock,
+                                                         args.timeout, args.seed * 1000 + i), daemon=True)
+                   for i in range(args.concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results, time.perf_counter() - start
+
+    if args.warmup > 0:
+        print(f"Calentando {args.warmup:.0f}s...", flush=True)
+        run(args.warmup, None)
+    print(f"Carga: {args.concurrency} clientes, "
+          f"{f'{args.requests} peticiones' if args.requests else f'{args.duration:.0f}s'}", flush=True)
+    results, elapsed = run(args.duration, args.requests)
+    summary = summarize(results, elapsed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("routes")
+    print_table(summary, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"scenario": args.scenario, "concurrency": args.concurrency, "elapsed_s": round(elapsed, 2),
+                       "routes": summary}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Informe del tiempo de importación al arrancar (lo que paga cada arranque en frío antes de servir).
+
+Ejecuta `python -X importtime -c "import app"` en un proceso limpio (--runs veces, se queda con la
+mediana por módulo) y saca: tiempo total de `import app`, los módulos con más tiempo acumulado,
+el tiempo propio agrupado por paquete raíz y qué dependencias pesadas (cv2, sklearn, scipy,
+google.generativeai...) se cargan ya al arrancar. Con --json guarda el resultado y con
+--baseline lo compara con uno anterior.
+
+Solo usa la librería estándar. Las variables obligatorias de config.py toman valores de prueba
+si no están definidas (no se conecta a nada: solo se importa la app).
+
+Uso:
+    python benchmarks/import_times.py --runs 5 --top 25 --json imports.json
+"""
+import argparse
+import base64
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencias que no deberían cargarse hasta que se usan (cartas, Gemini, scripts antiguos)
+HEAVY_MODULES = (
+    "cv2", "numpy", "sklearn", "scipy", "skimage", "PIL", "google.generativeai", "spotipy", "psutil",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+# --------------------------
+# Medición
+# --------------------------
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    for name in ("SPOTIFY_CLIENT_ID", "SPOTIFY_SECRET", "LASTFM_API_KEY", "LASTFM_API_SECRET",
+                 "DISCOGS_API_KEY", "DISCOGS_API_SECRET"):
+        env.setdefault(name, "bench")
+    env.setdefault("MONGO_URI", "mongodb://127.0.0.1:27017/discana")
+    env.setdefault("FRONTEND_URL", "http://127.0.0.1:8080")
+    env.setdefault("API_URL", "http://127.0.0.1:8080")
+    env.setdefault("API_VERSION", "v2")
+    # Clave Fernet válida (32 bytes en base64 urlsafe) sin importar cryptography aquí
+    env.setdefault("ENCRYPTION_KEY", base64.urlsafe_b64encode(os.urandom(32)).decode())
+    env.pop("PYTHONIMPORTTIME", None)
+    return env
+
+
+def run_once(module: str) -> Dict[str, object]:
+    """Un `import <module>` en un proceso nuevo: tiempo total y filas de -X importtime."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append({"name": match.group(3), "self_us": int(match.group(1)), "cumulative_us": int(match.group(2))})
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        sys.exit(f"`import {module}` falló:\n" + "\n".join(errors[-20:]))
+    return {"wall_ms": wall_ms, "rows": rows}
+
+
+def summarize(runs: List[Dict[str, object]], module: str, top: int) -> Dict[str, object]:
+    self_us: Dict[str, List[int]] = defaultdict(list)
+    cumulative_us: Dict[str, List[int]] = defaultdict(list)
+    for run in runs:
+        for row in run["rows"]:
+            self_us[row["name"]].append(row["self_us"])
+            cumulative_us[row["name"]].append(row["cumulative_us"])
+
+    def ms(values: List[int]) -> float:
+        return round(statistics.median(values) / 1000, 1)
+
+    modules = sorted(
+        ({"module": name, "self_ms": ms(self_us[name]), "cumulative_ms": ms(cumulative_us[name])} for name in self_us),
+        key=lambda row: row["cumulative_ms"], reverse=True,
+    )
+    packages: Dict[str, float] = defaultdict(float)
+    for row in modules:
+        packages[row["module"].split(".")[0]] += row["self_ms"]
+
+    return {
+        "module": module,
+        "runs": len(runs),
+        "wall_ms": round(statistics.median(run["wall_ms"] for run in runs), 1),
+        "import_ms": next((row["cumulative_ms"] for row in modules if row["module"] == module), 0.0),
+        "top_modules": modules[:top],
+        "packages": dict(sorted(((name, round(value, 1)) for name, value in packages.items()),
+                                key=lambda item: item[1], reverse=True)[:top]),
+        "heavy_loaded": sorted(name for name in HEAVY_MODULES if name in self_us),
+    }
+
+# --------------------------
+# Salida
+# --------------------------
+
+def print_report(summary: Dict[str, object], baseline: Optional[Dict[str, object]] = None):
+    line = f"import {summary['module']}: {summary['import_ms']} ms (proceso completo {summary['wall_ms']} ms, mediana de {summary['runs']})"
+    if baseline and baseline.get("import_ms"):
+        delta = (summary["import_ms"] - baseline["import_ms"]) / baseline["import_ms"] * 100
+        line += f"   {delta:+.0f}%"
+    print(line)
+    print()
+
+    base_modules = {row["module"]: row for row in (baseline or {}).get("top_modules", [])}
+    header = f"{'módulo':<56} {'propio':>9} {'acumulado':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in summary["top_modules"]:
+        line = f"{row['module'][:56]:<56} {row['self_ms']:>9} {row['cumulative_ms']:>10}"
+        base = base_modules.get(row["module"])
+        if base and base.get("cumulative_ms"):
+            line += f"   {row['cumulative_ms'] - base['cumulative_ms']:+.1f} ms"
+        print(line)
+    print()
+
+    header = f"{'paquete':<56} {'propio':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, value in summary["packages"].items():
+        print(f"{name[:56]:<56} {value:>9}")
+    print()
+
+    heavy = summary["heavy_loaded"]
+    print(f"Dependencias pesadas cargadas al arrancar: {', '.join(heavy) if heavy else 'ninguna'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación por módulo al arrancar la app")
+    parser.add_argument("--module", default="app", help="Módulo a importar (por defecto app, como gunicorn)")
+    parser.add_argument("--runs", type=int, default=3, help="Procesos a medir (se usa la mediana)")
+    parser.add_argument("--top", type=int, default=25, help="Filas de cada tabla")
+    parser.add_argument("--json", help="Guarda el resumen en este fichero")
+    parser.add_argument("--baseline", help="Resumen JSON anterior con el que comparar")
+    args = parser.parse_args()
+
+    runs = [run_once(args.module) for _ in range(max(args.runs, 1))]
+    summary = summarize(runs, args.module, args.top)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
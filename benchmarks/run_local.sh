@@ -0,0 +1,57 @@
+#!/usr/bin/env bash
+# Benchmark local sin red: mongod temporal + stubs de proveedores + gunicorn (gunicorn.conf.py) + bench.py.
+#
+# Uso:
+#   benchmarks/run_local.sh [argumentos de bench.py]
+#   STUB_ARGS="--latency spotify=120:40 --latency lastfm=250:80 --error-rate '*'=0.02" benchmarks/run_local.sh --duration 60
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+WORKDIR="$(mktemp -d)"
+MONGO_PORT="${MONGO_PORT:-27018}"
+STUB_PORT="${STUB_PORT:-9100}"
+APP_PORT="${APP_PORT:-8080}"
+SCENARIO="${SCENARIO:-$ROOT/benchmarks/scenarios/default.http}"
+PIDS=()
+
+cleanup() {
+    for pid in "${PIDS[@]}"; do kill "$pid" 2>/dev/null || true; done
+    wait 2>/dev/null || true
+    rm -rf "$WORKDIR"
+}
+trap cleanup EXIT
+
+wait_for() {
+    for _ in $(seq 1 50); do
+        curl -s -o /dev/null "$1" && return 0
+        sleep 0.2
+    done
+    echo "No responde: $1" >&2
+    exit 1
+}
+
+mkdir -p "$WORKDIR/db"
+mongod --dbpath "$WORKDIR/db" --port "$MONGO_PORT" --bind_ip 127.0.0.1 --quiet --logpath "$WORKDIR/mongod.log" &
+PIDS+=($!)
+
+# shellcheck disable=SC2086
+eval python "$ROOT/benchmarks/stub_server.py" --port "$STUB_PORT" ${STUB_ARGS:-} &
+PIDS+=($!)
+eval "$(python "$ROOT/benchmarks/stub_server.py" --port "$STUB_PORT" --print-env)"
+
+export MONGO_URI="mongodb://127.0.0.1:$MONGO_PORT/discana"
+export ENCRYPTION_KEY="${ENCRYPTION_KEY:-$(python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())')}"
+export SPOTIFY_CLIENT_ID=bench SPOTIFY_SECRET=bench LASTFM_API_KEY=bench LASTFM_API_SECRET=bench
+export DISCOGS_API_KEY=bench DISCOGS_API_SECRET=bench
+export FRONTEND_URL="http://127.0.0.1:$APP_PORT" API_URL="http://127.0.0.1:$APP_PORT"
+export API_VERSION="${API_VERSION:-v2}" PORT="$APP_PORT"
+
+sleep 1
+python "$ROOT/benchmarks/seed.py" --mongo-uri "$MONGO_URI"
+
+(cd "$ROOT" && gunicorn -c gunicorn.conf.py app:app --log-level warning) &
+PIDS+=($!)
+wait_for "http://127.0.0.1:$APP_PORT/api/$API_VERSION/"
+
+python "$ROOT/benchmarks/bench.py" "$SCENARIO" --base-url "http://127.0.0.1:$APP_PORT/api/$API_VERSION" "$@"
+curl -s "http://127.0.0.1:$STUB_PORT/_stub/stats"; echo
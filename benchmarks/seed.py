@@ -0,0 +1,77 @@
+"""
+Carga en Mongo los álbumes del catálogo sintético (los mismos que sirven los stubs).
+
+Uso:
+    python benchmarks/seed.py --mongo-uri mongodb://127.0.0.1:27018/discana --collection albums --count 500
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from cryptography.fernet import Fernet
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_fixtures import CATALOG  # noqa: E402
+
+_FORMATS = ["Vinilo", "CD", "Cassette"]
+_MOODS = ["tranquilo", "enérgico", "melancólico", "festivo"]
+
+
+def album_document(a: dict) -> dict:
+    """Documento con la forma de los álbumes de la colección (fechas dd/mm/yyyy, duración en minutos)."""
+    year, month, day = a["date"].split("-")
+    return {
+        "title": a["title"],
+        "artist": a["artist"],
+        "spotify_id": a["spotify_id"],
+        "mbid": a["mbid"],
+        "discogs_id": str(a["discogs_id"]),
+        "date_release": f"{day}/{month}/{year}",
+        "genre": a["genres"][:1],
+        "subgenres": a["genres"][1:],
+        "mood": [_MOODS[a["index"] % len(_MOODS)]],
+        "format": _FORMATS[a["index"] % len(_FORMATS)],
+        "country": a["country"],
+        "label": a["label"],
+        "tracks": len(a["tracks"]),
+        "duration": round(sum(t["duration_ms"] for t in a["tracks"]) / 60000),
+        "type": "Album",
+        "compilations": [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga el catálogo sintético en Mongo")
+    parser.add_argument("--mongo-uri", default=os.environ.get("MONGO_URI", "mongodb://127.0.0.1:27018/discana"))
+    parser.add_argument("--collection", default="albums")
+    parser.add_argument("--count", type=int, default=len(CATALOG))
+    parser.add_argument("--spotify-user", default="bench-user", help="Usuario con token de Spotify (cifrado con ENCRYPTION_KEY)")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri)
+    db = client.get_default_database()
+    collection = db[args.collection]
+    collection.delete_many({})
+    docs = [album_document(a) for a in CATALOG[:args.count]]
+    collection.insert_many(docs)
+    for field in ("spotify_id", "title", "artist"):
+        collection.create_index(field)
+    print(f"{len(docs)} álbumes cargados en {db.name}.{args.collection}")
+
+    # Token de usuario para las rutas de Spotify /me (los stubs aceptan cualquiera)
+    encryption_key = os.environ.get("ENCRYPTION_KEY")
+    if args.spotify_user and encryption_key:
+        token = Fernet(encryption_key).encrypt(b"stub-user-token").decode()
+        db["spotify_tokens"].update_one(
+            {"user_id": args.spotify_user},
+            {"$set": {"access_token": token, "last_updated": datetime.utcnow()}},
+            upsert=True
+        )
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
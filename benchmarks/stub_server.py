@@ -0,0 +1,274 @@
+"""
+Servidor de stubs para Spotify, Last.fm, Discogs, MusicBrainz y el CDN de imágenes.
+
+Permite medir la API sin red: cada proveedor cuelga de un prefijo (/spotify/v1/, /lastfm/2.0/, ...)
+y la app se apunta a él con las variables *_API_URL (ver --print-env).
+
+- Respuestas grabadas (fixtures/recorded/<proveedor>.jsonl) si existen; si no, las sintéticas de stub_fixtures.
+- --record: hace de proxy hacia el proveedor real y guarda lo que responde.
+- --latency proveedor=media:jitter (ms) y --error-rate proveedor=0.05 para inyectar latencia y errores.
+- /_stub/stats devuelve las peticiones servidas por proveedor; /_stub/reset las pone a cero.
+
+Solo usa la librería estándar.
+
+Uso:
+    python benchmarks/stub_server.py --port 9100 --latency spotify=120:40 --latency lastfm=250:80 --error-rate discogs=0.05
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_fixtures  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "recorded")
+
+# Prefijo local -> (nombre, URL real, variable de entorno de la app, sufijo de la URL base)
+PROVIDERS = {
+    "spotify": ("spotify", "https://api.spotify.com/", "SPOTIFY_API_URL", "v1/"),
+    "spotify-accounts": ("spotify-accounts", "https://accounts.spotify.com/", "SPOTIFY_ACCOUNTS_URL", ""),
+    "scannables": ("scannables", "https://scannables.scdn.co/", "SPOTIFY_SCANNABLES_URL", ""),
+    "lastfm": ("lastfm", "https://ws.audioscrobbler.com/", "LASTFM_API_URL", "2.0/"),
+    "discogs": ("discogs", "https://api.discogs.com/", "DISCOGS_API_URL", ""),
+    "musicbrainz": ("musicbrainz", "https://musicbrainz.org/", "MUSICBRAINZ_API_URL", "ws/2/"),
+    "images": ("images", None, None, ""),
+}
+
+# Parámetros que no forman parte de la clave de una respuesta grabada
+VOLATILE_PARAMS = {"api_key", "api_sig", "token", "sk", "format", "fmt", "oauth_signature", "oauth_nonce", "oauth_timestamp"}
+
+# --------------------------
+# Respuestas grabadas
+# --------------------------
+
+def request_key(method: str, path: str, query: Dict[str, str]) -> str:
+    params = "&".join(f"{k}={v}" for k, v in sorted(query.items()) if k not in VOLATILE_PARAMS)
+    return f"{method} {path}?{params}"
+
+
+class Recordings:
+    """Respuestas grabadas por proveedor, indexadas por método + ruta + query (sin credenciales)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".jsonl"):
+                    self._load(name[:-len(".jsonl")], os.path.join(directory, name))
+
+    def _load(self, provider: str, path: str):
+        entries = self._data.setdefault(provider, {})
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["key"]] = entry
+
+    def get(self, provider: str, key: str) -> Optional[Dict[str, Any]]:
+        return self._data.get(provider, {}).get(key)
+
+    def save(self, provider: str, key: str, status: int, body: Any):
+        entry = {"key": key, "status": status, "body": body}
+        with self._lock:
+            self._data.setdefault(provider, {})[key] = entry
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{provider}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+# --------------------------
+# Latencia y errores
+# --------------------------
+
+def parse_provider_map(values, cast):
+    result = {}
+    for item in values or []:
+        name, _, value = item.partition("=")
+        result[name.strip()] = cast(value.strip())
+    return result
+
+
+def parse_latency(value: str) -> Tuple[float, float]:
+    mean, _, jitter = value.partition(":")
+    return float(mean) / 1000, float(jitter or 0) / 1000
+
+
+class Faults:
+    def __init__(self, latency: Dict[str, Tuple[float, float]], error_rate: Dict[str, float], error_status: int, seed: Optional[int]):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _pick(self, name: str, table: Dict[str, Any]):
+        return table.get(name, table.get("*"))
+
+    def delay(self, provider: str) -> float:
+        latency = self._pick(provider, self.latency)
+        if not latency:
+            return 0.0
+        mean, jitter = latency
+        with self._lock:
+            return max(0.0, self._random.gauss(mean, jitter) if jitter else mean)
+
+    def should_fail(self, provider: str) -> bool:
+        rate = self._pick(provider, self.error_rate) or 0.0
+        with self._lock:
+            return rate > 0 and self._random.random() < rate
+
+# --------------------------
+# Servidor
+# --------------------------
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "DiscanaStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _send(self, status: int, body: Any, content_type: str = "application/json"):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if content_type == "image/png":
+            self.send_header("Cache-Control", "public, max-age=86400")
+            self.send_header("ETag", f'"{hash(payload) & 0xFFFFFFFF:x}"')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str):
+        split = urlsplit(self.path)
+        prefix, _, rest = split.path.lstrip("/").partition("/")
+        query = dict(parse_qsl(split.query, keep_blank_values=True))
+        raw_body = b""
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+            if "application/x-www-form-urlencoded" in (self.headers.get("Content-Type") or ""):
+                query.update(parse_qsl(raw_body.decode("utf-8"), keep_blank_values=True))
+
+        if prefix == "_stub":
+            if rest.startswith("reset"):
+                self.server.stats.clear()
+            return self._send(200, {"requests": dict(self.server.stats)})
+        if prefix not in PROVIDERS:
+            return self._send(404, {"error": f"Proveedor desconocido: {prefix}"})
+
+        self.server.stats[prefix] += 1
+        delay = self.server.faults.delay(prefix)
+        if delay:
+            time.sleep(delay)
+        if self.server.faults.should_fail(prefix):
+            self.server.stats[f"{prefix}:errors"] += 1
+            return self._send(self.server.faults.error_status, {"error": "Stub: error inyectado"})
+
+        if prefix in ("images", "scannables"):
+            size = 640 if prefix == "images" else 320
+            return self._send(200, stub_fixtures.png(rest, size=size), "image/png")
+
+        key = request_key(method, rest, query)
+        if self.server.record:
+            return self._proxy(prefix, method, rest, split.query, key, raw_body)
+        recorded = self.server.recordings.get(prefix, key)
+        if recorded:
+            return self._send(recorded["status"], recorded["body"])
+        ctx = {"image_base": f"{self.server.public_url}images/", "auth": self.headers.get("Authorization", "user")}
+        status, body = stub_fixtures.HANDLERS[prefix](method, rest, query, ctx)
+        self._send(status, body)
+
+    def _proxy(self, prefix: str, method: str, rest: str, raw_query: str, key: str, data: bytes):
+        upstream = PROVIDERS[prefix][1]
+        url = f"{upstream}{rest}" + (f"?{raw_query}" if raw_query else "")
+        headers = {h: self.headers[h] for h in ("Authorization", "User-Agent", "Accept", "Content-Type") if self.headers.get(h)}
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=data or None, headers=headers, method=method), timeout=30) as resp:
+                status, raw = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, raw = e.code, e.read()
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            return self._send(status, raw, "application/octet-stream")
+        self.server.recordings.save(prefix, key, status, body)
+        self._send(status, body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, faults: Faults, recordings: Recordings, record: bool, verbose: bool):
+        super().__init__(address, StubHandler)
+        self.faults = faults
+        self.recordings = recordings
+        self.record = record
+        self.verbose = verbose
+        self.stats: Counter = Counter()
+        host, port = self.server_address[:2]
+        self.public_url = f"http://{'127.0.0.1' if host in ('0.0.0.0', '') else host}:{port}/"
+
+
+def env_overrides(public_url: str) -> Dict[str, str]:
+    """Variables de entorno que apuntan la app al servidor de stubs."""
+    return {env: f"{public_url}{prefix}/{suffix}" for prefix, (_, _, env, suffix) in PROVIDERS.items() if env}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stubs offline de los proveedores externos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", action="append", help="proveedor=media_ms[:jitter_ms] ('*' para todos)")
+    parser.add_argument("--error-rate", action="append", help="proveedor=probabilidad (0-1, '*' para todos)")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None, help="Semilla para latencias/errores reproducibles")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directorio de respuestas grabadas")
+    parser.add_argument("--record", action="store_true", help="Proxy a los proveedores reales grabando las respuestas")
+    parser.add_argument("--print-env", action="store_true", help="Imprime las variables de entorno para la app y sale")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    faults = Faults(
+        latency=parse_provider_map(args.latency, parse_latency),
+        error_rate=parse_provider_map(args.error_rate, float),
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    if args.print_env:
+        host = "127.0.0.1" if args.host in ("0.0.0.0", "") else args.host
+        for name, value in env_overrides(f"http://{host}:{args.port}/").items():
+            print(f"export {name}={value}")
+        return
+
+    server = StubServer((args.host, args.port), faults, Recordings(args.fixtures), args.record, args.verbose)
+    print(f"Stubs escuchando en {server.public_url} ({'grabando' if args.record else 'replay'})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
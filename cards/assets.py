@@ -0,0 +1,230 @@
+"""
+Caché de recursos de las cartas.
+
+- Imágenes remotas (portadas, códigos de Spotify) por URL: LRU en memoria de imágenes ya
+  decodificadas acotada por bytes (ASSET_CACHE_MEMORY_BYTES) y copia en disco de lo descargado
+  (ASSET_CACHE_DIR) que expulsa lo menos usado al pasar de ASSET_CACHE_DISK_BYTES. Pasados
+  ASSET_CACHE_TTL segundos se revalidan con If-None-Match / If-Modified-Since (un 304 no vuelve a
+  descargar) y, si la descarga falla, se sigue usando la copia.
+- Iconos y fuentes locales: se decodifican una vez y quedan en memoria.
+
+Las imágenes devueltas son compartidas y de solo lectura (cv2.resize ya devuelve una nueva).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from config import Config
+from logging_config import logger
+from utils.cache import MISSING, SizedLRU
+from utils.resilience import track_provider_call
+from utils.singleflight import SingleFlight
+
+# Tras un fallo de red se reintenta la revalidación pasado este tiempo (mientras, la copia)
+RETRY_AFTER_ERROR = 60
+
+_memory = SizedLRU(max_bytes=Config.ASSET_CACHE_MEMORY_BYTES, sizeof=lambda entry: entry[0].nbytes)
+_fetch_flight = SingleFlight()
+_session = requests.Session()
+_disk_lock = threading.Lock()
+_disk_bytes: Optional[int] = None  # se calcula al primer uso
+
+
+def _decode(data: bytes):
+    """Bytes de imagen -> array BGR uint8 de solo lectura (el formato con el que dibuja cv2)."""
+    import numpy as np
+    import cv2
+    from PIL import Image
+    image = Image.open(BytesIO(data))
+    array = cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    array.setflags(write=False)
+    return array
+
+
+def _is_fresh(meta: Optional[Dict[str, Any]]) -> bool:
+    return bool(meta) and time.time() - meta.get("fetched_at", 0) < Config.ASSET_CACHE_TTL
+
+# --------------------------
+# Nivel en disco
+# --------------------------
+
+def _disk_paths(url: str) -> Tuple[str, str]:
+    digest = hashlib.sha256(url.encode()).hexdigest()
+    base = os.path.join(Config.ASSET_CACHE_DIR, digest[:2], digest)
+    return base + '.bin', base + '.json'
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _scan_disk():
+    """Ficheros de datos del nivel en disco: [(último uso, tamaño, ruta)]."""
+    files = []
+    for root, _, names in os.walk(Config.ASSET_CACHE_DIR):
+        for name in names:
+            if name.endswith('.bin'):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def _evict_disk():
+    """Borra lo menos usado (mtime se actualiza en cada uso) hasta bajar al 90% del máximo."""
+    global _disk_bytes
+    files = sorted(_scan_disk())
+    _disk_bytes = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if _disk_bytes <= Config.ASSET_CACHE_DISK_BYTES * 0.9:
+            break
+        for victim in (path, path[:-4] + '.json'):
+            try:
+                os.remove(victim)
+            except OSError:
+                pass
+        _disk_bytes -= size
+
+
+def _read_disk(url: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+    data_path, meta_path = _disk_paths(url)
+    try:
+        with open(data_path, 'rb') as f:
+            data = f.read()
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        os.utime(data_path)
+    except (OSError, ValueError):
+        return None
+    return data, meta
+
+
+def _write_disk(url: str, data: Optional[bytes], meta: Dict[str, Any]):
+    """Guarda datos y metadatos (o solo metadatos si data es None, tras un 304)."""
+    global _disk_bytes
+    if Config.ASSET_CACHE_DISK_BYTES <= 0:
+        return
+    data_path, meta_path = _disk_paths(url)
+    try:
+        _write_atomic(meta_path, json.dumps(meta).encode())
+        if data is None:
+            return
+        _write_atomic(data_path, data)
+        with _disk_lock:
+            if _disk_bytes is None:
+                _disk_bytes = sum(size for _, size, _ in _scan_disk())
+            else:
+                _disk_bytes += len(data)
+            if _disk_bytes > Config.ASSET_CACHE_DISK_BYTES:
+                _evict_disk()
+    except OSError as e:
+        logger.warning(f"Caché de recursos: no se pudo guardar {url} en disco: {str(e)}")
+
+# --------------------------
+# Imágenes remotas
+# --------------------------
+
+def _download(url: str, meta: Optional[Dict[str, Any]]) -> Tuple[Optional[bytes], Dict[str, Any]]:
+    """GET condicional si hay copia; (None, meta) si el servidor responde 304."""
+    headers = {}
+    if meta and meta.get("etag"):
+        headers['If-None-Match'] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers['If-Modified-Since'] = meta["last_modified"]
+
+    with track_provider_call('images'):
+        response = _session.get(url, headers=headers, timeout=Config.HTTP_TIMEOUT)
+        if response.status_code == 304 and meta:
+            return None, {**meta, "fetched_at": time.time()}
+        response.raise_for_status()
+    return response.content, {
+        "url": url,
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+        "fetched_at": time.time(),
+    }
+
+
+def _load(url: str, entry: Optional[Tuple[Any, Dict[str, Any]]]):
+    image, meta = entry or (None, None)
+    data = None
+    if image is None:
+        stored = _read_disk(url)
+        if stored:
+            data, meta = stored
+            if _is_fresh(meta):
+                image = _decode(data)
+                _memory.set(url, (image, meta))
+                return image
+
+    try:
+        new_data, meta = _download(url, meta)
+    except Exception as e:
+        if image is None and data is None:
+            raise
+        logger.warning(f"No se pudo revalidar {url}, se usa la copia guardada: {str(e)}")
+        new_data, meta = None, {**meta, "fetched_at": time.time() - Config.ASSET_CACHE_TTL + RETRY_AFTER_ERROR}
+    else:
+        _write_disk(url, new_data, meta)
+
+    if new_data is not None:
+        image = _decode(new_data)
+    elif image is None:
+        image = _decode(data)
+    _memory.set(url, (image, meta))
+    return image
+
+
+def get_image(url: str):
+    """Imagen remota decodificada (array BGR uint8 de solo lectura), de caché si está al día."""
+    entry = _memory.get(url)
+    if entry is not MISSING and _is_fresh(entry[1]):
+        return entry[0]
+    return _fetch_flight.do(url, _load, url, None if entry is MISSING else entry)
+
+# --------------------------
+# Recursos locales
+# --------------------------
+
+@lru_cache(maxsize=64)
+def load_static_image(path: str, flags: Optional[int] = None, size: Optional[Tuple[int, int]] = None):
+    """Icono local decodificado con cv2 (y redimensionado a `size`), de solo lectura."""
+    import cv2
+    image = cv2.imread(path, cv2.IMREAD_COLOR if flags is None else flags)
+    if image is None:
+        raise FileNotFoundError(path)
+    if size:
+        image = cv2.resize(image, size)
+    image.setflags(write=False)
+    return image
+
+
+@lru_cache(maxsize=256)
+def load_font(path: str, size: int):
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size)
+
+
+def assets_stats() -> Dict[str, Any]:
+    return {
+        "memory_items": len(_memory),
+        "memory_bytes": _memory.nbytes,
+        "disk_bytes": _disk_bytes,
+        "static_images": load_static_image.cache_info().currsize,
+        "fonts": load_font.cache_info().currsize,
+    }
@@ -0,0 +1,241 @@
+"""
+Caché de cartas renderizadas direccionada por contenido.
+
+La clave es el sha256 de los parámetros normalizados de la carta, la versión de los datos que la
+alimentan y RENDERER_VERSION: mismos datos y mismo dibujo dan la misma clave. El ETag es el sha256
+del PNG, así que cambia si una carta se vuelve a dibujar con otros datos bajo la misma clave.
+Dos niveles:
+
+- memoria: LRU acotada por bytes (CARD_CACHE_MEMORY_BYTES) en el proceso, con el mismo
+  CARD_CACHE_TTL que el nivel persistente.
+- persistente, compartido entre instancias y reinicios (CARD_CACHE_BACKEND): GridFS en `card_cache`
+  o ficheros en CARD_CACHE_DIR. Una carta vale CARD_CACHE_TTL segundos; pasado ese tiempo se vuelve
+  a dibujar (los datos de Spotify pueden cambiar sin que cambie la clave). Las caducadas se borran
+  al leerlas y en un barrido cada CARD_CACHE_SWEEP_INTERVAL (GridFS); en disco, además, se expulsa
+  lo menos usado al pasar de CARD_CACHE_DISK_BYTES.
+
+Las peticiones simultáneas de la misma carta se dibujan una sola vez.
+"""
+import calendar
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import gridfs
+
+from config import Config
+from db import mongo
+from logging_config import logger
+from utils.cache import MISSING, SizedLRU
+from utils.singleflight import SingleFlight
+
+# Subir al cambiar cómo se dibujan las cartas: invalida todo lo guardado
+RENDERER_VERSION = 2
+CARD_CACHE_COLLECTION = 'card_cache'
+
+# Entradas (png, meta, dibujada en (epoch), etag)
+_memory = SizedLRU(max_bytes=Config.CARD_CACHE_MEMORY_BYTES, sizeof=lambda entry: len(entry[0]))
+_render_flight = SingleFlight()
+_disk_lock = threading.Lock()
+_disk_bytes: Optional[int] = None  # se calcula al primer guardado
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def _normalize(value: Any) -> Any:
+    """Quita vacíos y espacios sobrantes; el orden de las listas se respeta (cambia el dibujo)."""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items()) if v not in (None, '', [], ())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value if v not in (None, '')]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def card_key(kind: str, params: Dict[str, Any], data_version: Any = None) -> str:
+    payload = {"kind": kind, "params": _normalize(params), "data": data_version, "renderer": RENDERER_VERSION}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+# --------------------------
+# Nivel persistente
+# --------------------------
+
+def _gridfs() -> gridfs.GridFS:
+    return gridfs.GridFS(mongo.db, collection=CARD_CACHE_COLLECTION)
+
+
+def _disk_path(key: str) -> str:
+    return os.path.join(Config.CARD_CACHE_DIR, key[:2], f"{key}.png")
+
+
+def _is_fresh(rendered_at: float) -> bool:
+    return time.time() - rendered_at <= Config.CARD_CACHE_TTL
+
+
+def _remove_disk(path: str):
+    for victim in (path, path[:-4] + '.json'):
+        try:
+            os.remove(victim)
+        except OSError:
+            pass
+
+
+def _scan_disk():
+    """
+    Cartas en disco: [(último uso, tamaño, dibujada en, ruta)]. El mtime del .png se actualiza en
+    cada lectura (LRU) y el del .json es el momento en que se dibujó (no se vuelve a escribir).
+    """
+    files = []
+    for root, _, names in os.walk(Config.CARD_CACHE_DIR):
+        for name in names:
+            if name.endswith('.png'):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    rendered_at = os.path.getmtime(path[:-4] + '.json')
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, rendered_at, path))
+    return files
+
+
+def _evict_disk():
+    """Borra las caducadas y después lo menos usado hasta bajar al 90% de CARD_CACHE_DISK_BYTES."""
+    global _disk_bytes
+    files = []
+    for entry in _scan_disk():
+        if _is_fresh(entry[2]):
+            files.append(entry)
+        else:
+            _remove_disk(entry[3])
+    files.sort()
+    _disk_bytes = sum(size for _, size, _, _ in files)
+    for _, size, _, path in files:
+        if _disk_bytes <= Config.CARD_CACHE_DISK_BYTES * 0.9:
+            break
+        _remove_disk(path)
+        _disk_bytes -= size
+
+
+def _sweep_gridfs():
+    """Borra de GridFS las cartas caducadas (como mucho una vez cada CARD_CACHE_SWEEP_INTERVAL)."""
+    global _last_sweep
+    with _sweep_lock:
+        if time.time() - _last_sweep < Config.CARD_CACHE_SWEEP_INTERVAL:
+            return
+        _last_sweep = time.time()
+    cutoff = datetime.utcnow() - timedelta(seconds=Config.CARD_CACHE_TTL)
+    fs = _gridfs()
+    expired = [doc["_id"] for doc in mongo.db[f"{CARD_CACHE_COLLECTION}.files"].find({"uploadDate": {"$lt": cutoff}}, {"_id": 1})]
+    for file_id in expired:
+        fs.delete(file_id)
+    if expired:
+        logger.info(f"Caché de cartas: {len(expired)} caducadas borradas de GridFS")
+
+
+def _load(key: str) -> Optional[Tuple[bytes, Dict[str, Any], float]]:
+    """(png, meta, dibujada en) del nivel persistente, o None si no está o ha caducado."""
+    if Config.CARD_CACHE_BACKEND == 'gridfs':
+        fs = _gridfs()
+        try:
+            stored = fs.get(key)
+        except gridfs.NoFile:
+            return None
+        # upload_date está en UTC (naive o con zona, según el cliente)
+        rendered_at = calendar.timegm(stored.upload_date.utctimetuple())
+        if not _is_fresh(rendered_at):
+            fs.delete(key)
+            return None
+        return stored.read(), stored.metadata or {}, rendered_at
+
+    if Config.CARD_CACHE_BACKEND == 'disk':
+        path = _disk_path(key)
+        try:
+            rendered_at = os.path.getmtime(path[:-4] + '.json')
+            if not _is_fresh(rendered_at):
+                _remove_disk(path)
+                return None
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(path[:-4] + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return data, meta, rendered_at
+    return None
+
+
+def _write_atomic(path: str, data: bytes):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _save(key: str, data: bytes, meta: Dict[str, Any]):
+    global _disk_bytes
+    if Config.CARD_CACHE_BACKEND == 'gridfs':
+        try:
+            _gridfs().put(data, _id=key, filename=meta.get('filename'), contentType='image/png', metadata=meta)
+        except gridfs.errors.FileExists:
+            pass  # otra instancia la guardó a la vez
+        _sweep_gridfs()
+    elif Config.CARD_CACHE_BACKEND == 'disk':
+        path = _disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path[:-4] + '.json', json.dumps(meta).encode())
+        _write_atomic(path, data)
+        with _disk_lock:
+            if _disk_bytes is None:
+                _evict_disk()
+            else:
+                _disk_bytes += len(data)
+                if _disk_bytes > Config.CARD_CACHE_DISK_BYTES:
+                    _evict_disk()
+
+# --------------------------
+# API
+# --------------------------
+
+def _render_and_store(key: str, render: Callable[[], Tuple[bytes, Dict[str, Any]]]) -> Tuple[bytes, Dict[str, Any], float, str]:
+    try:
+        stored = _load(key)
+    except Exception as e:
+        logger.warning(f"Caché de cartas: no se pudo leer {key}: {str(e)}")
+        stored = None
+    if stored is None:
+        start = time.perf_counter()
+        png, meta = render()
+        logger.info(f"Carta {key[:12]} dibujada en {(time.perf_counter() - start) * 1000:.0f} ms")
+        stored = (png, meta, time.time())
+        try:
+            _save(key, png, meta)
+        except Exception as e:
+            logger.warning(f"Caché de cartas: no se pudo guardar {key}: {str(e)}")
+    entry = (*stored, hashlib.sha256(stored[0]).hexdigest())
+    _memory.set(key, entry)
+    return entry
+
+
+def get_or_render(key: str, render: Callable[[], Tuple[bytes, Dict[str, Any]]]) -> Tuple[bytes, Dict[str, Any], str]:
+    """
+    PNG, metadatos y ETag de la carta `key`: de memoria, del nivel persistente o dibujándola con
+    `render()` (que devuelve (png, meta)), en ese orden. Pasado CARD_CACHE_TTL se vuelve a dibujar.
+    """
+    cached = _memory.get(key)
+    if cached is MISSING or not _is_fresh(cached[2]):
+        cached = _render_flight.do(key, _render_and_store, key, render)
+    png, meta, _, etag = cached
+    return png, meta, etag
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {"backend": Config.CARD_CACHE_BACKEND, "memory_items": len(_memory), "memory_bytes": _memory.nbytes,
+            "disk_bytes": _disk_bytes, "renderer_version": RENDERER_VERSION}
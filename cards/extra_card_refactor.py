@@ -160,6 +160,26 @@ def _load_icon(path: str, size: int):
     img = Image.open(path).convert('RGBA')
     return img.resize((size, size), Image.LANCZOS)
 
+def _scaled(value: float, scale: float) -> int:
+    """Medida del diseño (DEFAULT_RESOLUTION) en píxeles de un lienzo `scale` veces el diseño."""
+    return int(round(value * scale))
+
+def _resolution_scale(resolution: Tuple[int, int, int]) -> float:
+    return resolution[0] / DEFAULT_RESOLUTION[0]
+
+def preload_assets(font_path: str = DEFAULT_FONT_PATH, resolutions: Sequence[Tuple[int, int, int]] = (DEFAULT_RESOLUTION,)):
+    """Carga en las cachés las fuentes e iconos de formato para cada lienzo (calentamiento)."""
+    bold_path, regular_path = _resolve_font_paths(font_path)
+    for resolution in resolutions:
+        scale = _resolution_scale(resolution)
+        for path in {bold_path, regular_path}:
+            for size in (FONT_BOLD_SIZE, FONT_SUBGENRE_SIZE, FONT_CIRCLE_SIZE):
+                _load_font(path, max(1, _scaled(size, scale)))
+        for icon in VALID_FORMATS.values():
+            icon_path = os.path.join(DEFAULT_ICON_DIR, icon)
+            if os.path.exists(icon_path):
+                _load_icon(icon_path, max(1, _scaled(ICON_SIZE, scale)))
+
 # ───────────────────────────────────────── MAPEOS (fondo y color de texto)
 def _scan_palette(value: int, table: List[Tuple[int, int, Tuple[int, int, int]]]) -> Tuple[int, int, int]:
     for start, end, color in table:
@@ -217,6 +237,8 @@ def _as_list(x: Any) -> List[str]:
 # ───────────────────────────────────────── RENDER CONFIG
 @dataclass(frozen=True)
 class RenderConfig:
+    # text_box_position (y el resto de medidas del módulo) está en el diseño de DEFAULT_RESOLUTION:
+    # se escala a `resolution`, que puede ser directamente el tamaño de salida
     resolution: Tuple[int, int, int] = DEFAULT_RESOLUTION
     font_path: str = DEFAULT_FONT_PATH
     icon_dir: str = DEFAULT_ICON_DIR
@@ -291,6 +313,17 @@ def make_extra_card(
 
     cfg = config or RenderConfig(resolution=resolution, font_path=font_path, text_box_position=text_box_position)
     H, W, _ = cfg.resolution
+    scale = _resolution_scale(cfg.resolution)
+    def px(value: float) -> int: return _scaled(value, scale)
+    def size_px(size: int) -> int: return max(1, _scaled(size, scale))
+
+    icon_size_px = size_px(ICON_SIZE)
+    circle_radius = icon_size_px // 2
+    icon_gap = px(ICON_GAP)
+    genre_line_spacing = px(GENRE_LINE_SPACING)
+    subgenre_line_spacing = px(SUBGENRE_LINE_SPACING)
+    text_box_position = px(cfg.text_box_position)
+
     card = np.ones(cfg.resolution, np.uint8) * 255
     img_pil = Image.fromarray(card)
 
@@ -301,7 +334,7 @@ def make_extra_card(
         mood_fonts: List[ImageFont.FreeTypeFont] = []
         total = max(1, len(mood_descriptors) - 1)
         for i in range(len(mood_descriptors)):
-            size = int(MOOD_BG_MAX_FONT - (MOOD_BG_MAX_FONT - MOOD_BG_MIN_FONT) * (i / total))
+            size = size_px(MOOD_BG_MAX_FONT - (MOOD_BG_MAX_FONT - MOOD_BG_MIN_FONT) * (i / total))
             try:
                 font = _load_font(bold_path, size)
             except Exception:
@@ -312,6 +345,7 @@ def make_extra_card(
         bg_img = Image.new('RGBA', (ext_w, ext_h), (255, 255, 255, 0))
         bg_draw = ImageDraw.Draw(bg_img)
 
+        word_spacing = px(MOOD_WORD_SPACING)
         line_spacing = (ext_h / (N_MOOD_LINES - 1)) * LINE_SPACING_FACTOR if N_MOOD_LINES > 1 else ext_h * LINE_SPACING_FACTOR
         def alt_index(n: int) -> int: return (n // 2) if n % 2 == 0 else -(n // 2 + 1)
 
@@ -335,14 +369,14 @@ def make_extra_card(
                 color = hex_to_rgba(color_hex, alpha=MOOD_BG_COLOR[3])
                 tw, _ = _text_size(bg_draw, word, font)
                 line_words.append((word, font, tw, color))
-                line_width += tw + (MOOD_WORD_SPACING if i < WORDS_PER_LINE - 1 else 0)
+                line_width += tw + (word_spacing if i < WORDS_PER_LINE - 1 else 0)
 
             if not line_words: continue
             x = (ext_w - line_width) // 2
             y = int(line * line_spacing + (ext_h - (line_spacing * (N_MOOD_LINES - 1))) // 2)
             for word, font, tw, color in line_words:
                 bg_draw.text((x, y), word, font=font, fill=color)
-                x += tw + MOOD_WORD_SPACING
+                x += tw + word_spacing
 
         bg_img = bg_img.rotate(ANGLE_MOOD_BG, resample=Image.BICUBIC, expand=0)
         crop = ((ext_w - W) // 2, (ext_h - H) // 2, (ext_w - W) // 2 + W, (ext_h - H) // 2 + H)
@@ -354,10 +388,10 @@ def make_extra_card(
     # ── Texto central
     bold_path, regular_path = _resolve_font_paths(cfg.font_path)
     try:
-        font_bold = _load_font(bold_path, FONT_BOLD_SIZE)
+        font_bold = _load_font(bold_path, size_px(FONT_BOLD_SIZE))
     except Exception:
-        font_bold = _load_font(regular_path, FONT_BOLD_SIZE)
-    subgenre_font = _load_font(regular_path, FONT_SUBGENRE_SIZE)
+        font_bold = _load_font(regular_path, size_px(FONT_BOLD_SIZE))
+    subgenre_font = _load_font(regular_path, size_px(FONT_SUBGENRE_SIZE))
 
     genres_list = _as_list(genres)
     subgenres_list = _as_list(subgenres)
@@ -365,19 +399,19 @@ def make_extra_card(
     genre_colors = [GENRE_COLORS.get(music_genres.get_parent(g), GENRE_COLORS['Otros']) for g in genres_list]
 
     genre_heights = [_text_size(draw, g.upper(), font_bold)[1] for g in genres_list]
-    total_genres_height = sum(genre_heights) + (len(genres_list) - 1) * GENRE_LINE_SPACING
+    total_genres_height = sum(genre_heights) + (len(genres_list) - 1) * genre_line_spacing
 
     num_subgenre_lines = (len(subgenres_list) + MAX_SUBGENRES_PER_LINE - 1) // MAX_SUBGENRES_PER_LINE
     total_subgenres_height = 0
     if num_subgenre_lines > 0:
         subgenre_line_height = _text_size(draw, "X", subgenre_font)[1]
-        total_subgenres_height = num_subgenre_lines * subgenre_line_height + (num_subgenre_lines - 1) * SUBGENRE_LINE_SPACING
+        total_subgenres_height = num_subgenre_lines * subgenre_line_height + (num_subgenre_lines - 1) * subgenre_line_spacing
 
     total_block_height = total_genres_height + total_subgenres_height
-    bottom_size = (Y_FORMAT_ROW + Y_INFO_ROW + ICON_SIZE) + GENRE_LINE_SPACING
+    bottom_size = px(Y_FORMAT_ROW + Y_INFO_ROW + ICON_SIZE + GENRE_LINE_SPACING)
     y_central = (img_pil.height - total_block_height) // 2 - bottom_size
 
-    PADDING = 100  # píxeles que sobresalen a cada lado
+    PADDING = px(100)  # píxeles que sobresalen a cada lado
 
     y_genre = y_central
     for i, g in enumerate(genres_list):
@@ -399,13 +433,13 @@ def make_extra_card(
         draw.line(
             (x - PADDING, line_y, x + text_w + PADDING, line_y),
             fill=genre_colors[i],
-            width=150
+            width=size_px(150)
         )
 
         # Dibujar texto encima
         draw.text((x, y_genre), text, font=font_bold, fill=(30, 30, 30))
 
-        y_genre += text_h + GENRE_LINE_SPACING
+        y_genre += text_h + genre_line_spacing
 
 
     # === FILA SUPERIOR: ICONOS DE FORMATO ===
@@ -421,7 +455,7 @@ def make_extra_card(
             icon_path = os.path.join(cfg.icon_dir, filename)
             if os.path.exists(icon_path):
                 try:
-                    format_icons_imgs.append(_load_icon(icon_path, ICON_SIZE))
+                    format_icons_imgs.append(_load_icon(icon_path, icon_size_px))
                 except Exception as e:
                     logger.warning("No se pudo cargar icono '%s': %s", icon_path, e)
             else:
@@ -429,23 +463,23 @@ def make_extra_card(
 
     if format_icons_imgs:
         n_format = len(format_icons_imgs)
-        total_width = n_format * ICON_SIZE + (n_format - 1) * ICON_GAP
+        total_width = n_format * icon_size_px + (n_format - 1) * icon_gap
         x0 = (W - total_width) // 2
-        y_icons = cfg.text_box_position + Y_FORMAT_ROW
+        y_icons = text_box_position + px(Y_FORMAT_ROW)
         for i, icon_img in enumerate(format_icons_imgs):
-            x_icon = x0 + i * (ICON_SIZE + ICON_GAP)
+            x_icon = x0 + i * (icon_size_px + icon_gap)
             img_pil.paste(icon_img, (x_icon, y_icons), icon_img)
 
 
 
-    y_subgenre = y_genre + SUBGENRE_LINE_SPACING
+    y_subgenre = y_genre + subgenre_line_spacing
     for i in range(0, len(subgenres_list), MAX_SUBGENRES_PER_LINE):
         chunk = subgenres_list[i:i+MAX_SUBGENRES_PER_LINE]
         sub_text = ', '.join(chunk).upper()
         w_s, h_s = _text_size(draw, sub_text, subgenre_font)
         x = (img_pil.width - w_s) // 2
         draw.text((x, y_subgenre), sub_text, font=subgenre_font, fill=SUBGENRE_COLOR)
-        y_subgenre += h_s + SUBGENRE_LINE_SPACING
+        y_subgenre += h_s + subgenre_line_spacing
 
     # ── Círculos: año / bandera / duración
     year = _safe_year_from_date(date_release)
@@ -455,12 +489,11 @@ def make_extra_card(
         minutes = None
 
     try:
-        circle_font = _load_font(bold_path, FONT_CIRCLE_SIZE)
+        circle_font = _load_font(bold_path, size_px(FONT_CIRCLE_SIZE))
     except Exception:
-        circle_font = _load_font(regular_path, FONT_CIRCLE_SIZE)
+        circle_font = _load_font(regular_path, size_px(FONT_CIRCLE_SIZE))
 
-    icon_size = CIRCLE_RADIUS * 2
-    icon_gap = ICON_GAP
+    icon_size = circle_radius * 2
     line_elems: List[Dict[str, Any]] = []
 
     if year:
@@ -493,7 +526,7 @@ def make_extra_card(
     if n_elems > 0:
         total_width = n_elems * icon_size + (n_elems - 1) * icon_gap
         x0 = (cfg.resolution[1] - total_width) // 2
-        y0 = cfg.text_box_position + Y_INFO_ROW
+        y0 = text_box_position + px(Y_INFO_ROW)
 
         for i, elem in enumerate(line_elems):
             cx = x0 + i * (icon_size + icon_gap) + icon_size // 2
@@ -502,11 +535,11 @@ def make_extra_card(
                 # Dibujo especializado por tipo
                 if elem['type'] == 'duration' and minutes is not None:
                     # Reloj de minutos (sector sombreado)
-                    draw_duration_clock(draw, cx, cy, CIRCLE_RADIUS, minutes, elem['color'])
+                    draw_duration_clock(draw, cx, cy, circle_radius, minutes, elem['color'])
                     text_color = _get_duration_text_color(minutes)
                 else:
                     # Círculo plano (año)
-                    bbox = (cx - CIRCLE_RADIUS, cy - CIRCLE_RADIUS, cx + CIRCLE_RADIUS, cy + CIRCLE_RADIUS)
+                    bbox = (cx - circle_radius, cy - circle_radius, cx + circle_radius, cy + circle_radius)
                     draw.ellipse(bbox, fill=elem['color'])
                     text_color = _get_decade_text_color(elem['text'])
 
@@ -517,14 +550,13 @@ def make_extra_card(
                 img_pil.paste(elem['img'], (cx - icon_size // 2, cy - icon_size // 2), elem['img'])
 
     # ── Borde de esquinas (cohesión)
-    result = draw_corner_border(img_pil, genre_colors, border_width=150, triangle_size=400, base_color=(30, 30, 30))
+    result = draw_corner_border(img_pil, genre_colors, border_width=px(150), triangle_size=px(400), base_color=(30, 30, 30))
     return result
 
 # ───────────────────────────────────────── DEMO LOCAL
 
 import random
 import os
-import cv2
 from datetime import datetime
 
 # === LISTAS DE APOYO ===
@@ -597,6 +629,7 @@ def generar_formato():
 
 # === PRUEBA DEMO VARIADA ===
 if __name__ == "__main__":
+    import cv2
     os.makedirs("_out", exist_ok=True)
 
     decadas = list(range(1960, 2030, 10))
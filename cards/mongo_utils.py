@@ -1,6 +1,7 @@
 import os
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from utils.cache import MISSING, TTLCache
 
 load_dotenv()
 
@@ -11,18 +12,29 @@ db = client['discana']
 albums_collection = db['albums']
 descriptors_collection = db['descriptors']
 
+# Los descriptores casi no cambian: se leen enteros una vez por hora
+DESCRIPTORS_TTL = 3600
+_descriptors_cache = TTLCache(ttl=DESCRIPTORS_TTL, maxsize=1)
+
 def get_album_by_spotify_id(spotify_id):
     return albums_collection.find_one({'spotify_id': spotify_id})
 
 
 
+def load_descriptors():
+    """Todos los descriptores por 'en' (colección pequeña), en memoria durante DESCRIPTORS_TTL."""
+    mood_map = _descriptors_cache.get('all')
+    if mood_map is MISSING:
+        mood_map = {doc['en']: doc for doc in descriptors_collection.find({}, {"_id": 0}) if doc.get('en')}
+        _descriptors_cache.set('all', mood_map)
+    return mood_map
+
 def get_mood_descriptors(moods):
     """
     moods: lista de moods en inglés
     Devuelve una lista de dicts: [{'en':..., 'es':..., 'color':...}, ...] en el mismo orden que moods
     """
-    docs = descriptors_collection.find({"en": {"$in": moods}})
-    mood_map = {doc['en']: doc for doc in docs}
+    mood_map = load_descriptors()
     result = []
     for m in moods:
         doc = mood_map.get(m, None)
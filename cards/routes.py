@@ -13,16 +13,19 @@ def card_extra():
         'formats': request.args.getlist('formats'),
         'date_release': request.args.get('date_release'),
         'duration': request.args.get('duration'),
-        'album': request.args.get('album')
+        'album': request.args.get('album'),
+        'size': request.args.get('size')
     }
-    card_bytes, filename, status = generate_extra_card(params)
+    card_bytes, filename, status, etag = generate_extra_card(params)
     if card_bytes is None:
         return filename, status
     return send_file(
         card_bytes,
         mimetype='image/png',
         download_name=filename,
-        as_attachment=True
+        as_attachment=True,
+        etag=etag,
+        conditional=True
     )
 
 @cards_blueprint.route('/', methods=['GET'])
@@ -41,12 +44,17 @@ def card_result():
             'subtitle': request.args.get('subtitle'),
             'image': request.args.get('image'),
             'details': request.args.get('details'),
-            'jp': request.args.get('jp')
+            'jp': request.args.get('jp'),
+            'size': request.args.get('size')
         }
-        card_bytes, filename, status = generate_card(params)
+        card_bytes, filename, status, etag = generate_card(params)
+        if card_bytes is None:
+            return filename, status
         return send_file(
             card_bytes,
             mimetype='image/png',
             download_name=filename,
-            as_attachment=True
+            as_attachment=True,
+            etag=etag,
+            conditional=True
         )
\ No newline at end of file
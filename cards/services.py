@@ -1,11 +1,46 @@
 import io
 from datetime import datetime
-from PIL import Image
-from cards.extra_card_refactor import make_extra_card
+from cards.cache import card_key, get_or_render
+from cards.extra_card_refactor import RenderConfig, make_extra_card
 from cards.mongo_utils import get_album_by_spotify_id
 from cards.card_generator import generator
 
+# Tamaño físico de las cartas (ancho x alto, cm)
+CARD_SIZE_CM = (6.3, 8.8)
+# Tamaños de salida: ppp y sobremuestreo (se dibuja a N veces el tamaño y se reduce con LANCZOS)
+CARD_SIZES = {
+    'thumbnail': {'dpi': 72, 'supersample': 1},
+    'screen': {'dpi': 150, 'supersample': 1},
+    'print': {'dpi': 300, 'supersample': 2},
+}
+DEFAULT_CARD_SIZE = 'print'
+
+def card_size(size=None):
+    """
+    Para un tamaño de CARD_SIZES devuelve ((ancho, alto) de salida, lienzo (alto, ancho, 3) en el
+    que se dibuja). None si el tamaño no existe.
+    """
+    preset = CARD_SIZES.get(size or DEFAULT_CARD_SIZE)
+    if preset is None:
+        return None
+    width, height = (int(cm / 2.54 * preset['dpi']) for cm in CARD_SIZE_CM)
+    supersample = preset['supersample']
+    return (width, height), (height * supersample, width * supersample, 3)
+
+def _to_png(card, output_size) -> bytes:
+    from PIL import Image
+    card = Image.fromarray(card)
+    if card.size != output_size:
+        card = card.resize(output_size, resample=Image.LANCZOS)
+    card_bytes = io.BytesIO()
+    card.save(card_bytes, "png")
+    return card_bytes.getvalue()
+
+def _invalid_size(size):
+    return None, {'error': f"Invalid size '{size}', expected one of: {', '.join(CARD_SIZES)}"}, 400, None
+
 def generate_extra_card(params):
+    """Devuelve (png, nombre de fichero, status, etag); la carta sale de la caché si ya se dibujó."""
     genres = params.get('genres', [])
     subgenres = params.get('subgenres', [])
     moods = params.get('moods', [])
@@ -14,13 +49,19 @@ def generate_extra_card(params):
     date_release = params.get('date_release')
     duration = params.get('duration')
     album_id = params.get('album')
+    size = params.get('size') or DEFAULT_CARD_SIZE
     title = None
     artist = None
 
+    sizes = card_size(size)
+    if sizes is None:
+        return _invalid_size(size)
+    output_size, resolution = sizes
+
     if album_id:
         album = get_album_by_spotify_id(album_id)
         if not album:
-            return None, {'error': 'Album not found'}, 404
+            return None, {'error': 'Album not found'}, 404, None
         genres = album.get('genre', genres)
         subgenres = album.get('subgenres', subgenres)
         moods = album.get('mood', moods)
@@ -31,13 +72,17 @@ def generate_extra_card(params):
         title = album.get('title', 'Unknown Album')
         artist = album.get('artist', 'Unknown Artist')
 
-    card = make_extra_card(genres, subgenres, moods, country, formats, date_release, duration)
-    card = Image.fromarray(card)
-    card = card.resize((int(6.3/2.54*300), int(8.8/2.54*300)), resample=Image.LANCZOS)
-
-    card_bytes = io.BytesIO()
-    card.save(card_bytes, "png")
-    card_bytes.seek(0)
+    # Los datos del álbum ya están resueltos en los parámetros: si cambian en DB, cambia la clave
+    render_params = {
+        'genres': genres, 'subgenres': subgenres, 'moods': moods, 'country': country,
+        'formats': formats, 'date_release': date_release, 'duration': duration, 'size': size,
+    }
+    key = card_key('extra', render_params)
+    config = RenderConfig(resolution=resolution)
+    png, _, etag = get_or_render(key, lambda: (
+        _to_png(make_extra_card(genres, subgenres, moods, country, formats, date_release, duration, config=config), output_size), {}
+    ))
+    card_bytes = io.BytesIO(png)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     if album_id:
@@ -54,9 +99,10 @@ def generate_extra_card(params):
             base = "extra_card"
         filename = f"{base}_{timestamp}.png"
 
-    return card_bytes, filename, 200
+    return card_bytes, filename, 200, etag
 
 def generate_card(params):
+    """Devuelve (png, nombre de fichero, status, etag); la carta sale de la caché si ya se dibujó."""
     album_link = params.get('link')
     icon = params.get('icon')
     album = params.get('album')
@@ -66,20 +112,31 @@ def generate_card(params):
     image = params.get('image')
     details = params.get('details')
     jp = params.get('jp')
+    size = params.get('size') or DEFAULT_CARD_SIZE
+
+    sizes = card_size(size)
+    if sizes is None:
+        return _invalid_size(size)
+    output_size, resolution = sizes
 
     if album:
         album_link = r'https://open.spotify.com/album/' + album
     elif album_input:
         album_link = album_input
 
-    resolution = (5040, 3600, 3)
-    card, album_name = generator(album_link, resolution, icon, title, subtitle, image, details, jp)
-    card = Image.fromarray(card)
-    card = card.resize((int(6.3/2.54*300), int(8.8/2.54*300)), resample=Image.LANCZOS)
+    if album_link and "?" in album_link:
+        album_link = album_link[:album_link.find('?')]
 
-    card_bytes = io.BytesIO()
-    card.save(card_bytes, "png")
-    card_bytes.seek(0)
+    def render():
+        card, album_name = generator(album_link, resolution, icon, title, subtitle, image, details, jp)
+        return _to_png(card, output_size), {'album_name': album_name}
+
+    # Los datos de Spotify no tienen versión: la carta guardada caduca con CARD_CACHE_TTL
+    key = card_key('card', {
+        'link': album_link, 'icon': icon, 'title': title, 'subtitle': subtitle,
+        'image': image, 'details': details, 'jp': jp, 'size': size,
+    })
+    png, meta, etag = get_or_render(key, render)
 
-    filename = f"{album_name}_card.jpg"
-    return card_bytes, filename, 200
+    filename = f"{meta.get('album_name')}_card.jpg"
+    return io.BytesIO(png), filename, 200, etag
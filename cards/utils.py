@@ -1,9 +1,5 @@
-import cv2
-import numpy as np
-#import scipy.cluster
-#import sklearn.cluster
-from sklearn.cluster import MiniBatchKMeans
-from scipy.cluster.vq import vq
+# cv2, numpy, sklearn, scipy, spotipy y psutil tardan en importarse: se cargan dentro de las
+# funciones que los usan para que el arranque no los pague
 from dotenv import load_dotenv
 import os
 import requests
@@ -11,14 +7,12 @@ import datetime
 import base64
 
 from urllib.parse import urlencode
-from spotipy.oauth2 import SpotifyOAuth, SpotifyClientCredentials
-import spotipy
 from flask import Flask, render_template, request, redirect, session
-import psutil
-import locale
+from config import Config
 
 
 def get_my_albums():
+    import spotipy
     sp = spotipy.Spotify(auth=session.get('token'))
     limit = 20  # establece el número máximo de álbumes que se devolverán en una única llamada a la API
     offset = 0  # establece el número de álbumes que se deben omitir antes de comenzar a devolver resultados
@@ -65,6 +59,7 @@ def get_my_albums():
     return albums
 
 def get_albums(artist,country):
+    import spotipy
     sp = get_spotify()
 
     limit = 20  # establece el número máximo de álbumes que se devolverán en una única llamada a la API
@@ -143,6 +138,7 @@ def get_albums(artist,country):
     return (artist_name, albums)
 
 def get_artist_albums(artist_name):
+    import spotipy
     sp = spotipy.Spotify(auth=session.get('token'))
     artist = sp.search(q='artist:' + artist_name, type='artist')
     print(artist['href'])
@@ -160,8 +156,8 @@ def get_artist_albums(artist_name):
 
 
 def get_date(date_input, lang):
+    # Formato numérico: no depende del locale (setlocale cambia el de todo el proceso y no es thread-safe)
     try:
-        locale.setlocale(locale.LC_TIME, lang)
         date = datetime.datetime.strptime(date_input.replace('-',''), r'%Y%m%d')
         #month = date.strftime("%b").capitalize()
         day = date.strftime("%d").lstrip('0')
@@ -206,6 +202,7 @@ def get_playtime(tracks):
         return f"{hours} h {minutes} min"
     
 def get_playtime_pro(tracks):
+    import spotipy
     sp = spotipy.Spotify(auth=session.get('token'))
     playtime_ms = 0
     total_tracks = len(tracks)
@@ -236,6 +233,7 @@ def get_playtime_pro(tracks):
 
 
 def get_user_spotify():
+    import spotipy
 
     session.clear()
 
@@ -250,6 +248,7 @@ def get_user_spotify():
     return user['display_name']
 
 def get_access_token(code):
+    from spotipy.oauth2 import SpotifyOAuth
     sp_oauth = SpotifyOAuth(
         client_id=os.getenv('SPOTIFY_CLIENT_ID'),
         client_secret=os.getenv('SPOTIFY_SECRET'),
@@ -260,6 +259,7 @@ def get_access_token(code):
     return token_info['access_token']
 
 def login_spotify():
+    from spotipy.oauth2 import SpotifyOAuth
     load_dotenv()
     sp_oauth = SpotifyOAuth(client_id=os.getenv('SPOTIFY_ID'), client_secret=os.getenv('SPOTIFY_SECRET'),
                             redirect_uri=os.getenv('SPOTIFY_REDIRECT_URI'), scope='user-library-read')
@@ -267,6 +267,8 @@ def login_spotify():
     return auth_url
 
 def get_spotify():
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
     load_dotenv()
     sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
         client_id=os.getenv('SPOTIFY_ID'),
@@ -348,8 +350,8 @@ def spotify_data_pull(album):
     SPOTIFY_SECRET = os.getenv('SPOTIFY_SECRET')
     SPOTIFY_ID = os.getenv('SPOTIFY_CLIENT_ID')
     album_url_base = r'https://open.spotify.com/album/'
-    AUTH_URL = r'https://accounts.spotify.com/api/token'
-    album_get = 'https://api.spotify.com/v1/albums/{id}'
+    AUTH_URL = Config.SPOTIFY_ACCOUNTS_URL + 'api/token'
+    album_get = Config.SPOTIFY_API_URL + 'albums/{id}'
 
     if "?" in album:
         album = album[:album.find('?')]
@@ -421,6 +423,7 @@ def custom_data(image, title, subtitle):
 
 
 def get_all_tracks(album_id):
+    import spotipy
     #sp = spotipy.Spotify(auth=session.get('token'))
     code = request.args.get('code')
     token = get_access_token(code)
@@ -442,7 +445,10 @@ def get_all_tracks(album_id):
 
 
 
-def rounded_rectangle(src, top_left, bottom_right, radius=1, color=255, thickness=1, line_type=cv2.LINE_AA):
+def rounded_rectangle(src, top_left, bottom_right, radius=1, color=255, thickness=1, line_type=None):
+    import cv2
+    if line_type is None:
+        line_type = cv2.LINE_AA
 
     #  corners:
     #  p1 - p2
@@ -496,6 +502,7 @@ def rounded_rectangle(src, top_left, bottom_right, radius=1, color=255, thicknes
 
 
 def font_scale_finder(text, scale, limit, thickness):
+    import cv2
     for i in range(200, 50, -5):
         i = i/100
         textsize = cv2.getTextSize(text, cv2.FONT_HERSHEY_TRIPLEX, i*scale, thickness*scale)
@@ -503,6 +510,9 @@ def font_scale_finder(text, scale, limit, thickness):
             return i
 
 def dominant_colors(image):
+    import numpy as np
+    from sklearn.cluster import MiniBatchKMeans
+    from scipy.cluster.vq import vq
     # Redimensionar la imagen
     image = np.resize(image, (3*(image.shape[0])//4, 3*(image.shape[1])//4, image.shape[2]))
     ar = np.asarray(image)
@@ -551,6 +561,7 @@ def get_popularity_level(popularity):
 
 
 def find_process_using_file(filename):
+    import psutil
     for proc in psutil.process_iter(['pid', 'name']):
         try:
             for file in proc.open_files():
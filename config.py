@@ -15,6 +15,104 @@ class Config:
     API_URL = os.environ.get("API_URL")
     SECRET_KEY = os.environ.get("FLASK_SECRET_KEY", "default_secret_key")  # Cambia "default_secret_key" por algo más seguro
 
+    # URLs base de los proveedores (se pueden apuntar a los stubs de benchmarks/)
+    SPOTIFY_API_URL = os.environ.get("SPOTIFY_API_URL", "https://api.spotify.com/v1/")
+    SPOTIFY_ACCOUNTS_URL = os.environ.get("SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com/")
+    SPOTIFY_SCANNABLES_URL = os.environ.get("SPOTIFY_SCANNABLES_URL", "https://scannables.scdn.co/")
+    LASTFM_API_URL = os.environ.get("LASTFM_API_URL", "https://ws.audioscrobbler.com/2.0/")
+    DISCOGS_API_URL = os.environ.get("DISCOGS_API_URL", "https://api.discogs.com/")
+    MUSICBRAINZ_API_URL = os.environ.get("MUSICBRAINZ_API_URL", "https://musicbrainz.org/ws/2/")
+
+    # Proveedores externos: timeout HTTP, plazos por fuente ("spotify=4,discogs=6") y circuit breakers
+    HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 10))
+    SOURCE_TIMEOUT_DEFAULT = float(os.environ.get("SOURCE_TIMEOUT_DEFAULT", 5))
+    SOURCE_TIMEOUTS = os.environ.get("SOURCE_TIMEOUTS", "")
+    CIRCUIT_WINDOW_SECONDS = float(os.environ.get("CIRCUIT_WINDOW_SECONDS", 60))
+    CIRCUIT_MIN_CALLS = int(os.environ.get("CIRCUIT_MIN_CALLS", 5))
+    CIRCUIT_FAILURE_RATE = float(os.environ.get("CIRCUIT_FAILURE_RATE", 0.5))
+    CIRCUIT_OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS", 30))
+    # Segundos que se recuerda un "álbum no encontrado" en el detalle (0 = desactivado)
+    ALBUM_NOT_FOUND_TTL = float(os.environ.get("ALBUM_NOT_FOUND_TTL", 30))
+    # Executor de E/S compartido: hilos, tareas en cola y espera máxima para encolar (back-pressure)
+    IO_EXECUTOR_WORKERS = int(os.environ.get("IO_EXECUTOR_WORKERS", 32))
+    IO_EXECUTOR_QUEUE = int(os.environ.get("IO_EXECUTOR_QUEUE", 128))
+    IO_SUBMIT_TIMEOUT = float(os.environ.get("IO_SUBMIT_TIMEOUT", 2))
+    # Executor de trabajos en segundo plano (refrescos, sincronizaciones, warm-up): hilos y tareas en cola
+    BACKGROUND_EXECUTOR_WORKERS = int(os.environ.get("BACKGROUND_EXECUTOR_WORKERS", 10))
+    BACKGROUND_EXECUTOR_QUEUE = int(os.environ.get("BACKGROUND_EXECUTOR_QUEUE", 256))
+    # Llamadas a proveedores simultáneas por petición
+    REQUEST_MAX_CONCURRENCY = int(os.environ.get("REQUEST_MAX_CONCURRENCY", 5))
+    # Enriquecimiento guardado en el álbum: frescura por fuente en segundos ("spotify=86400") y refrescos simultáneos
+    ENRICHMENT_MAX_AGE = os.environ.get("ENRICHMENT_MAX_AGE", "")
+    ENRICHMENT_WORKERS = int(os.environ.get("ENRICHMENT_WORKERS", 2))
+    # MusicBrainz: User-Agent obligatorio y segundos que se cachean sus respuestas
+    MUSICBRAINZ_USER_AGENT = os.environ.get("MUSICBRAINZ_USER_AGENT", "Discana/1.0 (contact@your-email.com)")
+    MUSICBRAINZ_CACHE_TTL = float(os.environ.get("MUSICBRAINZ_CACHE_TTL", 24 * 3600))
+    # Parecido mínimo (0-1) de título/artista para registrar un id encontrado por búsqueda en el mapa de identidades
+    IDENTITY_MIN_CONFIDENCE = float(os.environ.get("IDENTITY_MIN_CONFIDENCE", 0.85))
+    # Detalle por lotes: máximo de álbumes por petición y llamadas simultáneas por lote, y segundos que una llamada
+    # puede esperar turno en la cola del lote (su plazo de fuente empieza al ejecutarse)
+    DETAILS_BATCH_MAX_ITEMS = int(os.environ.get("DETAILS_BATCH_MAX_ITEMS", 50))
+    DETAILS_BATCH_WORKERS = int(os.environ.get("DETAILS_BATCH_WORKERS", 8))
+    DETAILS_BATCH_QUEUE_TIMEOUT = float(os.environ.get("DETAILS_BATCH_QUEUE_TIMEOUT", 30))
+    # Last.fm track.getInfo: segundos de caché del playcount global (cambia despacio) y del de usuario, y llamadas simultáneas por álbum
+    LASTFM_TRACK_PLAYCOUNT_TTL = float(os.environ.get("LASTFM_TRACK_PLAYCOUNT_TTL", 7 * 24 * 3600))
+    LASTFM_USER_PLAYCOUNT_TTL = float(os.environ.get("LASTFM_USER_PLAYCOUNT_TTL", 600))
+    LASTFM_TRACK_INFO_WORKERS = int(os.environ.get("LASTFM_TRACK_INFO_WORKERS", 4))
+    # Last.fm album.getInfo: segundos de caché, llamadas simultáneas por listado y plazo total del listado (lo que no llegue va sin detalle)
+    LASTFM_ALBUM_INFO_TTL = float(os.environ.get("LASTFM_ALBUM_INFO_TTL", 6 * 3600))
+    LASTFM_ALBUM_INFO_WORKERS = int(os.environ.get("LASTFM_ALBUM_INFO_WORKERS", 8))
+    LASTFM_LISTING_TIMEOUT = float(os.environ.get("LASTFM_LISTING_TIMEOUT", 8))
+    # Réplica local de scrobbles: segundos entre sincronizaciones por usuario, sincronizaciones simultáneas y pausa entre páginas
+    LASTFM_SYNC_INTERVAL = float(os.environ.get("LASTFM_SYNC_INTERVAL", 900))
+    LASTFM_SYNC_WORKERS = int(os.environ.get("LASTFM_SYNC_WORKERS", 1))
+    LASTFM_SYNC_PAGE_INTERVAL = float(os.environ.get("LASTFM_SYNC_PAGE_INTERVAL", 0.25))
+    # Segundos antes del último timestamp sincronizado que se vuelven a leer (scrobbles con fecha de inicio de la pista o enviados con retraso)
+    LASTFM_SYNC_OVERLAP = int(os.environ.get("LASTFM_SYNC_OVERLAP", 6 * 3600))
+    # Scrobbles: reintentos por lote, espera base (s, exponencial) y trabajos encolados simultáneos
+    LASTFM_SCROBBLE_RETRIES = int(os.environ.get("LASTFM_SCROBBLE_RETRIES", 3))
+    LASTFM_SCROBBLE_BACKOFF = float(os.environ.get("LASTFM_SCROBBLE_BACKOFF", 1))
+    LASTFM_SCROBBLE_WORKERS = int(os.environ.get("LASTFM_SCROBBLE_WORKERS", 1))
+    # Listas globales de Last.fm (tag.getTopAlbums, geo.getTopAlbums): segundos de caché compartida
+    LASTFM_CHART_TTL = float(os.environ.get("LASTFM_CHART_TTL", 6 * 3600))
+    # Spotify artists/{id}/albums: segundos de caché por artista, llamadas simultáneas por listado y plazo total del listado
+    SPOTIFY_ARTIST_ALBUMS_TTL = float(os.environ.get("SPOTIFY_ARTIST_ALBUMS_TTL", 6 * 3600))
+    SPOTIFY_ARTIST_ALBUMS_WORKERS = int(os.environ.get("SPOTIFY_ARTIST_ALBUMS_WORKERS", 10))
+    SPOTIFY_LISTING_TIMEOUT = float(os.environ.get("SPOTIFY_LISTING_TIMEOUT", 8))
+    # Playlists materializadas: segundos entre revisiones del snapshot_id y páginas de pistas simultáneas al reconstruir
+    SPOTIFY_PLAYLIST_CHECK_INTERVAL = float(os.environ.get("SPOTIFY_PLAYLIST_CHECK_INTERVAL", 600))
+    SPOTIFY_PLAYLIST_PAGE_WORKERS = int(os.environ.get("SPOTIFY_PLAYLIST_PAGE_WORKERS", 8))
+    # Biblioteca de Spotify: segundos entre sincronizaciones por usuario, sincronizaciones simultáneas, páginas simultáneas y espaciado entre páginas
+    SPOTIFY_LIBRARY_SYNC_INTERVAL = float(os.environ.get("SPOTIFY_LIBRARY_SYNC_INTERVAL", 3600))
+    SPOTIFY_LIBRARY_SYNC_WORKERS = int(os.environ.get("SPOTIFY_LIBRARY_SYNC_WORKERS", 2))
+    SPOTIFY_LIBRARY_PAGE_WORKERS = int(os.environ.get("SPOTIFY_LIBRARY_PAGE_WORKERS", 4))
+    SPOTIFY_LIBRARY_PAGE_INTERVAL = float(os.environ.get("SPOTIFY_LIBRARY_PAGE_INTERVAL", 0.1))
+    # Copia de Discogs: segundos entre sincronizaciones por usuario, sincronizaciones simultáneas y espaciado entre páginas
+    # (Discogs admite 60 peticiones/minuto; 1.5 s deja margen a las llamadas en vivo) y caché de búsquedas por género
+    DISCOGS_SYNC_INTERVAL = float(os.environ.get("DISCOGS_SYNC_INTERVAL", 6 * 3600))
+    DISCOGS_SYNC_WORKERS = int(os.environ.get("DISCOGS_SYNC_WORKERS", 1))
+    DISCOGS_SYNC_PAGE_INTERVAL = float(os.environ.get("DISCOGS_SYNC_PAGE_INTERVAL", 1.5))
+    DISCOGS_SEARCH_TTL = float(os.environ.get("DISCOGS_SEARCH_TTL", 6 * 3600))
+    # Calentamiento al arrancar el worker: activado, hot keys simultáneas y plazo por hot key
+    WARMUP_ON_START = os.environ.get("WARMUP_ON_START", "true").lower() == "true"
+    WARMUP_WORKERS = int(os.environ.get("WARMUP_WORKERS", 4))
+    WARMUP_STEP_TIMEOUT = float(os.environ.get("WARMUP_STEP_TIMEOUT", 60))
+    # Caché de cartas renderizadas: nivel persistente (gridfs | disk | off), carpeta del nivel disk,
+    # segundos que vale una carta guardada y bytes de la LRU en memoria
+    CARD_CACHE_BACKEND = os.environ.get("CARD_CACHE_BACKEND", "gridfs").lower()
+    CARD_CACHE_DIR = os.environ.get("CARD_CACHE_DIR", "/tmp/discana/cards")
+    CARD_CACHE_TTL = float(os.environ.get("CARD_CACHE_TTL", 30 * 24 * 3600))
+    CARD_CACHE_MEMORY_BYTES = int(os.environ.get("CARD_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+    # Máximo en disco del nivel 'disk' (expulsa lo menos usado) y segundos entre barridos de caducadas en GridFS
+    CARD_CACHE_DISK_BYTES = int(os.environ.get("CARD_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+    CARD_CACHE_SWEEP_INTERVAL = float(os.environ.get("CARD_CACHE_SWEEP_INTERVAL", 3600))
+    # Portadas y códigos de Spotify de las cartas: bytes de imágenes decodificadas en memoria, carpeta y
+    # bytes del nivel en disco (en Cloud Run /tmp ocupa memoria) y segundos antes de revalidar (ETag/Last-Modified)
+    ASSET_CACHE_MEMORY_BYTES = int(os.environ.get("ASSET_CACHE_MEMORY_BYTES", 96 * 1024 * 1024))
+    ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", "/tmp/discana/assets")
+    ASSET_CACHE_DISK_BYTES = int(os.environ.get("ASSET_CACHE_DISK_BYTES", 128 * 1024 * 1024))
+    ASSET_CACHE_TTL = float(os.environ.get("ASSET_CACHE_TTL", 24 * 3600))
+
     def check_required_vars(self):
         required_vars = [
             "MONGO_URI", "ENCRYPTION_KEY", "SPOTIFY_CLIENT_ID",
@@ -0,0 +1,275 @@
+"""
+Copia local de la colección y la wantlist de Discogs por usuario.
+
+- `discogs_releases`: un documento compacto por disco {user_id, list, item_id, added_at, ...format_release}
+  con list = 'collection' | 'wantlist' (item_id es la instancia en la colección: un disco puede estar repetido).
+- `discogs_sync`: estado por usuario y lista {user_id, list, total, last_added, synced_at, status}.
+
+Discogs admite 60 peticiones por minuto autenticadas, así que las páginas (100 discos) se piden
+de una en una en segundo plano, espaciadas DISCOGS_SYNC_PAGE_INTERVAL entre todos los usuarios
+para dejar margen a las llamadas en vivo. La colección es incremental (viene ordenada por fecha de
+alta: se leen páginas hasta el último disco visto); si el total no cuadra, o para la wantlist,
+se copia entera y se borra lo que ya no está.
+"""
+import threading
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from config import Config
+from db import mongo
+from logging_config import logger
+from utils.executor import background_executor
+from utils.helpers import execute_paginated_query
+from utils.ratelimit import RateLimiter
+
+RELEASES_COLLECTION = 'discogs_releases'
+SYNC_COLLECTION = 'discogs_sync'
+PAGE_SIZE = 100  # máximo admitido por Discogs
+LISTS = ('collection', 'wantlist')
+
+# Campos de format_release que no aportan en la copia local (vacíos en basic_information)
+_DROP_FIELDS = ('tracklist', 'rating', 'marketplace', 'master_url', 'resource_url')
+
+_sync_pool = background_executor.limited(Config.DISCOGS_SYNC_WORKERS)
+_page_limiter = RateLimiter(interval=Config.DISCOGS_SYNC_PAGE_INTERVAL)
+_syncing = set()
+_syncing_lock = threading.Lock()
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def _collections():
+    global _indexes_ready
+    releases = mongo.db[RELEASES_COLLECTION]
+    state = mongo.db[SYNC_COLLECTION]
+    if not _indexes_ready:
+        with _indexes_lock:
+            if not _indexes_ready:
+                releases.create_index([("user_id", 1), ("list", 1), ("item_id", 1)], unique=True)
+                releases.create_index([("user_id", 1), ("list", 1), ("added_at", -1)])
+                state.create_index([("user_id", 1), ("list", 1)], unique=True)
+                _indexes_ready = True
+    return releases, state
+
+# --------------------------
+# Sincronización
+# --------------------------
+
+def _fetch_page(user_id: str, list_name: str, page: int) -> Dict[str, Any]:
+    from discogs.services import make_discogs_request  # discogs.services importa este módulo
+    _page_limiter.acquire()
+    if list_name == 'collection':
+        return make_discogs_request(
+            f"users/{user_id}/collection/folders/0/releases",
+            user_id=user_id, sort="added", sort_order="desc", page=page, per_page=PAGE_SIZE
+        )
+    return make_discogs_request(f"users/{user_id}/wantlist", user_id=user_id, page=page, per_page=PAGE_SIZE)
+
+
+def _parse_items(user_id: str, list_name: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from discogs.services import format_release
+    items = data.get('releases' if list_name == 'collection' else 'wants', [])
+    releases = []
+    for item in items:
+        info = item.get('basic_information') or {}
+        if not info.get('id'):
+            continue
+        release = format_release({**info, 'resource_url': info.get('resource_url') or ''})
+        for field in _DROP_FIELDS:
+            release.pop(field, None)
+        release.update({
+            "user_id": user_id,
+            "list": list_name,
+            "item_id": item.get('instance_id') or info['id'],
+            "added_at": item.get('date_added', ''),
+            "formats": [f.get('name') for f in info.get('formats', []) if f.get('name')],
+            "user_rating": item.get('rating'),
+        })
+        releases.append(release)
+    return releases
+
+
+def _store(releases: List[Dict[str, Any]]):
+    if not releases:
+        return
+    coll, _ = _collections()
+    coll.bulk_write([
+        UpdateOne({"user_id": r["user_id"], "list": r["list"], "item_id": r["item_id"]}, {"$set": r}, upsert=True)
+        for r in releases
+    ], ordered=False)
+
+
+def _fetch_all(user_id: str, list_name: str, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+    pages = first.get('pagination', {}).get('pages', 1)
+    releases = _parse_items(user_id, list_name, first)
+    for page in range(2, pages + 1):
+        releases.extend(_parse_items(user_id, list_name, _fetch_page(user_id, list_name, page)))
+    return releases
+
+
+def _fetch_new(user_id: str, first: Dict[str, Any], last_added: str) -> List[Dict[str, Any]]:
+    """Discos de la colección dados de alta después de last_added."""
+    data, page, new = first, 1, []
+    while True:
+        releases = _parse_items(user_id, 'collection', data)
+        fresh = [r for r in releases if r["added_at"] > last_added]
+        new.extend(fresh)
+        if len(fresh) < len(releases) or page >= data.get('pagination', {}).get('pages', 1):
+            return new
+        page += 1
+        data = _fetch_page(user_id, 'collection', page)
+
+
+def sync_user_list(user_id: str, list_name: str) -> int:
+    """Pone al día una lista (colección o wantlist) del usuario. Devuelve cuántos discos se guardaron."""
+    coll, state_coll = _collections()
+    key = {"user_id": user_id, "list": list_name}
+    state = state_coll.find_one(key) or {}
+    state_coll.update_one(key, {"$set": {"status": "syncing", "started_at": datetime.utcnow()}}, upsert=True)
+
+    try:
+        first = _fetch_page(user_id, list_name, 1)
+        total = first.get('pagination', {}).get('items', 0)
+        last_added = state.get('last_added')
+
+        releases = None
+        if list_name == 'collection' and last_added:
+            releases = _fetch_new(user_id, first, last_added)
+            if coll.count_documents(key) + len(releases) != total:
+                releases = None  # Se quitaron discos: copia completa
+        full = releases is None
+        if full:
+            releases = _fetch_all(user_id, list_name, first)
+
+        _store(releases)
+        if full:
+            coll.delete_many({**key, "item_id": {"$nin": [r["item_id"] for r in releases]}})
+    except Exception as e:
+        state_coll.update_one(key, {"$set": {"status": "error", "error": str(e)}})
+        logger.error(f"Error sincronizando {list_name} de Discogs de {user_id}: {str(e)}", exc_info=True)
+        raise
+
+    newest = max((r["added_at"] for r in releases), default="")
+    state_coll.update_one(
+        key,
+        {
+            "$set": {"total": total, "synced_at": datetime.utcnow(), "status": "ok",
+                     "last_added": max(newest, last_added or "")},
+            "$unset": {"error": ""},
+        }
+    )
+    logger.info(f"{list_name} de Discogs de {user_id} sincronizada ({'completa' if full else 'incremental'}, {len(releases)} discos, total {total})")
+    return len(releases)
+
+
+def sync_user(user_id: str) -> Dict[str, int]:
+    """Colección y wantlist, una detrás de otra (comparten el límite de Discogs)."""
+    return {list_name: sync_user_list(user_id, list_name) for list_name in LISTS}
+
+
+def _sync_done(user_id: str, future):
+    with _syncing_lock:
+        _syncing.discard(user_id)
+
+
+def schedule_sync(user_id: str) -> bool:
+    """Lanza la sincronización en segundo plano (una por usuario a la vez)."""
+    with _syncing_lock:
+        if user_id in _syncing:
+            return False
+        _syncing.add(user_id)
+    future = _sync_pool.submit(sync_user, user_id)
+    future.add_done_callback(partial(_sync_done, user_id))
+    return True
+
+
+def get_sync_state(user_id: str) -> Dict[str, Dict[str, Any]]:
+    _, state_coll = _collections()
+    states = {s["list"]: s for s in state_coll.find({"user_id": user_id}, {"_id": 0})}
+    return {list_name: states.get(list_name, {}) for list_name in LISTS}
+
+
+def ensure_synced(user_id: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Estado de las copias del usuario; si alguna tiene más de DISCOGS_SYNC_INTERVAL (o no existe)
+    se ponen al día en segundo plano. Las lecturas no esperan a la sincronización.
+    """
+    states = get_sync_state(user_id)
+
+    def older_than_interval(moment: Optional[datetime]) -> bool:
+        return not moment or (datetime.utcnow() - moment).total_seconds() > Config.DISCOGS_SYNC_INTERVAL
+
+    for state in states.values():
+        if state.get('status') == 'error' and not older_than_interval(state.get('started_at')):
+            return states
+    if any(older_than_interval(state.get('synced_at')) for state in states.values()):
+        schedule_sync(user_id)
+    return states
+
+
+def is_ready(state: Dict[str, Any]) -> bool:
+    """La copia local de la lista terminó al menos una sincronización."""
+    return bool(state.get('synced_at'))
+
+
+def sync_status(states: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        list_name: {
+            "ready": is_ready(state),
+            "status": state.get('status', 'pending'),
+            "synced_at": state.get('synced_at'),
+            "total": state.get('total', 0),
+        }
+        for list_name, state in states.items()
+    }
+
+# --------------------------
+# Consultas locales
+# --------------------------
+
+# Campos internos de la copia local: las consultas devuelven lo mismo que format_release
+_INTERNAL_FIELDS = ('_id', 'user_id', 'list', 'item_id')
+
+
+def list_releases(user_id: str, list_name: str, page: int = 1, per_page: int = 10, rnd: bool = False) -> Tuple[List[Dict[str, Any]], int]:
+    """Discos de una lista paginados (por defecto los últimos añadidos primero), sin campos internos."""
+    _collections()
+    query = {"user_id": user_id, "list": list_name}
+    releases, total = execute_paginated_query(query, page, per_page, rnd, collection_name=RELEASES_COLLECTION, sort={"added_at": -1})
+    return [{k: v for k, v in release.items() if k not in _INTERNAL_FIELDS} for release in releases], total
+
+
+def all_releases(user_id: str, list_name: str, limit: int = 0) -> List[Dict[str, Any]]:
+    """Lista completa (o los `limit` últimos añadidos) sin campos internos."""
+    coll, _ = _collections()
+    cursor = coll.find(
+        {"user_id": user_id, "list": list_name},
+        {field: 0 for field in _INTERNAL_FIELDS}
+    ).sort("added_at", -1)
+    return list(cursor.limit(limit) if limit else cursor)
+
+
+def genre_counts(user_id: str, list_name: str = 'collection') -> List[Tuple[str, int]]:
+    """Géneros de la lista de más a menos frecuente."""
+    coll, _ = _collections()
+    pipeline = [
+        {"$match": {"user_id": user_id, "list": list_name}},
+        {"$unwind": "$genre"},
+        {"$group": {"_id": "$genre", "n": {"$sum": 1}}},
+        {"$sort": {"n": -1}},
+    ]
+    return [(row["_id"], row["n"]) for row in coll.aggregate(pipeline)]
+
+
+def known_ids(user_id: str) -> Tuple[set, set]:
+    """discogs_id y master_id de todo lo que el usuario ya tiene o quiere."""
+    coll, _ = _collections()
+    release_ids, master_ids = set(), set()
+    for row in coll.find({"user_id": user_id}, {"_id": 0, "discogs_id": 1, "master_id": 1}):
+        release_ids.add(row.get("discogs_id"))
+        if row.get("master_id"):
+            master_ids.add(row["master_id"])
+    return release_ids, master_ids
@@ -1,4 +1,4 @@
-from flask import Blueprint, redirect, request, session, current_app
+from flask import Blueprint, jsonify, redirect, request, session, current_app
 from requests_oauthlib import OAuth1Session
 from urllib.parse import parse_qs
 from cryptography.fernet import Fernet
@@ -6,7 +6,7 @@ import os
 
 from config import Config
 from utils.constants import Collections, Parameters
-from discogs.services import save_discogs_tokens
+from discogs.services import get_discogs_sync_status, save_discogs_tokens
 
 discogs_blueprint = Blueprint(Collections.DISCOGS, __name__)
 
@@ -76,7 +76,7 @@ def discogs_callback():
         encrypted_token = fernet.encrypt(
             f"{access_token_data['oauth_token']}:{access_token_data['oauth_token_secret']}".encode()
         ).decode()
-        save_discogs_tokens(user_data['id'], encrypted_token)
+        save_discogs_tokens(user_data['id'], encrypted_token, username=user_data.get('username'))
         
         # Redirigir al frontend con datos del usuario
         redirect_url = (
@@ -88,4 +88,19 @@ def discogs_callback():
     
     except Exception as e:
         current_app.logger.error(f"Discogs callback error: {str(e)}")
-        return redirect(f"{DISCOGS_FRONTEND_REDIRECT_URI}/error?code=auth_failed")
\ No newline at end of file
+        return redirect(f"{DISCOGS_FRONTEND_REDIRECT_URI}/error?code=auth_failed")
+
+# Estado de la copia local (GET) o sincronizarla ya (POST)
+@discogs_blueprint.route('/sync', methods=['GET', 'POST'])
+def discogs_sync():
+    try:
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+
+        status = get_discogs_sync_status(user_id, start=request.method == 'POST')
+        return jsonify(status), 202 if request.method == 'POST' else 200
+
+    except Exception as e:
+        current_app.logger.error(f"Discogs sync error: {str(e)}")
+        return jsonify({'error': 'An internal error occurred'}), 500
@@ -1,10 +1,16 @@
 from datetime import datetime
+import time
+import uuid
 import requests
 from typing import List, Tuple, Optional
 from config import Config
 from logging_config import logger
 from cryptography.fernet import Fernet
 from db import mongo
+from utils.cache import MISSING, TTLCache
+from utils.executor import io_executor
+from utils.resilience import get_source_timeout, track_provider_call
+from discogs import library
 
 # --------------------------
 # Configuración Discogs
@@ -14,34 +20,49 @@ class DiscogsConfig(Config):
     DISCOGS_API_KEY = Config.DISCOGS_API_KEY
     DISCOGS_API_SECRET = Config.DISCOGS_API_SECRET
     DISCOGS_USER_AGENT = 'Discana/1.0'
-    BASE_URL = "https://api.discogs.com/"
+    BASE_URL = Config.DISCOGS_API_URL
 
 fernet = Fernet(Config.ENCRYPTION_KEY)
-user_tokens = {}
+
+# Tokens OAuth descifrados: se leen de Mongo (sobreviven a reinicios) y se guardan un rato en memoria
+_token_cache = TTLCache(ttl=300, maxsize=1024)
+# Resultados de búsqueda por género para las recomendaciones
+_genre_search_cache = TTLCache(ttl=Config.DISCOGS_SEARCH_TTL, maxsize=256)
 
 # --------------------------
 # Helpers de Autenticación
 # --------------------------
 
+def _user_query(user_id) -> dict:
+    """El usuario de Discogs se identifica por nombre (rutas) o por id numérico (callback OAuth)."""
+    user_id = str(user_id)
+    ids = [user_id, int(user_id)] if user_id.isdigit() else [user_id]
+    return {"$or": [{"discogs_user": user_id}, {"discogs_id": {"$in": ids}}]}
+
 def save_discogs_token(user_id: str, token: str, secret: str):
-    encrypted = fernet.encrypt(f"{token}:{secret}".encode())
-    user_tokens[user_id] = encrypted.decode()
+    encrypted = fernet.encrypt(f"{token}:{secret}".encode()).decode()
+    save_discogs_tokens(user_id, encrypted)
 
 def get_discogs_token(user_id: str) -> Optional[Tuple[str, str]]:
-    encrypted = user_tokens.get(user_id)
-    if encrypted:
-        decrypted = fernet.decrypt(encrypted.encode()).decode()
-        return decrypted.split(':')
-    return None
+    tokens = _token_cache.get(str(user_id))
+    if tokens is MISSING:
+        user = mongo.db.users.find_one({**_user_query(user_id), "discogs_token": {"$exists": True}}, {"discogs_token": 1})
+        tokens = tuple(fernet.decrypt(user["discogs_token"].encode()).decode().split(':', 1)) if user else None
+        _token_cache.set(str(user_id), tokens)
+    return tokens
 
-def save_discogs_tokens(user_id, encrypted_token):
+def save_discogs_tokens(user_id, encrypted_token, username: str = None):
     """Guarda los tokens de Discogs en la base de datos."""
     try:
+        fields = {"discogs_token": encrypted_token}
+        if username:
+            fields["discogs_user"] = username
         mongo.db.users.update_one(
             {"discogs_id": user_id},
-            {"$set": {"discogs_token": encrypted_token}},
+            {"$set": fields},
             upsert=True
         )
+        _token_cache.clear()
         logger.info(f"Discogs tokens saved for user {user_id}")
     except Exception as e:
         logger.error(f"Error saving Discogs tokens for user {user_id}: {str(e)}")
@@ -54,8 +75,6 @@ def save_discogs_tokens(user_id, encrypted_token):
 def make_discogs_request(endpoint: str, user_id: str = None, **params) -> dict:
     """Realiza solicitudes autenticadas a la API de Discogs"""
     try:
-        logger.info(f"API Key: {DiscogsConfig.DISCOGS_API_KEY}, API Secret: {DiscogsConfig.DISCOGS_API_SECRET}")
-
         headers = {
             'User-Agent': DiscogsConfig.DISCOGS_USER_AGENT,
             'Authorization': f'Discogs key={DiscogsConfig.DISCOGS_API_KEY}, secret={DiscogsConfig.DISCOGS_API_SECRET}'
@@ -65,13 +84,19 @@ def make_discogs_request(endpoint: str, user_id: str = None, **params) -> dict:
         if user_id:
             tokens = get_discogs_token(user_id)
             if tokens:
-                headers['Authorization'] = f'OAuth oauth_consumer_key="{DiscogsConfig.DISCOGS_API_KEY}", oauth_token="{tokens[0]}"'
+                # OAuth 1.0a con firma PLAINTEXT (admitida por Discogs sobre HTTPS)
+                headers['Authorization'] = (
+                    f'OAuth oauth_consumer_key="{DiscogsConfig.DISCOGS_API_KEY}", oauth_token="{tokens[0]}", '
+                    f'oauth_signature_method="PLAINTEXT", oauth_signature="{DiscogsConfig.DISCOGS_API_SECRET}&{tokens[1]}", '
+                    f'oauth_timestamp="{int(time.time())}", oauth_nonce="{uuid.uuid4().hex}", oauth_version="1.0"'
+                )
         
         url = f"{DiscogsConfig.BASE_URL}{endpoint}"
         logger.debug(f"Requesting: {url}")
 
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
+        with track_provider_call('discogs'):
+            response = requests.get(url, headers=headers, params=params, timeout=Config.HTTP_TIMEOUT)
+            response.raise_for_status()
         
         # Manejar rate limiting
         remaining = int(response.headers.get('X-Discogs-RateLimit-Remaining', 60))
@@ -118,12 +143,15 @@ def format_release(release_data: dict) -> dict:
 # --------------------------
 
 def get_user_collection(**params) -> Tuple[List[dict], int]:
-    """Obtiene la colección de discos del usuario"""
+    """Obtiene la colección de discos del usuario (de la copia local en cuanto está sincronizada)"""
     try:
 
         user_id = params.get('user_id')
         page = params.get('page', 1)
-        per_page = params.get('limit', 20)
+        per_page = params.get('limit') or params.get('per_page', 20)
+
+        if user_id and library.is_ready(library.ensure_synced(user_id)['collection']):
+            return library.list_releases(user_id, 'collection', page=page, per_page=per_page, rnd=params.get('rnd', False))
 
         data = make_discogs_request(
             f"users/{user_id}/collection/folders/0/releases",
@@ -144,6 +172,9 @@ def get_user_collection(**params) -> Tuple[List[dict], int]:
 def get_user_wantlist(user_id: str, page: int = 1, per_page: int = 20) -> Tuple[List[dict], int]:
     """Obtiene la lista de deseos del usuario"""
     try:
+        if library.is_ready(library.ensure_synced(user_id)['wantlist']):
+            return library.list_releases(user_id, 'wantlist', page=page, per_page=per_page)
+
         data = make_discogs_request(
             f"users/{user_id}/wantlist",
             user_id=user_id,
@@ -157,6 +188,19 @@ def get_user_wantlist(user_id: str, page: int = 1, per_page: int = 20) -> Tuple[
         logger.error(f"Error obteniendo wantlist: {str(e)}")
         return [], 0
 
+def get_all_user_collection(user_id: str, limit: int = 0) -> List[dict]:
+    """Colección completa del usuario; mientras no esté sincronizada, la primera página de Discogs."""
+    if library.is_ready(library.ensure_synced(user_id)['collection']):
+        return library.all_releases(user_id, 'collection', limit)
+    releases, _ = get_user_collection(user_id=user_id, limit=100)
+    return releases
+
+def get_discogs_sync_status(user_id: str, start: bool = False) -> dict:
+    """Estado de la copia local de Discogs del usuario; con start=True la sincroniza ya."""
+    if start:
+        library.schedule_sync(user_id)
+    return library.sync_status(library.get_sync_state(user_id))
+
 def search_releases(query: str, page: int = 1, per_page: int = 20) -> Tuple[List[dict], int]:
     """Busca lanzamientos en el catálogo de Discogs"""
     try:
@@ -201,28 +245,56 @@ def get_marketplace_listings(release_id: str, page: int = 1, per_page: int = 20)
         logger.error(f"Error obteniendo listados: {str(e)}")
         return [], 0
 
+def _search_genre(genre: str) -> List[dict]:
+    """Búsqueda por género, compartida entre usuarios (DISCOGS_SEARCH_TTL)."""
+    results = _genre_search_cache.get(genre)
+    if results is MISSING:
+        results, _ = search_releases(f"genre:{genre}", per_page=10)
+        if results:
+            _genre_search_cache.set(genre, results)
+    return results
+
 def get_recommendations(user_id: str, limit: int = 20) -> List[dict]:
-    """Recomendaciones basadas en la colección del usuario"""
+    """Recomendaciones basadas en la colección del usuario (copia local; hasta que esté, la primera página en vivo)"""
     try:
-        # Obtener géneros más comunes en la colección
-        collection, _ = get_user_collection(user_id, per_page=100)
-        genre_count = {}
-        for release in collection:
-            for genre in release.get('genre', []):
-                genre_count[genre] = genre_count.get(genre, 0) + 1
-                
-        top_genres = sorted(genre_count.items(), key=lambda x: x[1], reverse=True)[:3]
-        
-        # Buscar lanzamientos en los mismos géneros
+        synced = library.is_ready(library.ensure_synced(user_id)['collection'])
+
+        # Géneros más comunes en la colección
+        if synced:
+            top_genres = [genre for genre, _ in library.genre_counts(user_id)[:3]]
+        else:
+            collection, _ = get_user_collection(user_id=user_id, limit=100)
+            genre_count = {}
+            for release in collection:
+                for genre in release.get('genre', []):
+                    genre_count[genre] = genre_count.get(genre, 0) + 1
+            top_genres = [genre for genre, _ in sorted(genre_count.items(), key=lambda x: x[1], reverse=True)[:3]]
+        if not top_genres:
+            return []
+
+        # Buscar lanzamientos en los mismos géneros, en paralelo
+        pool = io_executor.limited(len(top_genres))
+        futures = [pool.submit(_search_genre, genre) for genre in top_genres]
         recommendations = []
-        for genre, _ in top_genres:
-            results, _ = search_releases(f"genre:{genre}", per_page=10)
-            recommendations.extend(results)
-            
-        # Eliminar duplicados y ya en colección
-        collection_ids = {r['_id'] for r in collection}
-        unique_recs = [r for r in recommendations if r['_id'] not in collection_ids]
-        
+        for genre, future in zip(top_genres, futures):
+            try:
+                recommendations.extend(future.result(timeout=get_source_timeout('discogs')))
+            except Exception as e:
+                logger.warning(f"Error buscando recomendaciones de {genre}: {str(e)}")
+
+        # Eliminar duplicados y lo que ya está en la colección o la wantlist
+        if synced:
+            release_ids, master_ids = library.known_ids(user_id)
+        else:
+            release_ids = {r.get('discogs_id') for r in collection}
+            master_ids = {r['master_id'] for r in collection if r.get('master_id')}
+        unique_recs, seen = [], set()
+        for r in recommendations:
+            if r['discogs_id'] in release_ids or r['discogs_id'] in seen or (r.get('master_id') and r['master_id'] in master_ids):
+                continue
+            seen.add(r['discogs_id'])
+            unique_recs.append(r)
+
         return unique_recs[:limit]
         
     except Exception as e:
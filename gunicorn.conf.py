@@ -45,3 +45,13 @@ keepalive = 120
 # Setting it to False (recommended) loads the app in each worker process individually.
 # This improves robustness, especially for database connections, and supports zero-downtime reloads.
 preload_app = False
+
+# --- Warm-up ---
+# After the app is loaded in the worker, warm Mongo, provider tokens, card assets and the hottest racks
+# in a background thread. The worker starts accepting requests immediately; /api/<version>/admin/ready
+# returns 503 until the warm-up has finished, so use it as the startup/readiness probe.
+def post_worker_init(worker):
+    from config import Config
+    if Config.WARMUP_ON_START:
+        from admin.warmup import start_warmup
+        start_warmup(worker.wsgi)
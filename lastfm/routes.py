@@ -8,8 +8,10 @@ from lastfm.services import (
     save_lastfm_session, 
     scrobble_album,
     get_forgotten_albums,
-    get_random_forgotten_album
+    get_random_forgotten_album,
+    get_scrobble_sync_status
 )
+from lastfm.scrobble_queue import enqueue_scrobble, get_scrobble_job
 from utils.constants import Collections, Parameters
 
 lastfm_blueprint = Blueprint(Collections.LASTFM, __name__)
@@ -53,7 +55,7 @@ def lastfm_callback():
         
         # Obtener sesión
         response = requests.get(
-            "https://ws.audioscrobbler.com/2.0/",
+            Config.LASTFM_API_URL,
             params={
                 'method': 'auth.getSession',
                 'api_key': LASTFM_KEY,
@@ -98,13 +100,50 @@ def scrobble_album_route():
         if not all([username, album, artist]):
             return jsonify({'error': 'Missing required parameters: username, album, artist'}), 400
 
-        result = scrobble_album(username, album, artist)
+        # Optional: timestamp of the first track and the tracklist the client already has
+        timestamp = data.get('timestamp')
+        if timestamp is not None:
+            # bool es subclase de int; un entero en texto ("1700000000") también vale
+            if isinstance(timestamp, bool) or not isinstance(timestamp, (int, str)) or not str(timestamp).strip().isdigit():
+                return jsonify({'error': "'timestamp' must be an integer (Unix time)"}), 400
+            timestamp = int(timestamp)
+        tracks = data.get('tracks')
+        if tracks is not None and not isinstance(tracks, list):
+            return jsonify({'error': "'tracks' must be a list"}), 400
+
+        queue = data.get('queue') or False
+        if isinstance(queue, str):
+            queue = queue.strip().lower() in ('true', '1', 'yes')
+        elif not isinstance(queue, bool):
+            return jsonify({'error': "'queue' must be a boolean"}), 400
+
+        # queue=true: fire and forget, the result is available at /scrobble_album/<job_id>
+        if queue:
+            job = enqueue_scrobble(username, album, artist, timestamp=timestamp, tracks=tracks)
+            return jsonify(job), 202
+
+        result = scrobble_album(username, album, artist, timestamp=timestamp, tracks=tracks)
         return jsonify(result)
 
     except Exception as e:
         current_app.logger.error(f"Error scrobbling album: {str(e)}")
         return jsonify({'error': 'An internal error occurred'}), 500
 
+@lastfm_blueprint.route('/scrobble_album/<job_id>', methods=['GET'])
+def scrobble_job_route(job_id):
+    """
+    Status and result of a queued scrobble.
+    """
+    try:
+        job = get_scrobble_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+
+    except Exception as e:
+        current_app.logger.error(f"Error getting scrobble job: {str(e)}")
+        return jsonify({'error': 'An internal error occurred'}), 500
+
 @lastfm_blueprint.route('/forgotten_albums', methods=['GET'])
 def forgotten_albums_route():
     """
@@ -120,7 +159,7 @@ def forgotten_albums_route():
         limit = int(request.args.get('limit', 10))
 
         albums, total = get_forgotten_albums(user_id, days_ago, page, limit)
-        return jsonify({'albums': albums, 'total': total})
+        return jsonify({'albums': albums, 'total': total, 'sync': get_scrobble_sync_status(user_id)})
 
     except Exception as e:
         current_app.logger.error(f"Error getting forgotten albums: {str(e)}")
@@ -144,3 +183,20 @@ def random_forgotten_album_route():
     except Exception as e:
         current_app.logger.error(f"Error getting random forgotten album: {str(e)}")
         return jsonify({'error': 'An internal error occurred'}), 500
+
+@lastfm_blueprint.route('/sync', methods=['GET', 'POST'])
+def scrobble_sync_route():
+    """
+    Status of the user's local scrobble mirror (GET) or start syncing it now (POST).
+    """
+    try:
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+
+        status = get_scrobble_sync_status(user_id, start=request.method == 'POST')
+        return jsonify(status), 202 if request.method == 'POST' else 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error syncing scrobbles: {str(e)}")
+        return jsonify({'error': 'An internal error occurred'}), 500
@@ -0,0 +1,116 @@
+"""
+Cola de scrobbles ("fire and forget").
+
+Los trabajos se guardan en `lastfm_scrobble_jobs` y un worker en segundo plano los procesa por
+orden de llegada con scrobble_album; el cliente consulta el resultado por id. Como la cola vive
+en Mongo, lo pendiente sobrevive a un reinicio y se retoma con start_scrobble_worker() o con el
+siguiente encolado. Un trabajo 'running' abandonado (proceso caído) se reclama pasado un tiempo.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config import Config
+from db import mongo
+from lastfm.services import scrobble_album
+from logging_config import logger
+from utils.executor import io_executor
+
+JOBS_COLLECTION = 'lastfm_scrobble_jobs'
+STALE_RUNNING_SECONDS = 15 * 60
+
+_worker_pool = io_executor.limited(Config.LASTFM_SCROBBLE_WORKERS)
+_workers = 0
+_workers_lock = threading.Lock()
+
+
+def _jobs():
+    return mongo.db[JOBS_COLLECTION]
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": str(job["_id"]),
+        "status": job.get("status"),
+        "username": job.get("username"),
+        "album": job.get("album"),
+        "artist": job.get("artist"),
+        "created_at": job.get("created_at"),
+        "finished_at": job.get("finished_at"),
+        "result": job.get("result"),
+    }
+
+
+def enqueue_scrobble(username: str, album: str, artist: str, timestamp: int = None, tracks: List[Any] = None) -> Dict[str, Any]:
+    """Encola el scrobble de un álbum y despierta al worker. Devuelve el trabajo (status 'pending')."""
+    job = {
+        "username": username,
+        "album": album,
+        "artist": artist,
+        "timestamp": timestamp,
+        "tracks": tracks,
+        "status": "pending",
+        "attempts": 0,
+        "created_at": datetime.utcnow(),
+    }
+    job["_id"] = _jobs().insert_one(job).inserted_id
+    start_scrobble_worker()
+    return _public(job)
+
+
+def get_scrobble_job(job_id: str) -> Optional[Dict[str, Any]]:
+    if not ObjectId.is_valid(job_id):
+        return None
+    job = _jobs().find_one({"_id": ObjectId(job_id)})
+    return _public(job) if job else None
+
+
+def _claim() -> Optional[Dict[str, Any]]:
+    now = datetime.utcnow()
+    return _jobs().find_one_and_update(
+        {"$or": [
+            {"status": "pending"},
+            {"status": "running", "started_at": {"$lt": now - timedelta(seconds=STALE_RUNNING_SECONDS)}},
+        ]},
+        {"$set": {"status": "running", "started_at": now}, "$inc": {"attempts": 1}},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _drain():
+    while True:
+        job = _claim()
+        if not job:
+            return
+        result = scrobble_album(job["username"], job["album"], job["artist"], timestamp=job.get("timestamp"), tracks=job.get("tracks"))
+        _jobs().update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "error" if "error" in result else "done", "result": result, "finished_at": datetime.utcnow()}}
+        )
+
+
+def _worker_done(future):
+    global _workers
+    with _workers_lock:
+        _workers -= 1
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Worker de scrobbles detenido: {future.exception()}")
+        return
+    # Lo encolado mientras el worker terminaba no se queda esperando al siguiente encolado
+    if _jobs().count_documents({"status": "pending"}, limit=1):
+        start_scrobble_worker()
+
+
+def start_scrobble_worker() -> bool:
+    """Arranca un worker si hay hueco (LASTFM_SCROBBLE_WORKERS)."""
+    global _workers
+    with _workers_lock:
+        if _workers >= Config.LASTFM_SCROBBLE_WORKERS:
+            return False
+        _workers += 1
+    _worker_pool.submit(_drain).add_done_callback(_worker_done)
+    return True
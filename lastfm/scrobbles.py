@@ -0,0 +1,309 @@
+"""
+Réplica local de los scrobbles de Last.fm por usuario.
+
+- `lastfm_scrobbles`: un documento por scrobble {user, ts, artist, album, album_mbid, track}.
+- `lastfm_user_albums`: acumulado por álbum {user, artist, album, mbid, plays, first_ts, last_ts},
+  actualizado con cada scrobble nuevo (olvidados, recientes y top de siempre salen de aquí).
+- `lastfm_scrobble_sync`: estado de la sincronización {user, last_ts, target_ts, cursor_ts, synced_at, status}.
+
+La sincronización es incremental desde el último timestamp visto, en páginas de 200
+(el máximo de user.getRecentTracks) y en segundo plano. Recorre la ventana [last_ts, target_ts]
+de la más reciente a la más antigua moviendo `to`, así que si se corta se reanuda donde iba.
+La ventana empieza LASTFM_SYNC_OVERLAP segundos antes de last_ts: Last.fm fecha cada scrobble
+con el inicio de la pista y los clientes sin conexión envían tarde, así que llegan scrobbles con
+ts anterior a la última sincronización. Releerlos no duplica nada (índice único y el acumulado
+solo suma lo insertado).
+"""
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from config import Config
+from db import mongo
+from logging_config import logger
+from utils.executor import background_executor
+from utils.ratelimit import RateLimiter
+
+SCROBBLES_COLLECTION = 'lastfm_scrobbles'
+USER_ALBUMS_COLLECTION = 'lastfm_user_albums'
+SYNC_COLLECTION = 'lastfm_scrobble_sync'
+PAGE_SIZE = 200  # máximo admitido por user.getRecentTracks
+
+# Periodos de user.getTopAlbums en días
+PERIOD_DAYS = {'7day': 7, '1month': 30, '3month': 90, '6month': 180, '12month': 365}
+
+_sync_pool = background_executor.limited(Config.LASTFM_SYNC_WORKERS)
+_page_limiter = RateLimiter(interval=Config.LASTFM_SYNC_PAGE_INTERVAL)
+_syncing = set()
+_syncing_lock = threading.Lock()
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def _collections():
+    global _indexes_ready
+    scrobbles = mongo.db[SCROBBLES_COLLECTION]
+    albums = mongo.db[USER_ALBUMS_COLLECTION]
+    state = mongo.db[SYNC_COLLECTION]
+    if not _indexes_ready:
+        with _indexes_lock:
+            if not _indexes_ready:
+                scrobbles.create_index([("user", 1), ("ts", -1), ("artist", 1), ("track", 1)], unique=True)
+                albums.create_index([("user", 1), ("artist", 1), ("album", 1)], unique=True)
+                albums.create_index([("user", 1), ("plays", -1)])
+                albums.create_index([("user", 1), ("last_ts", -1)])
+                state.create_index("user", unique=True)
+                _indexes_ready = True
+    return scrobbles, albums, state
+
+
+def _user_key(user: str) -> str:
+    return user.strip().lower()
+
+# --------------------------
+# Sincronización
+# --------------------------
+
+def _parse_tracks(user: str, tracks: Any) -> List[Dict[str, Any]]:
+    if isinstance(tracks, dict):  # Una sola pista
+        tracks = [tracks]
+    scrobbles = []
+    for track in tracks or []:
+        if not isinstance(track, dict) or track.get('@attr', {}).get('nowplaying') == 'true':
+            continue
+        ts = int((track.get('date') or {}).get('uts') or 0)
+        if not ts:
+            continue
+        artist = track.get('artist', {})
+        album = track.get('album', {})
+        scrobbles.append({
+            "user": user,
+            "ts": ts,
+            "artist": (artist.get('#text') or artist.get('name') or '') if isinstance(artist, dict) else str(artist),
+            "album": album.get('#text', '') if isinstance(album, dict) else str(album or ''),
+            "album_mbid": album.get('mbid', '') if isinstance(album, dict) else '',
+            "track": track.get('name', ''),
+        })
+    return scrobbles
+
+
+def _store_page(user: str, scrobbles: List[Dict[str, Any]]) -> int:
+    """Guarda los scrobbles (idempotente) y suma solo los nuevos al acumulado por álbum."""
+    if not scrobbles:
+        return 0
+    scrobbles_coll, albums_coll, _ = _collections()
+    result = scrobbles_coll.bulk_write([
+        UpdateOne({"user": s["user"], "ts": s["ts"], "artist": s["artist"], "track": s["track"]}, {"$setOnInsert": s}, upsert=True)
+        for s in scrobbles
+    ], ordered=False)
+    inserted = [scrobbles[i] for i in result.upserted_ids]
+    album_updates = {}
+    for s in inserted:
+        if not s["album"]:
+            continue
+        key = (s["artist"], s["album"])
+        entry = album_updates.setdefault(key, {"plays": 0, "first_ts": s["ts"], "last_ts": s["ts"], "mbid": s["album_mbid"]})
+        entry["plays"] += 1
+        entry["first_ts"] = min(entry["first_ts"], s["ts"])
+        entry["last_ts"] = max(entry["last_ts"], s["ts"])
+        entry["mbid"] = entry["mbid"] or s["album_mbid"]
+    if album_updates:
+        albums_coll.bulk_write([
+            UpdateOne(
+                {"user": user, "artist": artist, "album": album},
+                {"$inc": {"plays": e["plays"]}, "$min": {"first_ts": e["first_ts"]}, "$max": {"last_ts": e["last_ts"], "mbid": e["mbid"]}},
+                upsert=True
+            )
+            for (artist, album), e in album_updates.items()
+        ], ordered=False)
+    return len(inserted)
+
+
+def sync_user_scrobbles(user: str) -> int:
+    """Trae los scrobbles posteriores al último sincronizado. Devuelve cuántos son nuevos."""
+    from lastfm.services import make_lastfm_request  # lastfm.services importa este módulo
+
+    key = _user_key(user)
+    _, _, state_coll = _collections()
+    state = state_coll.find_one({"user": key}) or {}
+    last_ts = state.get('last_ts', 0)
+    from_ts = max(0, last_ts - Config.LASTFM_SYNC_OVERLAP) + 1
+    target_ts = state.get('target_ts') or int(time.time())
+    cursor_ts = state.get('cursor_ts') or target_ts
+    state_coll.update_one(
+        {"user": key},
+        {"$set": {"target_ts": target_ts, "cursor_ts": cursor_ts, "status": "syncing", "started_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+    imported = 0
+    total_imported = 0
+    try:
+        while True:
+            _page_limiter.acquire()
+            data = make_lastfm_request(
+                'user.getRecentTracks',
+                user=user,
+                limit=PAGE_SIZE,
+                page=1,
+                **{'from': from_ts, 'to': cursor_ts}
+            )
+            recent = data.get('recenttracks', {})
+            scrobbles = _parse_tracks(key, recent.get('track', []))
+            stored = _store_page(key, scrobbles)
+            imported += stored
+            total_imported += stored
+            # Siempre se pide la página 1 de una ventana que se estrecha: si no hay más páginas, se acabó
+            if not scrobbles or int(recent.get('@attr', {}).get('totalPages', 1) or 1) <= 1:
+                break
+            oldest = min(s["ts"] for s in scrobbles)
+            # Los del mismo segundo que el último de la página se repiten y la inserción los descarta
+            cursor_ts = oldest if oldest < cursor_ts else cursor_ts - 1
+            state_coll.update_one({"user": key}, {"$set": {"cursor_ts": cursor_ts}, "$inc": {"scrobbles": imported}})
+            imported = 0
+    except Exception as e:
+        state_coll.update_one({"user": key}, {"$set": {"status": "error", "error": str(e)}, "$inc": {"scrobbles": imported}})
+        logger.error(f"Error sincronizando scrobbles de {user}: {str(e)}", exc_info=True)
+        raise
+
+    state_coll.update_one(
+        {"user": key},
+        {
+            "$set": {"last_ts": target_ts, "synced_at": datetime.utcnow(), "status": "ok"},
+            "$unset": {"target_ts": "", "cursor_ts": "", "error": ""},
+            "$inc": {"scrobbles": imported},
+        }
+    )
+    logger.info(f"Scrobbles de {user} sincronizados hasta {target_ts} ({total_imported} nuevos)")
+    return total_imported
+
+
+def _sync_done(key: str, future):
+    with _syncing_lock:
+        _syncing.discard(key)
+
+
+def schedule_sync(user: str) -> bool:
+    """Lanza la sincronización en segundo plano (una por usuario a la vez)."""
+    key = _user_key(user)
+    with _syncing_lock:
+        if key in _syncing:
+            return False
+        _syncing.add(key)
+    future = _sync_pool.submit(sync_user_scrobbles, user)
+    future.add_done_callback(partial(_sync_done, key))
+    return True
+
+
+def get_sync_state(user: str) -> Dict[str, Any]:
+    _, _, state_coll = _collections()
+    return state_coll.find_one({"user": _user_key(user)}, {"_id": 0}) or {}
+
+
+def ensure_synced(user: str) -> Dict[str, Any]:
+    """
+    Estado de la réplica del usuario; si tiene más de LASTFM_SYNC_INTERVAL (o no existe)
+    se pone al día en segundo plano. Las lecturas no esperan a la sincronización.
+    """
+    state = get_sync_state(user)
+
+    def older_than_interval(moment: Optional[datetime]) -> bool:
+        return not moment or (datetime.utcnow() - moment).total_seconds() > Config.LASTFM_SYNC_INTERVAL
+
+    if state.get('status') == 'error' and not older_than_interval(state.get('started_at')):
+        # Tras un error se reintenta (y se reanuda desde cursor_ts) en el siguiente intervalo
+        return state
+    if older_than_interval(state.get('synced_at')) or state.get('cursor_ts'):
+        schedule_sync(user)
+    return state
+
+
+def is_ready(state: Dict[str, Any]) -> bool:
+    """La réplica tiene todo el historial (terminó al menos una sincronización completa)."""
+    return bool(state.get('last_ts'))
+
+
+def sync_status(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "ready": is_ready(state),
+        "status": state.get('status', 'pending'),
+        "synced_at": state.get('synced_at'),
+        "scrobbles": state.get('scrobbles', 0),
+    }
+
+# --------------------------
+# Consultas locales
+# --------------------------
+
+def _page(pipeline: List[Dict[str, Any]], collection, page: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    pipeline = pipeline + [{"$facet": {
+        "items": [{"$skip": max(page - 1, 0) * limit}, {"$limit": limit}],
+        "total": [{"$count": "n"}],
+    }}]
+    result = next(collection.aggregate(pipeline), {})
+    total = result.get("total", [{}])
+    return result.get("items", []), (total[0].get("n", 0) if total else 0)
+
+
+def period_since(period: Optional[str]) -> Optional[int]:
+    days = PERIOD_DAYS.get(period or 'overall')
+    return int(time.time()) - days * 86400 if days else None
+
+
+def top_albums(user: str, since_ts: Optional[int] = None, page: int = 1, limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+    """Álbumes más escuchados (desde since_ts si se indica): [{artist, album, mbid, plays, last_ts}], total."""
+    scrobbles_coll, albums_coll, _ = _collections()
+    key = _user_key(user)
+    if since_ts is None:
+        pipeline = [{"$match": {"user": key}}, {"$sort": {"plays": -1, "last_ts": -1}}]
+        return _page(pipeline, albums_coll, page, limit)
+    pipeline = [
+        {"$match": {"user": key, "ts": {"$gte": since_ts}, "album": {"$ne": ""}}},
+        {"$group": {"_id": {"artist": "$artist", "album": "$album"}, "plays": {"$sum": 1},
+                    "last_ts": {"$max": "$ts"}, "mbid": {"$max": "$album_mbid"}}},
+        {"$project": {"_id": 0, "artist": "$_id.artist", "album": "$_id.album", "plays": 1, "last_ts": 1, "mbid": 1}},
+        {"$sort": {"plays": -1, "last_ts": -1}},
+    ]
+    return _page(pipeline, scrobbles_coll, page, limit)
+
+
+def recent_albums(user: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Últimos álbumes escuchados, del más reciente al más antiguo."""
+    _, albums_coll, _ = _collections()
+    return list(albums_coll.find({"user": _user_key(user)}, {"_id": 0}).sort("last_ts", -1).limit(limit))
+
+
+def forgotten_albums(user: str, before_ts: int, page: int = 1, limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+    """Álbumes que no se escuchan desde before_ts, de más a menos escuchados."""
+    _, albums_coll, _ = _collections()
+    pipeline = [
+        {"$match": {"user": _user_key(user), "last_ts": {"$lt": before_ts}}},
+        {"$sort": {"plays": -1, "last_ts": -1}},
+    ]
+    return _page(pipeline, albums_coll, page, limit)
+
+
+def random_forgotten_album(user: str, before_ts: int, pool: int = 500) -> Optional[Dict[str, Any]]:
+    """Uno al azar entre los `pool` olvidados más escuchados."""
+    _, albums_coll, _ = _collections()
+    pipeline = [
+        {"$match": {"user": _user_key(user), "last_ts": {"$lt": before_ts}}},
+        {"$sort": {"plays": -1}},
+        {"$limit": pool},
+        {"$sample": {"size": 1}},
+        {"$project": {"_id": 0}},
+    ]
+    return next(albums_coll.aggregate(pipeline), None)
+
+
+def listened_albums(user: str, titles: List[str]) -> set:
+    """(artist, album) en minúsculas de los álbumes de `titles` que el usuario ya ha escuchado."""
+    if not titles:
+        return set()
+    _, albums_coll, _ = _collections()
+    rows = albums_coll.find({"user": _user_key(user), "album": {"$in": list(set(titles))}}, {"_id": 0, "artist": 1, "album": 1})
+    return {(row["artist"].lower(), row["album"].lower()) for row in rows}
@@ -1,13 +1,22 @@
 from datetime import datetime, timedelta
 import requests
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import wait
+from functools import partial
 from config import Config
 from logging_config import logger
 from cryptography.fernet import Fernet
 from db import mongo
 from pymongo import errors
+from utils.cache import MISSING, TTLCache
+from utils.executor import io_executor
+from utils.resilience import get_source_timeout, track_provider_call
+from utils.singleflight import SingleFlight
+from lastfm import scrobbles
 import hashlib
 import random
+import threading
+import time
 
 # --------------------------
 # Configuración Last.fm
@@ -19,7 +28,24 @@ fernet = Fernet(Config.ENCRYPTION_KEY)
 class LastfmConfig(Config):
     LASTFM_API_KEY = Config.LASTFM_API_KEY
     LASTFM_API_SECRET = Config.LASTFM_API_SECRET
-    BASE_URL = "http://ws.audioscrobbler.com/2.0/"
+    BASE_URL = Config.LASTFM_API_URL
+
+# album.getInfo compartido por detalle, listados y scrobbles (con usuario dura lo que el playcount de usuario)
+_album_info_cache = TTLCache(ttl=Config.LASTFM_ALBUM_INFO_TTL, maxsize=4096)
+_album_info_flight = SingleFlight()
+# Playcounts de track.getInfo: el global cambia despacio (TTL largo), el del usuario no (TTL corto)
+_track_playcounts = TTLCache(ttl=Config.LASTFM_TRACK_PLAYCOUNT_TTL, maxsize=20000)
+_user_track_playcounts = TTLCache(ttl=Config.LASTFM_USER_PLAYCOUNT_TTL, maxsize=20000)
+_track_flight = SingleFlight()
+# Enriquecimiento de tracks diferido (en segundo plano)
+_background_tracks = io_executor.limited(Config.LASTFM_TRACK_INFO_WORKERS)
+_pending_tracks = set()
+_pending_lock = threading.Lock()
+# Listas globales (tag.getTopAlbums, geo.getTopAlbums): iguales para todos los usuarios
+_chart_cache = TTLCache(ttl=Config.LASTFM_CHART_TTL, maxsize=1024)
+_chart_flight = SingleFlight()
+# Tags del usuario para las recomendaciones (cambian despacio)
+_user_tags_cache = TTLCache(ttl=Config.LASTFM_SYNC_INTERVAL, maxsize=4096)
 
 def encrypt_token(token: str) -> str:
     return fernet.encrypt(token.encode()).decode()
@@ -80,8 +106,9 @@ def make_lastfm_request(method: str, **params) -> dict:
         full_url = requests.Request('GET', LastfmConfig.BASE_URL, params=params).prepare().url  # Construir URL completa
         logger.info(f"Requesting: {full_url}")  # Log de la URL completa
         
-        response = requests.get(LastfmConfig.BASE_URL, params=params)
-        response.raise_for_status()
+        with track_provider_call('lastfm'):
+            response = requests.get(LastfmConfig.BASE_URL, params=params, timeout=Config.HTTP_TIMEOUT)
+            response.raise_for_status()
         data = response.json()
         
         if 'error' in data:
@@ -123,8 +150,19 @@ def format_date_lastfm(date_str: str) -> str:
     except:
         return ""
 
-def get_album_info_lastfm(artist: str, album: str, mbid: str = None, user: str = None, include_track_info: bool = False) -> dict:
-    """Obtiene información detallada de un álbum, priorizando mbid."""
+def get_album_info_lastfm(
+    artist: str,
+    album: str,
+    mbid: str = None,
+    user: str = None,
+    include_track_info: bool = False,
+    defer_track_info: bool = False
+) -> dict:
+    """
+    Obtiene información detallada de un álbum, priorizando mbid.
+    include_track_info añade las pistas más escuchadas; con defer_track_info solo se usan
+    los playcounts ya cacheados y el resto se pide en segundo plano (track_info_pending).
+    """
     try:
         params = {}
         if mbid:
@@ -135,19 +173,19 @@ def get_album_info_lastfm(artist: str, album: str, mbid: str = None, user: str =
         if user:
             params['username'] = user
 
-        data = make_lastfm_request('album.getInfo', **params)
-        if 'error' in data:  # Check for Last.fm errors
-            logger.error(f"Last.fm API error: {data['message']}")
-            return {}
-        album_info = data.get('album', {})
-
-        if not isinstance(album_info, dict):
-            logger.warning(f"Unexpected album_info type from Last.fm API: {type(album_info)}. Returning empty dictionary.")
-            return {}
+        key = (mbid or (str(artist).strip().lower(), str(album).strip().lower()), user.strip().lower() if user else None)
+        album_info = _album_info_cache.get(key)
+        if album_info is MISSING:
+            album_info = _album_info_flight.do(key, _fetch_album_info, params)
+            if not album_info:
+                return {}
+            _album_info_cache.set(key, album_info, ttl=Config.LASTFM_USER_PLAYCOUNT_TTL if user else None)
+        # Copia: el enriquecimiento de tracks modifica el diccionario
+        album_info = dict(album_info)
 
         # Si se solicita información de tracks, invocar el método auxiliar
         if include_track_info:
-            album_info = _add_track_info_to_album(album_info, artist, user)
+            album_info = _add_track_info_to_album(album_info, artist or album_info.get('artist', ''), user, defer=defer_track_info)
 
         return album_info
 
@@ -155,38 +193,145 @@ def get_album_info_lastfm(artist: str, album: str, mbid: str = None, user: str =
         logger.warning(f"Error obteniendo info de {artist} - {album} (mbid: {mbid}): {str(e)}", exc_info=True)
         return {}
 
+def _fetch_album_info(params: Dict[str, Any]) -> dict:
+    data = make_lastfm_request('album.getInfo', **params)
+    if 'error' in data:  # Check for Last.fm errors
+        logger.error(f"Last.fm API error: {data['message']}")
+        return {}
+    album_info = data.get('album', {})
+    if not isinstance(album_info, dict):
+        logger.warning(f"Unexpected album_info type from Last.fm API: {type(album_info)}. Returning empty dictionary.")
+        return {}
+    return album_info
 
-def _add_track_info_to_album(album_info: dict, artist: str, user: str) -> dict:
-    """Añade información detallada de los tracks al álbum."""
+def _map_concurrently(fn, items: List[Any], fallback) -> List[Any]:
+    """
+    fn(item) para cada elemento en paralelo (LASTFM_ALBUM_INFO_WORKERS) y en orden.
+    Lo que falle o no termine en LASTFM_LISTING_TIMEOUT usa fallback(item) (resultado parcial).
+    """
+    if not items:
+        return []
+    pool = io_executor.limited(Config.LASTFM_ALBUM_INFO_WORKERS)
+    futures = [pool.submit(fn, item) for item in items]
+    _, not_done = wait(futures, timeout=Config.LASTFM_LISTING_TIMEOUT)
+    if not_done:
+        logger.warning(f"Last.fm: {len(not_done)} de {len(items)} álbumes sin detalle por tiempo")
+    results = []
+    for item, future in zip(items, futures):
+        if future in not_done:
+            future.cancel()
+            results.append(fallback(item))
+            continue
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.warning(f"Error obteniendo detalle de Last.fm: {str(e)}")
+            results.append(fallback(item))
+    return results
+
+# --------------------------
+# Playcounts por pista (track.getInfo)
+# --------------------------
+
+def _track_keys(artist: str, track: str, user: Optional[str]) -> Tuple[tuple, Optional[tuple]]:
+    global_key = (artist.strip().lower(), track.strip().lower())
+    return global_key, ((user.strip().lower(),) + global_key if user else None)
+
+def _cached_track_playcounts(artist: str, track: str, user: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(user_playcount, total_playcount) si está todo en caché; si no, None."""
+    global_key, user_key = _track_keys(artist, track, user)
+    total_playcount = _track_playcounts.get(global_key)
+    if total_playcount is MISSING:
+        return None
+    if user_key is None:
+        return 0, total_playcount
+    user_playcount = _user_track_playcounts.get(user_key)
+    if user_playcount is MISSING:
+        return None
+    return user_playcount, total_playcount
+
+def _fetch_track_playcounts(artist: str, track: str, user: Optional[str]) -> Tuple[int, int]:
+    cached = _cached_track_playcounts(artist, track, user)
+    if cached is not None:
+        return cached
+    params = {'artist': artist, 'track': track}
+    if user:
+        params['username'] = user
+    track_info = make_lastfm_request('track.getInfo', **params).get('track', {})
+    user_playcount = safe_int(track_info.get('userplaycount', 0))
+    total_playcount = safe_int(track_info.get('playcount', 0))
+    global_key, user_key = _track_keys(artist, track, user)
+    _track_playcounts.set(global_key, total_playcount)
+    if user_key:
+        _user_track_playcounts.set(user_key, user_playcount)
+    return user_playcount, total_playcount
+
+def get_track_playcounts(artist: str, track: str, user: str = None) -> Tuple[int, int]:
+    """(user_playcount, total_playcount) de una pista, cacheados y con peticiones idénticas agrupadas."""
+    cached = _cached_track_playcounts(artist, track, user)
+    if cached is not None:
+        return cached
+    return _track_flight.do(_track_keys(artist, track, user), _fetch_track_playcounts, artist, track, user)
+
+def _track_info_done(key: tuple, future):
+    with _pending_lock:
+        _pending_tracks.discard(key)
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Error fetching track info in background for {key[0]}: {future.exception()}")
+
+def _schedule_track_info(artist: str, track_names: List[str], user: Optional[str]):
+    """Pide en segundo plano los playcounts que faltan (cada pista una sola vez a la vez)."""
+    for track_name in track_names:
+        key = _track_keys(artist, track_name, user)
+        with _pending_lock:
+            if key in _pending_tracks:
+                continue
+            _pending_tracks.add(key)
+        future = _background_tracks.submit(get_track_playcounts, artist, track_name, user)
+        future.add_done_callback(partial(_track_info_done, key))
+
+def _add_track_info_to_album(album_info: dict, artist: str, user: str, defer: bool = False) -> dict:
+    """
+    Añade información detallada de los tracks al álbum.
+    Los track.getInfo van en paralelo (LASTFM_TRACK_INFO_WORKERS) hasta el plazo de Last.fm;
+    con defer=True no se espera a ninguno y los que falten quedan pedidos en segundo plano.
+    """
     try:
         tracks = album_info.get('tracks', {}).get('track', [])
         if isinstance(tracks, dict):  # Si solo hay una pista, convertirla en lista
             tracks = [tracks]
+        track_names = [track.get('name') for track in tracks if isinstance(track, dict) and track.get('name')]
+
+        playcounts = {}
+        pending = []
+        if defer:
+            for track_name in track_names:
+                cached = _cached_track_playcounts(artist, track_name, user)
+                if cached is None:
+                    pending.append(track_name)
+                else:
+                    playcounts[track_name] = cached
+            if pending:
+                _schedule_track_info(artist, pending, user)
+        else:
+            # Las que no terminen a tiempo siguen en curso y quedan en caché para la próxima vez
+            pool = io_executor.limited(Config.LASTFM_TRACK_INFO_WORKERS)
+            futures = {pool.submit(get_track_playcounts, artist, track_name, user): track_name for track_name in track_names}
+            done, not_done = wait(futures, timeout=get_source_timeout('lastfm'))
+            for future in done:
+                try:
+                    playcounts[futures[future]] = future.result()
+                except Exception as e:
+                    logger.warning(f"Error fetching track info for {futures[future]}: {str(e)}")
+            pending = [futures[future] for future in not_done]
 
         user_most_listened_track = None
         total_most_listened_track = None
         max_user_playcount = 0
         max_total_playcount = 0
 
-        for track in tracks:
-            track_name = track.get('name')
-            if not track_name:
-                continue
-
-            # Invocar track.getInfo para obtener userplaycount y playcount
-            try:
-                track_info = make_lastfm_request(
-                    'track.getInfo',
-                    artist=artist,
-                    track=track_name,
-                    username=user
-                )
-                track_user_playcount = int(track_info.get('track', {}).get('userplaycount', 0))
-                track_total_playcount = int(track_info.get('track', {}).get('playcount', 0))
-            except Exception as e:
-                logger.warning(f"Error fetching track info for {track_name}: {str(e)}")
-                track_user_playcount = 0
-                track_total_playcount = 0
+        for track_name in track_names:
+            track_user_playcount, track_total_playcount = playcounts.get(track_name, (0, 0))
 
             # Determinar la pista más escuchada por el usuario
             if track_user_playcount > max_user_playcount:
@@ -206,6 +351,7 @@ def _add_track_info_to_album(album_info: dict, artist: str, user: str) -> dict:
 
         album_info['user_most_listened_track'] = user_most_listened_track
         album_info['total_most_listened_track'] = total_most_listened_track
+        album_info['track_info_pending'] = bool(pending)
 
         # Calcular album_playcount
         user_scrobbles = int(album_info.get('userplaycount', 0))
@@ -224,7 +370,8 @@ def format_album_lastfm(album_data: dict, use_album_info: bool = False) -> dict:
         logger.error(f"Error: album_data is not a dictionary: {album_data}", exc_info=True)
         return {"error": "invalid_album_data"}
 
-    artist_name = album_data.get('artist', {}).get('name') or album_data.get('artist', '')
+    artist = album_data.get('artist', '')
+    artist_name = artist.get('name', '') if isinstance(artist, dict) else artist  # album.getInfo trae el artista como texto
     album_name = album_data.get('name', '')
     mbid = album_data.get('mbid', '')
     _id = mbid or album_name.replace(" ", "_") + "_" + artist_name.replace(" ", "_")
@@ -346,8 +493,41 @@ def get_largest_image(info_album, album_data):
 #geo.getTopTracks
 #artist.getSimilar
 
-# https://musicbrainz.org/ws/2/release/053a0640-8c4b-4ea8-adaa-1250dcbe6580?inc=artists+collections+labels+recordings+release-groups&fmt=json
-# https://musicbrainz.org/ws/2/release-group/6cb9f36f-df55-463a-82a1-84bbdd03e95e?inc=genres+tags+ratings+url-rels&fmt=json
+# Lookups de MusicBrainz (release / release-group con inc=): ver musicbrainz/services.py
+
+PERSONALIZED_TAGS = 3  # tags del usuario que alimentan las recomendaciones
+TAG_CHART_SIZE = 50  # álbumes por tag (mismo tamaño para todos los usuarios: misma entrada de caché)
+
+def _mirror_state(user: str) -> dict:
+    """Estado de la réplica local de scrobbles (la pone al día en segundo plano si toca)."""
+    try:
+        return scrobbles.ensure_synced(user)
+    except Exception as e:
+        logger.warning(f"Réplica de scrobbles no disponible para {user}: {str(e)}")
+        return {}
+
+def _format_local_albums(rows: List[dict], detail: bool = True) -> List[dict]:
+    """Formatea álbumes de la réplica local ({artist, album, mbid, plays, last_ts}) como los de Last.fm."""
+    items = [{
+        'name': row.get('album', ''),
+        'artist': {'name': row.get('artist', '')},
+        'mbid': row.get('mbid', ''),
+        'playcount': row.get('plays', 0),
+    } for row in rows]
+    if detail:
+        albums = _map_concurrently(lambda item: format_album_lastfm(item, True), items, format_album_lastfm)
+    else:
+        albums = [format_album_lastfm(item) for item in items]
+    for album, row in zip(albums, rows):
+        if isinstance(album, dict) and row.get('last_ts'):
+            album['last_listened'] = datetime.utcfromtimestamp(row['last_ts']).strftime("%d/%m/%Y")
+    return albums
+
+def get_scrobble_sync_status(user_id: str, start: bool = False) -> dict:
+    """Estado de la réplica de scrobbles del usuario; con start=True la sincroniza ya."""
+    if start:
+        scrobbles.schedule_sync(user_id)
+    return scrobbles.sync_status(scrobbles.get_sync_state(user_id))
 
 def get_user_top_albums(**params) -> Tuple[List[dict], int]:
     """Álbumes más escuchados por el usuario"""
@@ -362,7 +542,13 @@ def get_user_top_albums(**params) -> Tuple[List[dict], int]:
         detail = detail.lower() == 'true' if isinstance(detail, str) else bool(detail)
         
         page = params.get('page', 1)
-        limit = params.get('limit', 10)
+        limit = params.get('limit') or params.get('per_page', 10)
+
+        # Con la réplica local completa, el top sale de una agregación
+        state = _mirror_state(user_id)
+        if scrobbles.is_ready(state):
+            rows, total = scrobbles.top_albums(user_id, scrobbles.period_since(period), int(page), int(limit))
+            return _format_local_albums(rows, detail), total
 
         request_params = {
             'user': user_id,
@@ -378,62 +564,73 @@ def get_user_top_albums(**params) -> Tuple[List[dict], int]:
         albums = []
         total = int(top_albums.get('@attr', {}).get('total', 0))
 
+        items = []
         for item in albums_list:
             if isinstance(item, dict):
-                try:
-                    album_data = format_album_lastfm(item, detail)
-                    if isinstance(album_data, dict) and "error" not in album_data:
-                        albums.append(album_data)
-                    else:
-                        logger.warning(f"format_album_lastfm returned an error or non-dictionary: {album_data}")
-                except Exception as e:
-                    logger.error(f"Error processing album: {item}, error: {e}", exc_info=True)
+                items.append(item)
             else:
                 logger.warning(f"Skipping non-dictionary album item: {item}")
 
+        # album.getInfo de cada álbum en paralelo; los que no lleguen a tiempo van sin detalle
+        if detail:
+            formatted = _map_concurrently(lambda item: format_album_lastfm(item, True), items, format_album_lastfm)
+        else:
+            formatted = [format_album_lastfm(item) for item in items]
+
+        for item, album_data in zip(items, formatted):
+            if isinstance(album_data, dict) and "error" not in album_data:
+                albums.append(album_data)
+            else:
+                logger.warning(f"format_album_lastfm returned an error or non-dictionary for {item}: {album_data}")
+
         return albums, total
 
     except Exception as e:
         logger.error(f"Error en top álbumes: {str(e)}", exc_info=True)
         raise
 
+def _live_forgotten_items(user_id: str, days_ago: int) -> List[dict]:
+    """
+    Olvidados desde la API (mientras la réplica no está lista): los 500 más escuchados de siempre
+    que no aparecen en la última página de scrobbles desde hace `days_ago` días. Items sin formatear.
+    """
+    top = make_lastfm_request('user.getTopAlbums', user=user_id, period='overall', limit=500)
+    from_ts = int((datetime.now() - timedelta(days=days_ago)).timestamp())
+    recent = make_lastfm_request('user.getRecentTracks', user=user_id, limit=200, **{'from': from_ts})
+    recent_tracks = recent.get('recenttracks', {}).get('track', [])
+    if isinstance(recent_tracks, dict):
+        recent_tracks = [recent_tracks]
+
+    recent_keys = set()
+    for track in recent_tracks:
+        artist_name = (track.get('artist') or {}).get('#text')
+        album_name = (track.get('album') or {}).get('#text')
+        if artist_name and album_name:
+            recent_keys.add((artist_name.lower(), album_name.lower()))
+
+    items = [item for item in top.get('topalbums', {}).get('album', []) if isinstance(item, dict)]
+    return [
+        item for item in items
+        if ((item.get('artist') or {}).get('name', '').lower(), item.get('name', '').lower()) not in recent_keys
+    ]
+
 def get_forgotten_albums(user_id: str, days_ago: int = 730, page: int = 1, limit: int = 10) -> Tuple[List[dict], int]:
     """
     Devuelve los álbumes más escuchados por un usuario que no ha escuchado recientemente.
+    Sale de la réplica local de scrobbles; mientras no termina la primera sincronización, de la API.
     """
     try:
-        # 1. Obtener los álbumes más escuchados del usuario (histórico)
-        top_albums, _ = get_user_top_albums(user_id=user_id, period='overall', limit=500)
-
-        # 2. Obtener los álbumes escuchados recientemente
-        from_timestamp = int((datetime.now() - timedelta(days=days_ago)).timestamp())
-        recent_tracks_data = make_lastfm_request(
-            'user.getRecentTracks',
-            user=user_id,
-            limit=1000,
-            from_param=from_timestamp
-        )
-        recent_tracks = recent_tracks_data.get('recenttracks', {}).get('track', [])
-
-        recent_album_keys = set()
-        for track in recent_tracks:
-            artist_name = track.get('artist', {}).get('#text')
-            album_name = track.get('album', {}).get('#text')
-            if artist_name and album_name:
-                recent_album_keys.add(f"{artist_name}_{album_name}")
-
-        # 3. Filtrar los álbumes más escuchados para excluir los recientes
-        forgotten_albums = [
-            album for album in top_albums
-            if f"{album['artist']}_{album['title']}" not in recent_album_keys
-        ]
-
-        # 4. Paginación
-        start = (page - 1) * limit
-        end = start + limit
-        paginated_albums = forgotten_albums[start:end]
-
-        return paginated_albums, len(forgotten_albums)
+        state = _mirror_state(user_id)
+        if not scrobbles.is_ready(state):
+            logger.info(f"Réplica de scrobbles de {user_id} aún incompleta ({state.get('status', 'pending')}): olvidados en vivo")
+            items = _live_forgotten_items(user_id, days_ago)
+            page_items = items[(page - 1) * limit:page * limit]
+            albums = _map_concurrently(lambda item: format_album_lastfm(item, True), page_items, format_album_lastfm)
+            return [album for album in albums if isinstance(album, dict) and "error" not in album], len(items)
+
+        before_ts = int((datetime.now() - timedelta(days=days_ago)).timestamp())
+        rows, total = scrobbles.forgotten_albums(user_id, before_ts, page, limit)
+        return _format_local_albums(rows), total
 
     except Exception as e:
         logger.error(f"Error en get_forgotten_albums: {str(e)}", exc_info=True)
@@ -444,31 +641,45 @@ def get_random_forgotten_album(user_id: str, days_ago: int = 730) -> dict:
     Devuelve un álbum aleatorio de los álbumes olvidados de un usuario.
     """
     try:
-        forgotten_albums, total = get_forgotten_albums(user_id=user_id, days_ago=days_ago, limit=500)
-        if not forgotten_albums:
+        state = _mirror_state(user_id)
+        if not scrobbles.is_ready(state):
+            items = _live_forgotten_items(user_id, days_ago)
+            return format_album_lastfm(random.choice(items), True) if items else {}
+
+        before_ts = int((datetime.now() - timedelta(days=days_ago)).timestamp())
+        row = scrobbles.random_forgotten_album(user_id, before_ts)
+        if not row:
             return {}
 
-        return random.choice(forgotten_albums)
+        return _format_local_albums([row])[0]
 
     except Exception as e:
         logger.error(f"Error en get_random_forgotten_album: {str(e)}", exc_info=True)
         raise
 
+def _get_chart(method: str, page: int, per_page: int, **params) -> Tuple[List[dict], int]:
+    """Lista global de Last.fm cacheada LASTFM_CHART_TTL; devuelve copias (álbumes, total)."""
+    key = (method, tuple(sorted((k, str(v).strip().lower()) for k, v in params.items())), page, per_page)
+    chart = _chart_cache.get(key)
+    if chart is MISSING:
+        chart = _chart_flight.do(key, _fetch_chart, method, page, per_page, **params)
+        _chart_cache.set(key, chart)
+    albums, total = chart
+    return [dict(album) for album in albums], total
+
+def _fetch_chart(method: str, page: int, per_page: int, **params) -> Tuple[List[dict], int]:
+    data = make_lastfm_request(method, page=page, limit=per_page, **params)
+    if 'error' in data:
+        raise ValueError(f"Last.fm API error: {data.get('message')}")
+    albums_data = data.get('albums', {})
+    albums = [format_album_lastfm(a) for a in albums_data.get('album', [])]
+    total = int(albums_data.get('@attr', {}).get('total', 0))
+    return albums, total
+
 def get_country_top_albums(country: str, page: int = 1, per_page: int = 20) -> Tuple[List[dict], int]:
     """Álbumes más populares por país"""
     try:
-        data = make_lastfm_request(
-            'geo.getTopAlbums',
-            country=country,
-            page=page,
-            limit=per_page
-        )
-        
-        albums_data = data.get('albums', {})
-        albums = [format_album_lastfm(a) for a in albums_data.get('album', [])]
-        total = int(albums_data.get('@attr', {}).get('total', 0))
-        
-        return albums, total
+        return _get_chart('geo.getTopAlbums', page, per_page, country=country)
         
     except Exception as e:
         logger.error(f"Error en álbumes por país: {str(e)}")
@@ -477,18 +688,7 @@ def get_country_top_albums(country: str, page: int = 1, per_page: int = 20) -> T
 def get_tag_recommendations(tag: str, page: int = 1, per_page: int = 20) -> Tuple[List[dict], int]:
     """Recomendaciones por género/etiqueta"""
     try:
-        data = make_lastfm_request(
-            'tag.getTopAlbums',
-            tag=tag,
-            page=page,
-            limit=per_page
-        )
-        
-        albums_data = data.get('albums', {})
-        albums = [format_album_lastfm(a) for a in albums_data.get('album', [])]
-        total = int(albums_data.get('@attr', {}).get('total', 0))
-        
-        return albums, total
+        return _get_chart('tag.getTopAlbums', page, per_page, tag=tag)
         
     except Exception as e:
         logger.error(f"Error en recomendaciones: {str(e)}")
@@ -497,6 +697,10 @@ def get_tag_recommendations(tag: str, page: int = 1, per_page: int = 20) -> Tupl
 def get_user_recent_albums(user: str, limit: int = 20) -> List[dict]:
     """Álbumes recientemente escuchados"""
     try:
+        state = _mirror_state(user)
+        if scrobbles.is_ready(state):
+            return _format_local_albums(scrobbles.recent_albums(user, limit))
+
         data = make_lastfm_request(
             'user.getRecentTracks',
             user=user,
@@ -504,114 +708,208 @@ def get_user_recent_albums(user: str, limit: int = 20) -> List[dict]:
         )
         
         tracks = data.get('recenttracks', {}).get('track', [])
-        albums = {}
+        distinct = {}
         
         for track in tracks:
             album_info = track.get('album', {})
             if album_info.get('#text'):
                 artist = track.get('artist', {}).get('#text', '')
                 album_name = album_info['#text']
-                album_id = f"{artist}_{album_name}"
-                
-                if album_id not in albums:
-                    full_data = get_album_info_lastfm(artist, album_name)
-                    if full_data:
-                        albums[album_id] = format_album_lastfm(full_data)
-        
-        return list(albums.values())
+                distinct.setdefault(f"{artist}_{album_name}", (artist, album_name))
+
+        # Un album.getInfo por álbum distinto, en paralelo; sin detalle si no llega a tiempo
+        def album_detail(key):
+            artist, album_name = key
+            full_data = get_album_info_lastfm(artist, album_name)
+            return format_album_lastfm(full_data) if full_data else None
+
+        def album_basic(key):
+            artist, album_name = key
+            return format_album_lastfm({'name': album_name, 'artist': artist})
+
+        albums = _map_concurrently(album_detail, list(distinct.values()), album_basic)
+        return [album for album in albums if album]
         
     except Exception as e:
         logger.error(f"Error en álbumes recientes: {str(e)}")
         return []
 
+def _get_user_top_tags(user: str, limit: int) -> List[Tuple[str, int]]:
+    """[(tag, count)] más usados por el usuario, cacheados LASTFM_SYNC_INTERVAL."""
+    key = (user.strip().lower(), limit)
+    tags = _user_tags_cache.get(key)
+    if tags is MISSING:
+        tags_data = make_lastfm_request('user.getTopTags', user=user, limit=limit)
+        tags = [(t['name'], safe_int(t.get('count', 1)) or 1) for t in tags_data.get('toptags', {}).get('tag', []) if t.get('name')]
+        _user_tags_cache.set(key, tags)
+    return tags
+
 def get_personalized_recommendations(user: str, limit: int = 20) -> List[dict]:
     """Recomendaciones personalizadas basadas en tus gustos"""
     try:
-        # Obtener top tags del usuario
-        tags_data = make_lastfm_request(
-            'user.getTopTags',
-            user=user,
-            limit=3
-        )
-        tags = [t['name'] for t in tags_data.get('toptags', {}).get('tag', [])]
-        
-        # Obtener recomendaciones por cada tag
-        recommendations = []
-        for tag in tags:
-            albums, _ = get_tag_recommendations(tag, limit=5)
-            recommendations.extend(albums)
-        
-        # Eliminar duplicados
-        unique = {a['_id']: a for a in recommendations}
-        return list(unique.values())[:limit]
+        # Top tags del usuario: la única llamada propia del usuario
+        tags = _get_user_top_tags(user, PERSONALIZED_TAGS)
+        if not tags:
+            return []
+
+        # Listas por tag en paralelo, con tamaño fijo para compartir la caché entre usuarios
+        charts = _map_concurrently(lambda tag: get_tag_recommendations(tag[0], per_page=TAG_CHART_SIZE)[0], tags, lambda tag: [])
+
+        # Puntuación: peso del tag para el usuario por posición en la lista del tag
+        scored = {}
+        for (tag, weight), albums in zip(tags, charts):
+            for position, album in enumerate(albums):
+                key = (album.get('artist', '').lower(), album.get('title', '').lower())
+                score = weight * (1 - position / max(len(albums), 1))
+                entry = scored.setdefault(key, [0.0, album])
+                entry[0] += score
+
+        # Fuera lo que el usuario ya escucha (si su réplica de scrobbles está lista)
+        if scrobbles.is_ready(_mirror_state(user)):
+            listened = scrobbles.listened_albums(user, [album['title'] for _, album in scored.values()])
+            scored = {key: entry for key, entry in scored.items() if key not in listened}
+
+        ranked = sorted(scored.values(), key=lambda entry: entry[0], reverse=True)
+        return [album for _, album in ranked[:limit]]
         
     except Exception as e:
         logger.error(f"Error en recomendaciones personalizadas: {str(e)}")
         return []
 
-def scrobble_album(username: str, album: str, artist: str, timestamp: int = None) -> dict:
+# Errores de track.scrobble que merece la pena reintentar: 11 servicio caído, 16 no disponible, 29 límite de peticiones
+SCROBBLE_RETRY_ERRORS = {11, 16, 29}
+SCROBBLE_BATCH_SIZE = 50  # máximo de track.scrobble por petición
+
+class ScrobbleRetryableError(Exception):
+    """Fallo temporal de Last.fm al scrobblear (se reintenta con espera)."""
+
+def _album_tracks(album_info: dict) -> List[dict]:
+    tracks = album_info.get('tracks', {}).get('track', [])
+    if isinstance(tracks, dict):  # Si solo hay una pista, convertirla en lista
+        tracks = [tracks]
+    return [t for t in tracks if isinstance(t, dict) and t.get('name')]
+
+def build_scrobbles(album: str, artist: str, tracks: List[Any], timestamp: int = None) -> List[dict]:
+    """
+    Un scrobble por pista con timestamps consecutivos según la duración de cada una
+    (1 segundo si no se conoce). Sin timestamp, el álbum termina ahora.
+    `tracks` admite nombres o diccionarios {name/title, duration (s), artist}.
+    """
+    normalized = []
+    for track in tracks:
+        if isinstance(track, dict):
+            name = track.get('name') or track.get('title')
+            duration = safe_int(track.get('duration', 0))
+            track_artist = track.get('artist')
+            track_artist = track_artist.get('name') if isinstance(track_artist, dict) else track_artist
+        else:
+            name, duration, track_artist = track, 0, None
+        if name:
+            normalized.append((name, max(duration, 1), track_artist or artist))
+
+    start = timestamp or int(datetime.utcnow().timestamp()) - sum(d for _, d, _ in normalized)
+    scrobbles = []
+    for name, duration, track_artist in normalized:
+        scrobbles.append({'track': name, 'artist': track_artist, 'album': album, 'albumArtist': artist, 'timestamp': start})
+        start += duration
+    return scrobbles
+
+def _post_scrobble_batch(session_key: str, batch: List[dict]) -> dict:
+    """Un track.scrobble firmado con hasta 50 pistas."""
+    params = {
+        'method': 'track.scrobble',
+        'api_key': LastfmConfig.LASTFM_API_KEY,
+        'sk': session_key,
+        'format': 'json'
+    }
+    for i, scrobble in enumerate(batch):
+        params.update({f'{field}[{i}]': value for field, value in scrobble.items()})
+
+    # Firmar la solicitud
+    params['api_sig'] = _generate_lastfm_signature(params)
+
+    try:
+        with track_provider_call('lastfm'):
+            response = requests.post(LastfmConfig.BASE_URL, data=params, timeout=Config.HTTP_TIMEOUT)
+            if response.status_code >= 500 or response.status_code == 429:
+                raise ScrobbleRetryableError(f"HTTP {response.status_code}")
+            data = response.json()
+    except requests.exceptions.RequestException as e:
+        raise ScrobbleRetryableError(str(e)) from e
+
+    if 'error' in data:
+        if data['error'] in SCROBBLE_RETRY_ERRORS:
+            raise ScrobbleRetryableError(data.get('message', ''))
+        raise Exception(data.get('message', f"Last.fm error {data['error']}"))
+    return data
+
+def _scrobble_batch_with_retry(session_key: str, batch: List[dict]) -> dict:
+    attempts = Config.LASTFM_SCROBBLE_RETRIES + 1
+    for attempt in range(attempts):
+        try:
+            return _post_scrobble_batch(session_key, batch)
+        except ScrobbleRetryableError as e:
+            if attempt == attempts - 1:
+                raise
+            delay = Config.LASTFM_SCROBBLE_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+            logger.warning(f"Scrobble temporalmente rechazado ({e}); reintento en {delay:.1f}s")
+            time.sleep(delay)
+
+def _ignored_scrobbles(data: dict, batch: List[dict]) -> List[dict]:
+    """Pistas del lote que Last.fm ignoró (code != 0) con su motivo."""
+    items = data.get('scrobbles', {}).get('scrobble', [])
+    if isinstance(items, dict):
+        items = [items]
+    ignored = []
+    for scrobble, item in zip(batch, items):
+        message = item.get('ignoredMessage', {}) if isinstance(item, dict) else {}
+        if str(message.get('code', '0')) != '0':
+            ignored.append({'track': scrobble['track'], 'code': safe_int(message.get('code')), 'message': message.get('#text', '')})
+    return ignored
+
+def scrobble_album(username: str, album: str, artist: str, timestamp: int = None, tracks: List[Any] = None) -> dict:
     """
     Scrobblea todas las canciones de un álbum en Last.fm.
     
     :param username: Nombre de usuario de Last.fm.
     :param album: Nombre del álbum.
     :param artist: Nombre del artista.
-    :param timestamp: Marca de tiempo para el scrobble (opcional, por defecto usa el tiempo actual).
-    :return: Respuesta de la API de Last.fm.
+    :param timestamp: Marca de tiempo de la primera pista (opcional, por defecto el álbum termina ahora).
+    :param tracks: Pistas ya conocidas por el llamante (opcional, si no se usa album.getInfo cacheado).
+    :return: Pistas aceptadas e ignoradas, lotes enviados y lotes fallidos.
     """
     try:
         # Obtener la sesión del usuario
         session_key = get_lastfm_session(username)
 
-        # Obtener información del álbum para obtener las pistas
-        album_info = get_album_info_lastfm(artist=artist, album=album)
-        tracks = album_info.get('tracks', {}).get('track', [])
-        if isinstance(tracks, dict):  # Si solo hay una pista, convertirla en lista
-            tracks = [tracks]
-
+        if not tracks:
+            tracks = _album_tracks(get_album_info_lastfm(artist=artist, album=album))
         if not tracks:
             raise ValueError(f"No se encontraron pistas para el álbum '{album}' de '{artist}'.")
 
-        # Preparar scrobbles
-        scrobbles = []
-        timestamp = timestamp or int(datetime.utcnow().timestamp())
-        for i, track in enumerate(tracks):
-            scrobbles.append({
-                'track': track.get('name'),
-                'artist': artist,
-                'album': album,
-                'timestamp': timestamp + i  # Incrementar el timestamp para cada pista
-            })
-
-        # Enviar scrobbles a Last.fm
-        params = {
-            'method': 'track.scrobble',
-            'api_key': LastfmConfig.LASTFM_API_KEY,
-            'sk': session_key,
-            'format': 'json'
-        }
-        for i, scrobble in enumerate(scrobbles):
-            params.update({
-                f'track[{i}]': scrobble['track'],
-                f'artist[{i}]': scrobble['artist'],
-                f'album[{i}]': scrobble['album'],
-                f'timestamp[{i}]': scrobble['timestamp']
-            })
-
-        # Firmar la solicitud
-        params['api_sig'] = _generate_lastfm_signature(params)
-
-        # Realizar la solicitud
-        response = requests.post(LastfmConfig.BASE_URL, data=params)
-        response.raise_for_status()
-        data = response.json()
+        scrobbles = build_scrobbles(album, artist, tracks, timestamp)
 
-        if 'error' in data:
-            logger.error(f"Error al scrobblear álbum en Last.fm: {data['message']}")
-            raise Exception(data['message'])
+        # Lotes de 50 (discos múltiples / box sets); un lote fallido no invalida los demás
+        result = {'accepted': 0, 'ignored': 0, 'batches': 0, 'ignored_tracks': [], 'failed_tracks': []}
+        for start in range(0, len(scrobbles), SCROBBLE_BATCH_SIZE):
+            batch = scrobbles[start:start + SCROBBLE_BATCH_SIZE]
+            result['batches'] += 1
+            try:
+                data = _scrobble_batch_with_retry(session_key, batch)
+            except Exception as e:
+                logger.error(f"Lote de scrobbles fallido para '{album}' de '{artist}': {str(e)}")
+                result['failed_tracks'].extend({'track': s['track'], 'error': str(e)} for s in batch)
+                continue
+            attr = data.get('scrobbles', {}).get('@attr', {})
+            result['accepted'] += safe_int(attr.get('accepted', 0))
+            result['ignored'] += safe_int(attr.get('ignored', 0))
+            result['ignored_tracks'].extend(_ignored_scrobbles(data, batch))
 
-        logger.info(f"Álbum '{album}' de '{artist}' scrobbleado exitosamente para el usuario '{username}'.")
-        return data
+        if not result['accepted'] and result['failed_tracks']:
+            raise Exception(result['failed_tracks'][0]['error'])
+
+        logger.info(f"Álbum '{album}' de '{artist}' scrobbleado para '{username}': {result['accepted']} aceptadas, {result['ignored']} ignoradas, {len(result['failed_tracks'])} fallidas.")
+        return result
 
     except Exception as e:
         logger.error(f"Error scrobbleando álbum '{album}' de '{artist}' para el usuario '{username}': {str(e)}", exc_info=True)
@@ -1,7 +1,6 @@
 from flask import Blueprint, jsonify, request
 from utils.helpers import require_admin_token
 from llm.services import get_album_genres, get_album_description_and_country, get_available_models, get_discogs_melomaniac_profile, get_lastfm_melomaniac_profile, get_spotify_melomaniac_profile
-import google.generativeai as genai
 from spotify.services import make_spotify_request, get_album_by_id
 
 llm_blueprint = Blueprint('llm', __name__)
@@ -88,6 +87,7 @@ def description_country_by_spotify_id(spotify_id):
 def list_models():
     """Endpoint para listar todos los modelos disponibles con detalles"""
     try:
+        import google.generativeai as genai
         models = genai.list_models()
         
         model_details = []
@@ -119,6 +119,7 @@ def list_models():
 @require_admin_token  
 def test_models():
     """Endpoint para probar qué modelos funcionan realmente"""
+    import google.generativeai as genai
     
     # Obtener modelos disponibles dinámicamente
     models_to_test = get_available_models()
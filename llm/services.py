@@ -1,16 +1,31 @@
-import google.generativeai as genai
 import os
 import json
 import time
 from lastfm.services import get_user_top_albums
-from discogs.services import get_user_collection
-from spotify.services import get_saved_albums_spotify
+from discogs.services import get_all_user_collection
+from spotify.services import get_all_saved_albums_spotify
+
+from utils.cache import MISSING, TTLCache
+
+# Lista de modelos de Gemini: cambia muy poco y listarla cuesta una llamada por petición
+MODELS_CACHE_TTL = 6 * 3600
+_models_cache = TTLCache(ttl=MODELS_CACHE_TTL, maxsize=1)
+
+# Álbumes guardados de Spotify que entran en el prompt del perfil (los últimos añadidos)
+SPOTIFY_PROFILE_MAX_ALBUMS = 1000
+# Discos de la colección de Discogs que entran en el prompt del perfil (los últimos añadidos)
+DISCOGS_PROFILE_MAX_RELEASES = 1000
 
 def get_available_models():
     """
     Obtiene todos los modelos disponibles de la API y los ordena por preferencia
+    (la lista se cachea MODELS_CACHE_TTL segundos)
     """
+    cached = _models_cache.get('models')
+    if cached is not MISSING:
+        return list(cached)
     try:
+        import google.generativeai as genai
         models = genai.list_models()
         
         # Filtrar solo modelos que soportan generateContent
@@ -56,7 +71,9 @@ def get_available_models():
         sorted_models = sorted(model_names, key=get_preference)
         
         print(f"Modelos disponibles ordenados por preferencia: {sorted_models}")
-        return sorted_models
+        if sorted_models:
+            _models_cache.set('models', sorted_models)
+        return list(sorted_models)
         
     except Exception as e:
         print(f"Error obteniendo modelos disponibles: {e}")
@@ -72,6 +89,7 @@ def ask_gemini(prompt, max_retries=3, cooldown_seconds=2):
     """
     Función que llama al modelo Gemini con reintentos y múltiples modelos
     """
+    import google.generativeai as genai  # import pesado: solo al usarlo
     # Lista de modelos para probar (en orden de preferencia)
     models_to_try = get_available_models()
 
@@ -260,8 +278,11 @@ def get_discogs_melomaniac_profile(user_id):
     Genera un perfil melómano para un usuario basado en su colección de Discogs.
     """
     try:
-        # Obtener la colección de álbumes del usuario
-        collection, _ = get_user_collection(user_id=user_id, limit=100)
+        # Colección completa (copia local), solo con lo que el modelo necesita
+        collection = [
+            {key: release.get(key) for key in ("artist", "title", "date_release", "genre", "subgenres", "formats")}
+            for release in get_all_user_collection(user_id, limit=DISCOGS_PROFILE_MAX_RELEASES)
+        ]
 
         if not collection:
             return {"error": "No se pudo obtener la colección de álbumes del usuario."}
@@ -287,8 +308,11 @@ def get_spotify_melomaniac_profile(user_id):
     Genera un perfil melómano para un usuario basado en sus álbumes guardados de Spotify.
     """
     try:
-        # Obtener los álbumes guardados del usuario
-        saved_albums, _ = get_saved_albums_spotify(user_id=user_id, limit=50)
+        # Biblioteca completa (copia local), solo con lo que el modelo necesita
+        saved_albums = [
+            {key: album.get(key) for key in ("artist", "title", "date_release", "genre")}
+            for album in get_all_saved_albums_spotify(user_id, limit=SPOTIFY_PROFILE_MAX_ALBUMS)
+        ]
 
         if not saved_albums:
             return {"error": "No se pudieron obtener los álbumes guardados del usuario."}
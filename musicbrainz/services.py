@@ -0,0 +1,129 @@
+"""
+Cliente de MusicBrainz (https://musicbrainz.org/doc/MusicBrainz_API).
+
+- Lookups de release y release-group por MBID con `inc=` y búsqueda de releases.
+- Como mucho 1 petición/segundo en todo el proceso (RateLimiter compartido por los hilos);
+  si la espera superaría el plazo de la fuente, la petición no se hace.
+- Respuestas cacheadas en memoria (MUSICBRAINZ_CACHE_TTL) y peticiones idénticas agrupadas.
+"""
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from config import Config
+from logging_config import logger
+from utils.cache import MISSING, TTLCache
+from utils.ratelimit import RateLimiter
+from utils.resilience import get_source_timeout, track_provider_call
+from utils.singleflight import SingleFlight
+
+# --------------------------
+# Configuración MusicBrainz
+# --------------------------
+
+class MusicBrainzConfig(Config):
+    BASE_URL = Config.MUSICBRAINZ_API_URL
+    USER_AGENT = Config.MUSICBRAINZ_USER_AGENT
+    # requests codifica los espacios como "+": inc=artists+collections+labels+...
+    RELEASE_INC = "artists collections labels recordings release-groups"
+    RELEASE_GROUP_INC = "genres tags ratings url-rels"
+
+_limiter = RateLimiter(interval=1.0)
+_cache = TTLCache(ttl=Config.MUSICBRAINZ_CACHE_TTL, maxsize=2048)
+_flight = SingleFlight()
+
+# --------------------------
+# Helpers Reutilizables
+# --------------------------
+
+def _request(endpoint: str, params: Dict[str, Any]) -> dict:
+    if not _limiter.acquire(timeout=get_source_timeout('musicbrainz')):
+        raise RuntimeError("MusicBrainz rate limit: no hay hueco dentro del plazo")
+    url = f"{MusicBrainzConfig.BASE_URL}{endpoint}"
+    with track_provider_call('musicbrainz'):
+        response = requests.get(
+            url,
+            params={**params, "fmt": "json"},
+            headers={"User-Agent": MusicBrainzConfig.USER_AGENT, "Accept": "application/json"},
+            timeout=Config.HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+    return response.json()
+
+def make_musicbrainz_request(endpoint: str, **params) -> dict:
+    """GET a la API de MusicBrainz con ritmo limitado y caché. Devuelve {} si el recurso no existe."""
+    key = (endpoint, tuple(sorted(params.items())))
+    cached = _cache.get(key)
+    if cached is not MISSING:
+        return cached
+    try:
+        data = _flight.do(key, _request, endpoint, params)
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code in (400, 404):
+            _cache.set(key, {})
+            return {}
+        logger.error(f"Error HTTP en MusicBrainz API {endpoint}: {e}")
+        raise
+    _cache.set(key, data)
+    return data
+
+def _artist_credit(entity: dict) -> str:
+    credits = entity.get("artist-credit", [])
+    return "".join(f"{c.get('name', '')}{c.get('joinphrase', '')}" for c in credits if isinstance(c, dict))
+
+def format_release(release: dict, release_group: Optional[dict] = None) -> dict:
+    """Formatea un release (y su release-group, si se tiene) al formato estándar de álbum."""
+    if not release:
+        return {}
+    group = release_group or release.get("release-group") or {}
+    media = release.get("media", [])
+    tracks: List[dict] = [t for medium in media for t in medium.get("tracks", []) or []]
+    length_ms = sum(t.get("length") or 0 for t in tracks)
+    genres = [g.get("name") for g in sorted(group.get("genres", []), key=lambda g: -g.get("count", 0))]
+    tags = [t.get("name") for t in sorted(group.get("tags", []), key=lambda t: -t.get("count", 0))]
+    return {
+        "mbid": release.get("id"),
+        "release_group_mbid": group.get("id"),
+        "artist": _artist_credit(release),
+        "title": release.get("title", ""),
+        "date_release": release.get("date") or group.get("first-release-date"),
+        "country": release.get("country", ""),
+        "format": [m.get("format") for m in media if m.get("format")],
+        "type": group.get("primary-type"),
+        "label": [li.get("label", {}).get("name", "") for li in release.get("label-info", []) if li.get("label")],
+        "tracks": sum(m.get("track-count", 0) for m in media),
+        "tracklist": [t.get("title", "") for t in tracks],
+        "duration": round(length_ms / 60000) if length_ms else None,
+        "genre": genres,
+        "subgenres": [t for t in tags if t not in genres],
+        "rating": (group.get("rating") or {}).get("value"),
+        "links": [r.get("url", {}).get("resource") for r in group.get("relations", []) if r.get("url")],
+        "musicbrainz_link": f"https://musicbrainz.org/release/{release.get('id')}" if release.get("id") else None,
+    }
+
+# --------------------------
+# Servicios MusicBrainz
+# --------------------------
+
+def get_release(mbid: str) -> dict:
+    return make_musicbrainz_request(f"release/{mbid}", inc=MusicBrainzConfig.RELEASE_INC)
+
+def get_release_group(release_group_id: str) -> dict:
+    return make_musicbrainz_request(f"release-group/{release_group_id}", inc=MusicBrainzConfig.RELEASE_GROUP_INC)
+
+def get_album_musicbrainz(mbid: str) -> dict:
+    """Álbum por MBID de release: release con inc= y su release-group (géneros, tags, rating, enlaces)."""
+    release = get_release(mbid)
+    if not release:
+        return {}
+    group_id = (release.get("release-group") or {}).get("id")
+    group = get_release_group(group_id) if group_id else {}
+    return format_release(release, group)
+
+def search_album_musicbrainz(title: str, artist: str) -> dict:
+    """Mejor release para título/artista, formateado a partir del resultado de búsqueda (una sola petición)."""
+    def quote(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"')
+    data = make_musicbrainz_request("release/", query=f'artist:"{quote(artist)}" AND release:"{quote(title)}"', limit=1)
+    releases = data.get("releases", [])
+    return format_release(releases[0]) if releases else {}
@@ -0,0 +1,219 @@
+"""
+Copia local de los álbumes guardados en Spotify por usuario.
+
+- `spotify_library`: un documento por álbum guardado {user_id, added_at, ...format_album}; se
+  consulta con los mismos filtros, paginación y orden aleatorio que nuestras colecciones.
+- `spotify_library_sync`: estado {user_id, total, last_added_at, synced_at, status}.
+
+La primera sincronización lee `total` en la primera página y pide el resto en paralelo
+(SPOTIFY_LIBRARY_PAGE_WORKERS, espaciadas SPOTIFY_LIBRARY_PAGE_INTERVAL entre todos los usuarios).
+Las siguientes son incrementales: me/albums viene ordenado por `added_at` descendente, así que
+se leen páginas hasta llegar al último álbum ya visto. Si el total no cuadra (el usuario quitó
+álbumes) se hace una copia completa y se borra lo que ya no está.
+"""
+import threading
+from concurrent.futures import wait
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from config import Config
+from db import mongo
+from logging_config import logger
+from utils.executor import background_executor, io_executor
+from utils.helpers import build_format_filter, execute_paginated_query
+from utils.ratelimit import RateLimiter
+
+LIBRARY_COLLECTION = 'spotify_library'
+SYNC_COLLECTION = 'spotify_library_sync'
+PAGE_SIZE = 50  # máximo admitido por me/albums
+
+_sync_pool = background_executor.limited(Config.SPOTIFY_LIBRARY_SYNC_WORKERS)
+_page_limiter = RateLimiter(interval=Config.SPOTIFY_LIBRARY_PAGE_INTERVAL)
+_syncing = set()
+_syncing_lock = threading.Lock()
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def _collections():
+    global _indexes_ready
+    library = mongo.db[LIBRARY_COLLECTION]
+    state = mongo.db[SYNC_COLLECTION]
+    if not _indexes_ready:
+        with _indexes_lock:
+            if not _indexes_ready:
+                library.create_index([("user_id", 1), ("spotify_id", 1)], unique=True)
+                library.create_index([("user_id", 1), ("added_at", -1)])
+                state.create_index("user_id", unique=True)
+                _indexes_ready = True
+    return library, state
+
+# --------------------------
+# Sincronización
+# --------------------------
+
+def _fetch_page(access_token: str, offset: int) -> Dict[str, Any]:
+    from spotify.services import make_spotify_request  # spotify.services importa este módulo
+    _page_limiter.acquire()
+    return make_spotify_request("me/albums", access_token=access_token, limit=PAGE_SIZE, offset=offset)
+
+
+def _parse_items(user_id: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    from spotify.services import format_album
+    albums = []
+    for item in items or []:
+        album = item.get("album") or {}
+        if not album.get("id"):
+            continue
+        albums.append({**format_album(album), "user_id": user_id, "added_at": item.get("added_at", "")})
+    return albums
+
+
+def _store(user_id: str, albums: List[Dict[str, Any]]):
+    if not albums:
+        return
+    library, _ = _collections()
+    library.bulk_write([
+        UpdateOne({"user_id": user_id, "spotify_id": a["spotify_id"]}, {"$set": a}, upsert=True)
+        for a in albums
+    ], ordered=False)
+
+
+def _fetch_all(user_id: str, access_token: str, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Resto de páginas en paralelo a partir de la primera (que trae `total`)."""
+    total = first.get("total", 0)
+    pool = io_executor.limited(Config.SPOTIFY_LIBRARY_PAGE_WORKERS)
+    futures = [pool.submit(_fetch_page, access_token, offset) for offset in range(PAGE_SIZE, total, PAGE_SIZE)]
+    wait(futures)
+    albums = _parse_items(user_id, first.get("items", []))
+    for future in futures:
+        albums.extend(_parse_items(user_id, future.result().get("items", [])))
+    return albums
+
+
+def _fetch_new(user_id: str, access_token: str, first: Dict[str, Any], last_added_at: str) -> Optional[List[Dict[str, Any]]]:
+    """Álbumes añadidos después de last_added_at, página a página hasta encontrar uno ya visto."""
+    page, offset, new = first, 0, []
+    while True:
+        albums = _parse_items(user_id, page.get("items", []))
+        fresh = [a for a in albums if a["added_at"] > last_added_at]
+        new.extend(fresh)
+        if len(fresh) < len(albums) or not page.get("next"):
+            return new
+        offset += PAGE_SIZE
+        page = _fetch_page(access_token, offset)
+
+
+def sync_user_library(user_id: str) -> int:
+    """Pone al día la copia local del usuario. Devuelve cuántos álbumes se guardaron."""
+    from spotify.services import get_access_token_for_user
+
+    library, state_coll = _collections()
+    state = state_coll.find_one({"user_id": user_id}) or {}
+    state_coll.update_one({"user_id": user_id}, {"$set": {"status": "syncing", "started_at": datetime.utcnow()}}, upsert=True)
+
+    try:
+        access_token = get_access_token_for_user(user_id)
+        first = _fetch_page(access_token, 0)
+        total = first.get("total", 0)
+
+        albums = None
+        last_added_at = state.get("last_added_at")
+        if last_added_at:
+            albums = _fetch_new(user_id, access_token, first, last_added_at)
+            if library.count_documents({"user_id": user_id}) + len(albums) != total:
+                albums = None  # Se quitaron álbumes: copia completa
+        full = albums is None
+        if full:
+            albums = _fetch_all(user_id, access_token, first)
+
+        _store(user_id, albums)
+        if full:
+            library.delete_many({"user_id": user_id, "spotify_id": {"$nin": [a["spotify_id"] for a in albums]}})
+    except Exception as e:
+        state_coll.update_one({"user_id": user_id}, {"$set": {"status": "error", "error": str(e)}})
+        logger.error(f"Error sincronizando la biblioteca de Spotify de {user_id}: {str(e)}", exc_info=True)
+        raise
+
+    newest = max((a["added_at"] for a in albums), default="")
+    state_coll.update_one(
+        {"user_id": user_id},
+        {
+            "$set": {"total": total, "synced_at": datetime.utcnow(), "status": "ok",
+                     "last_added_at": max(newest, last_added_at or "")},
+            "$unset": {"error": ""},
+        }
+    )
+    logger.info(f"Biblioteca de Spotify de {user_id} sincronizada ({'completa' if full else 'incremental'}, {len(albums)} álbumes, total {total})")
+    return len(albums)
+
+
+def _sync_done(user_id: str, future):
+    with _syncing_lock:
+        _syncing.discard(user_id)
+
+
+def schedule_sync(user_id: str) -> bool:
+    """Lanza la sincronización en segundo plano (una por usuario a la vez)."""
+    with _syncing_lock:
+        if user_id in _syncing:
+            return False
+        _syncing.add(user_id)
+    future = _sync_pool.submit(sync_user_library, user_id)
+    future.add_done_callback(partial(_sync_done, user_id))
+    return True
+
+
+def get_sync_state(user_id: str) -> Dict[str, Any]:
+    _, state_coll = _collections()
+    return state_coll.find_one({"user_id": user_id}, {"_id": 0}) or {}
+
+
+def ensure_synced(user_id: str) -> Dict[str, Any]:
+    """
+    Estado de la copia del usuario; si tiene más de SPOTIFY_LIBRARY_SYNC_INTERVAL (o no existe)
+    se pone al día en segundo plano. Las lecturas no esperan a la sincronización.
+    """
+    state = get_sync_state(user_id)
+
+    def older_than_interval(moment: Optional[datetime]) -> bool:
+        return not moment or (datetime.utcnow() - moment).total_seconds() > Config.SPOTIFY_LIBRARY_SYNC_INTERVAL
+
+    if state.get('status') == 'error' and not older_than_interval(state.get('started_at')):
+        return state
+    if older_than_interval(state.get('synced_at')):
+        schedule_sync(user_id)
+    return state
+
+
+def is_ready(state: Dict[str, Any]) -> bool:
+    """La copia local terminó al menos una sincronización."""
+    return bool(state.get('synced_at'))
+
+# --------------------------
+# Consultas locales
+# --------------------------
+
+def library_albums(
+    user_id: str,
+    filter: str = 'all',
+    page: int = 1,
+    per_page: int = 10,
+    rnd: bool = False,
+    min: int = None,
+    max: int = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Álbumes guardados paginados (por defecto los últimos añadidos primero)."""
+    _collections()
+    query = {"user_id": user_id, **build_format_filter(filter)}
+    return execute_paginated_query(query, page, per_page, rnd, min, max, LIBRARY_COLLECTION, sort={"added_at": -1})
+
+
+def all_library_albums(user_id: str, limit: int = 0) -> List[Dict[str, Any]]:
+    """Biblioteca completa (o los `limit` últimos añadidos) sin campos internos."""
+    library, _ = _collections()
+    cursor = library.find({"user_id": user_id}, {"_id": 0, "user_id": 0}).sort("added_at", -1)
+    return list(cursor.limit(limit) if limit else cursor)
@@ -0,0 +1,129 @@
+"""
+Álbumes de playlists de Spotify materializados por `snapshot_id`.
+
+`spotify_playlist_albums` guarda por playlist {playlist_id, snapshot_id, name, albums, total_tracks,
+materialized_at, checked_at}: la lista de álbumes únicos en el orden de la playlist. Cada
+SPOTIFY_PLAYLIST_CHECK_INTERVAL se consulta solo el `snapshot_id` (una llamada ligera) y la lista se
+reconstruye únicamente si cambió, pidiendo todas las páginas de pistas en paralelo. Los racks
+paginan álbumes sobre la lista guardada, no pistas.
+"""
+import threading
+from concurrent.futures import wait
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from db import mongo
+from logging_config import logger
+from utils.cache import MISSING, TTLCache
+from utils.executor import io_executor
+from utils.singleflight import SingleFlight
+
+PLAYLIST_ALBUMS_COLLECTION = 'spotify_playlist_albums'
+TRACKS_PAGE_SIZE = 100  # máximo admitido por playlists/{id}/tracks
+TRACK_FIELDS = "items(track(album(id,name,artists(name),release_date,images,external_urls,total_tracks,genres)))"
+
+# Lista materializada en memoria mientras no toque revisar el snapshot
+_materialized = TTLCache(ttl=Config.SPOTIFY_PLAYLIST_CHECK_INTERVAL, maxsize=256)
+_materialize_flight = SingleFlight()
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def _collection():
+    global _indexes_ready
+    collection = mongo.db[PLAYLIST_ALBUMS_COLLECTION]
+    if not _indexes_ready:
+        with _indexes_lock:
+            if not _indexes_ready:
+                collection.create_index("playlist_id", unique=True)
+                _indexes_ready = True
+    return collection
+
+
+def _fetch_tracks_page(playlist_id: str, offset: int, access_token: str) -> List[Dict[str, Any]]:
+    from spotify.services import make_spotify_request
+    return make_spotify_request(
+        endpoint=f"playlists/{playlist_id}/tracks",
+        access_token=access_token,
+        fields=TRACK_FIELDS,
+        limit=TRACKS_PAGE_SIZE,
+        offset=offset
+    ).get("items", [])
+
+
+def _build_albums(playlist_id: str, total_tracks: int, access_token: str) -> List[Dict[str, Any]]:
+    """Todas las páginas de pistas en paralelo; álbumes únicos en el orden de la playlist."""
+    from spotify.services import format_album
+    offsets = list(range(0, max(total_tracks, 1), TRACKS_PAGE_SIZE))
+    pool = io_executor.limited(Config.SPOTIFY_PLAYLIST_PAGE_WORKERS)
+    futures = [pool.submit(_fetch_tracks_page, playlist_id, offset, access_token) for offset in offsets]
+    wait(futures)
+
+    albums: Dict[str, Dict[str, Any]] = {}
+    for future in futures:
+        # Una página que falla invalida el snapshot: mejor conservar la lista anterior
+        for item in future.result():
+            album = (item.get("track") or {}).get("album")
+            if album and album.get("id") and album["id"] not in albums:
+                albums[album["id"]] = format_album(album)
+    return list(albums.values())
+
+
+def _refresh(playlist_id: str, access_token: str, stored: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    from spotify.services import make_spotify_request
+    now = datetime.utcnow()
+    meta = make_spotify_request(
+        endpoint=f"playlists/{playlist_id}",
+        access_token=access_token,
+        fields="snapshot_id,name,tracks.total"
+    )
+    snapshot_id = meta.get("snapshot_id")
+    if stored and snapshot_id and stored.get("snapshot_id") == snapshot_id:
+        _collection().update_one({"playlist_id": playlist_id}, {"$set": {"checked_at": now}})
+        stored["checked_at"] = now
+        return stored
+
+    total_tracks = (meta.get("tracks") or {}).get("total", 0)
+    albums = _build_albums(playlist_id, total_tracks, access_token)
+    doc = {
+        "playlist_id": playlist_id,
+        "snapshot_id": snapshot_id,
+        "name": meta.get("name"),
+        "albums": albums,
+        "total_tracks": total_tracks,
+        "materialized_at": now,
+        "checked_at": now,
+    }
+    _collection().update_one({"playlist_id": playlist_id}, {"$set": doc}, upsert=True)
+    logger.info(f"Playlist {playlist_id} materializada: {len(albums)} álbumes de {total_tracks} pistas (snapshot {snapshot_id})")
+    return doc
+
+
+def _is_fresh(doc: Optional[Dict[str, Any]]) -> bool:
+    checked_at = (doc or {}).get("checked_at")
+    return bool(checked_at) and (datetime.utcnow() - checked_at).total_seconds() < Config.SPOTIFY_PLAYLIST_CHECK_INTERVAL
+
+
+def get_playlist_albums(playlist_id: str, access_token: str) -> List[Dict[str, Any]]:
+    """Álbumes únicos de la playlist; solo llama a Spotify si toca revisar el snapshot."""
+    doc = _materialized.get(playlist_id)
+    if doc is MISSING:
+        doc = _collection().find_one({"playlist_id": playlist_id}, {"_id": 0})
+        if not _is_fresh(doc):
+            try:
+                doc = _materialize_flight.do(playlist_id, _refresh, playlist_id, access_token, doc)
+            except Exception as e:
+                if not doc:
+                    raise
+                # Spotify no responde: se sirve la última lista materializada
+                logger.warning(f"No se pudo revisar la playlist {playlist_id}, se usa la copia guardada: {str(e)}")
+        _materialized.set(playlist_id, doc)
+    return doc.get("albums", [])
+
+
+def get_playlist_albums_page(playlist_id: str, access_token: str, page: int = 1, limit: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+    """Página de álbumes (no de pistas) de la playlist y total de álbumes."""
+    albums = get_playlist_albums(playlist_id, access_token)
+    offset = (max(page, 1) - 1) * limit
+    return [dict(album) for album in albums[offset:offset + limit]], len(albums)
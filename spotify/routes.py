@@ -47,7 +47,7 @@ def spotify_callback():
         return jsonify({"error": "Missing authorization code"}), 400
 
     # 1. Obtener token de Spotify
-    token_url = "https://accounts.spotify.com/api/token"
+    token_url = f"{Config.SPOTIFY_ACCOUNTS_URL}api/token"
     payload = {
         "grant_type": "authorization_code",
         "code": code,
@@ -66,7 +66,7 @@ def spotify_callback():
     encrypted_token = fernet.encrypt(access_token.encode()).decode()
     
     # 2. Obtener información del usuario de Spotify
-    user_info_url = "https://api.spotify.com/v1/me"
+    user_info_url = f"{Config.SPOTIFY_API_URL}me"
     headers = {"Authorization": f"Bearer {access_token}"}
     
     user_response = requests.get(user_info_url, headers=headers)
@@ -3,12 +3,19 @@ import requests
 from cryptography.fernet import Fernet
 from config import Config
 import requests
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import requests
 from cryptography.fernet import Fernet
 from logging_config import logger
 from db import mongo
 from pymongo import errors
+from concurrent.futures import wait
+from utils.cache import MISSING, TTLCache
+from utils.executor import io_executor
+from utils.resilience import track_provider_call
+from utils.singleflight import SingleFlight
+from spotify import library
+from spotify.playlists import get_playlist_albums_page
 
 # --------------------------
 # Configuración y Helpers
@@ -20,6 +27,13 @@ from pymongo import errors
 user_tokens = {}
 fernet = Fernet(Config.ENCRYPTION_KEY)
 
+# Token de Client Credentials: dura una hora, se reutiliza hasta un minuto antes de caducar
+_client_token_cache = TTLCache(ttl=3000, maxsize=1)
+
+# Discografía por artista (artists/{id}/albums): cambia poco y no depende del usuario
+_artist_albums_cache = TTLCache(ttl=Config.SPOTIFY_ARTIST_ALBUMS_TTL, maxsize=4096)
+_artist_albums_flight = SingleFlight()
+
 def encrypt_token(token: str) -> str:
     return fernet.encrypt(token.encode()).decode()
 
@@ -59,17 +73,23 @@ def get_access_token_for_user(user_id: str) -> str:
 
 def get_client_access_token() -> str:
     """Retrieves an access token using the Spotify Client Credentials flow."""
-    auth_url = "https://accounts.spotify.com/api/token"
+    auth_url = f"{Config.SPOTIFY_ACCOUNTS_URL}api/token"
     auth_data = {
         "grant_type": "client_credentials",
         "client_id": Config.SPOTIFY_CLIENT_ID,
         "client_secret": Config.SPOTIFY_SECRET,
     }
 
+    cached = _client_token_cache.get('client')
+    if cached is not MISSING:
+        return cached
+
     try:
-        response = requests.post(auth_url, data=auth_data)
+        response = requests.post(auth_url, data=auth_data, timeout=Config.HTTP_TIMEOUT)
         response.raise_for_status()
-        return response.json()["access_token"]
+        data = response.json()
+        _client_token_cache.set('client', data["access_token"], ttl=max(int(data.get("expires_in", 3600)) - 60, 60))
+        return data["access_token"]
     except requests.exceptions.RequestException as e:
         logger.error(f"Error getting client access token: {e}", exc_info=True)
         raise
@@ -92,6 +112,9 @@ def make_spotify_request(endpoint: str, **params) -> dict:
         if params.get('no_user_neccessary'):
             access_token = get_client_access_token()
             headers["Authorization"] = f"Bearer {access_token}"
+        elif params.get('access_token'):
+            # Token ya resuelto por el llamador (una sola consulta a Mongo por petición)
+            headers["Authorization"] = f"Bearer {params['access_token']}"
         else:
             user_id = params.get('user_id')
             if not user_id:
@@ -105,17 +128,20 @@ def make_spotify_request(endpoint: str, **params) -> dict:
 
         # Eliminar parámetros no necesarios
         params.pop('no_user_neccessary', None)
+        params.pop('access_token', None)
 
-        url = f"https://api.spotify.com/v1/{endpoint}"
+        url = f"{Config.SPOTIFY_API_URL}{endpoint}"
         full_url = requests.Request('GET', url, params=params).prepare().url  # Construir URL completa
         logger.debug(f"Requesting: {full_url}")  # Log de la URL completa
         
-        response = requests.get(
-            url,
-            headers=headers,
-            params=params
-        )
-        response.raise_for_status()
+        with track_provider_call('spotify'):
+            response = requests.get(
+                url,
+                headers=headers,
+                params=params,
+                timeout=Config.HTTP_TIMEOUT
+            )
+            response.raise_for_status()
         data = response.json()
         if not isinstance(data, (dict, list)):  # Validar que la respuesta sea un diccionario o lista
             logger.error(f"Respuesta inesperada de Spotify API: {data}")
@@ -164,13 +190,33 @@ def format_album(album_data: dict) -> dict:
 # --------------------------
 
 def get_saved_albums_spotify(**params) -> Tuple[List[dict], int]:
-    """Obtiene álbumes guardados del usuario"""
-    params.setdefault('limit', params.get('per_page', 20))
-    params['offset'] = (params.get('page', 1) - 1) * params['limit']
-    
-    data = make_spotify_request("me/albums", **params)
+    """Obtiene álbumes guardados del usuario (de la copia local en cuanto está sincronizada)"""
+    user_id = params.get('user_id')
+    page = params.get('page', 1)
+    limit = params.get('limit') or params.get('per_page', 20)
+
+    if user_id and library.is_ready(library.ensure_synced(user_id)):
+        return library.library_albums(
+            user_id,
+            filter=params.get('filter') or 'all',
+            page=page,
+            per_page=limit,
+            rnd=params.get('rnd', False),
+            min=params.get('min'),
+            max=params.get('max')
+        )
+
+    # Primera sincronización en curso: una página directamente de Spotify
+    data = make_spotify_request("me/albums", user_id=user_id, limit=limit, offset=(page - 1) * limit)
     return [format_album(item['album']) for item in data.get('items', [])], data.get('total', 0)
 
+def get_all_saved_albums_spotify(user_id: str, limit: int = 0) -> List[dict]:
+    """Biblioteca completa del usuario; mientras no esté sincronizada, la primera página de Spotify."""
+    if library.is_ready(library.ensure_synced(user_id)):
+        return library.all_library_albums(user_id, limit)
+    albums, _ = get_saved_albums_spotify(user_id=user_id, limit=50)
+    return albums
+
 def get_new_releases_spotify(**params) -> Tuple[List[dict], int]:
     """Obtiene álbumes nuevos lanzados en Spotify según el país especificado."""
     # Extraer user_id primero
@@ -256,11 +302,12 @@ def get_albums_spotify(**params) -> Tuple[List[dict], int]:
             recommendations.extend(get_recent_albums(**params))
         elif type == "history":
             recommendations.extend(get_releases_from_listening_history(**params))
-        else: 
-            recommendations.extend(get_albums_from_paylist(playlist=type, **params))
+        else:
+            # Playlists: ya paginadas por álbum sobre la lista materializada
+            return get_playlist_albums_spotify(playlist=type, **params)
 
         # Eliminar duplicados por ID
-        unique_recommendations = {album["_id"]: album for album in recommendations if album.get("_id")}
+        unique_recommendations = {album["spotify_id"]: album for album in recommendations if album.get("spotify_id")}
         
         # Retornar los álbumes únicos como lista y el total
         formatted_albums = list(unique_recommendations.values())
@@ -405,69 +452,87 @@ GENRE_PLAYLIST_ID_MAP = {
     "sonemic_selects":"1bZsWs0bwQReyC4MpWnr5S"
 }
 
-def get_albums_from_paylist(playlist: str, **params) -> List[dict]:
+def _resolve_playlist_id(playlist: str) -> Optional[str]:
+    playlist_id = GENRE_PLAYLIST_ID_MAP.get(playlist.lower())
+    if playlist_id:
+        return playlist_id
+    # Verificar si el parámetro playlist tiene formato de ID de Spotify
+    if len(playlist) == 22 and playlist.isalnum():
+        return playlist
+    return None
+
+def get_playlist_albums_spotify(playlist: str, **params) -> Tuple[List[dict], int]:
+    """Página de álbumes únicos de una playlist (materializada por snapshot_id) y total de álbumes."""
     try:
-        params.setdefault('limit', params.get('per_page', 20))
-        params['offset'] = (params.get('page', 1) - 1) * params['limit']
-
-        playlist_id = GENRE_PLAYLIST_ID_MAP.get(playlist.lower())
+        limit = params.get('limit') or params.get('per_page', 20)
+        playlist_id = _resolve_playlist_id(playlist)
         if not playlist_id:
-            # Verificar si el parámetro playlist tiene formato de ID de Spotify
-            if len(playlist) == 22 and playlist.isalnum():
-                playlist_id = playlist
-            else:
-                return []
-
-        # Obtener tracks directamente de la playlist con paginación
-        tracks_data = make_spotify_request(
-            endpoint=f"playlists/{playlist_id}/tracks",
-            **params
-        )
-
-        # Procesar álbumes únicos de los tracks
-        recent_albums = {}
-        for item in tracks_data.get("items", []):
-            track = item.get("track")
-            if not track:
-                continue
+            return [], 0
 
-            #TODO obtener el album entero para la duration
-            album = track.get("album")
-            if album and album.get("id"):  # and is_recent(album.get("release_date")):
-                album_id = album.get("id")
-                if album_id not in recent_albums:
-                    recent_albums[album_id] = format_album(album)
-
-        return list(recent_albums.values())
+        # Las playlists son públicas: basta el token de la app si no hay usuario
+        user_id = params.get('user_id')
+        access_token = get_access_token_for_user(user_id) if user_id else get_client_access_token()
+        return get_playlist_albums_page(playlist_id, access_token, page=params.get('page', 1), limit=limit)
 
     except Exception as e:
         logger.error(f"Error crítico obteniendo {playlist}: {str(e)}", exc_info=True)
-        return []
-    
+        return [], 0
+
+def get_albums_from_paylist(playlist: str, **params) -> List[dict]:
+    albums, _ = get_playlist_albums_spotify(playlist, **params)
+    return albums
+
+def _get_latest_artist_albums(artist_id: str, access_token: str, limit: int = 1) -> List[dict]:
+    """Últimos lanzamientos de un artista (formateados), con caché compartida entre usuarios."""
+    key = (artist_id, limit)
+    albums = _artist_albums_cache.get(key)
+    if albums is MISSING:
+        albums = _artist_albums_flight.do(key, _fetch_artist_albums, artist_id, access_token, limit)
+        _artist_albums_cache.set(key, albums)
+    return list(albums)
+
+def _fetch_artist_albums(artist_id: str, access_token: str, limit: int) -> List[dict]:
+    items = make_spotify_request(
+        endpoint=f"artists/{artist_id}/albums",
+        access_token=access_token,
+        include_groups="single,album",
+        limit=limit
+    ).get("items", [])
+    return [format_album(album) for album in items]
+
 def get_releases_from_listening_history(**params) -> List[dict]:
     try:
+        # Un solo descifrado del token para toda la petición
+        access_token = get_access_token_for_user(params.get("user_id"))
 
         # Obtener artistas top del usuario con paginación
         top_artists = make_spotify_request(
             endpoint="me/top/artists",
-            user_id=params.get("user_id"),
+            access_token=access_token,
             time_range="long_term",  # medium_term, long_term
             limit=params.get("limit", 20),
             offset=params.get("offset", 0)
         ).get("items", [])
+        artist_ids = [artist["id"] for artist in top_artists if artist.get("id")]
+        if not artist_ids:
+            return []
 
-        # Obtener lanzamientos recientes de esos artistas
-        releases = []
-        for artist in top_artists:
-            artist_albums = make_spotify_request(
-                endpoint=f"artists/{artist['id']}/albums",
-                user_id=params.get("user_id"),
-                include_groups="single,album",
-                limit=1
-            ).get("items", [])
-            
-            releases.extend([format_album(album) for album in artist_albums])
+        # Lanzamientos recientes de esos artistas, en paralelo y en el orden del top
+        pool = io_executor.limited(Config.SPOTIFY_ARTIST_ALBUMS_WORKERS)
+        futures = [pool.submit(_get_latest_artist_albums, artist_id, access_token) for artist_id in artist_ids]
+        _, not_done = wait(futures, timeout=Config.SPOTIFY_LISTING_TIMEOUT)
+        if not_done:
+            logger.warning(f"Spotify: {len(not_done)} de {len(artist_ids)} artistas sin lanzamientos por tiempo")
 
+        releases = []
+        for artist_id, future in zip(artist_ids, futures):
+            if future in not_done:
+                future.cancel()
+                continue
+            try:
+                releases.extend(future.result())
+            except Exception as e:
+                logger.warning(f"Error obteniendo álbumes para el artista {artist_id}: {str(e)}")
         return releases
 
     except Exception as e:
@@ -94,6 +94,8 @@ class Routes:
     PLAYLIST = f'{Parameters.PLAYLIST}/{ParametersValues.PLAYLIST}'
     DETAIL = 'detail'
     ALL = 'all'
+    BATCH = 'batch'
+    STREAM = 'stream'
     
 class Collections:
     SPOTIFY = 'spotify'
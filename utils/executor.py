@@ -0,0 +1,192 @@
+"""
+Executor de E/S compartido por toda la aplicación.
+
+- Un único pool de hilos de larga duración (IO_EXECUTOR_WORKERS) para las llamadas a proveedores,
+  en lugar de crear un ThreadPoolExecutor por petición.
+- Cola acotada (IO_EXECUTOR_QUEUE): si está llena, submit espera hasta IO_SUBMIT_TIMEOUT
+  y después lanza ExecutorSaturated (back-pressure).
+- limited(n): límite de concurrencia por petición; lo que excede n espera en una cola propia
+  sin ocupar hilos del pool.
+- background_executor: pool aparte para trabajos en segundo plano (refrescos de enriquecimiento,
+  sincronizaciones de bibliotecas, warm-up) que a su vez lanzan llamadas al pool de E/S; así no
+  compiten con las peticiones ni se quedan esperando hilos de su propio pool.
+- stats(): profundidad de cola y contadores para métricas.
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from config import Config
+from logging_config import logger
+
+
+class ExecutorSaturated(RuntimeError):
+    """El executor compartido no admite más trabajo."""
+
+
+class IOExecutor:
+    """Pool de hilos compartido con cola acotada y métricas."""
+
+    def __init__(self, max_workers: int, max_queue: int, submit_timeout: float, name: str = 'io'):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.submit_timeout = submit_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable, *args, block: bool = True, **kwargs) -> Future:
+        """Encola fn; con la cola llena espera submit_timeout (o nada si block=False) y lanza ExecutorSaturated."""
+        if not self._slots.acquire(blocking=block, timeout=self.submit_timeout if block else None):
+            with self._lock:
+                self._rejected += 1
+            logger.warning("Executor de E/S saturado (%s en cola)", self._queued)
+            raise ExecutorSaturated("I/O executor saturated")
+        with self._lock:
+            self._queued += 1
+            self._submitted += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        try:
+            future = self._pool.submit(run)
+        except RuntimeError:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        # Un trabajo cancelado en cola no llegó a ejecutar run()
+        if future is None or future.cancelled():
+            with self._lock:
+                self._queued -= 1
+        self._slots.release()
+
+    def limited(self, max_concurrency: int) -> 'ConcurrencyLimit':
+        """Vista del executor que no ejecuta más de max_concurrency tareas a la vez."""
+        return ConcurrencyLimit(self, max_concurrency)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+class ConcurrencyLimit:
+    """
+    Límite de concurrencia sobre el executor compartido (p.ej. por petición).
+    submit devuelve un Future propio; cancelarlo cancela también la tarea si aún no ha empezado.
+    Si al terminar una tarea el executor está lleno, la siguiente vuelve a la cola en lugar de fallar.
+    """
+
+    def __init__(self, executor: IOExecutor, max_concurrency: int):
+        self._executor = executor
+        self._max = max(1, max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        self._running = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        outer = Future()
+        with self._lock:
+            self._waiting.append((outer, fn, args, kwargs))
+        self._drain(block=True)
+        return outer
+
+    def _drain(self, block: bool):
+        while True:
+            with self._lock:
+                if self._running >= self._max or not self._waiting:
+                    return
+                task = self._waiting.popleft()
+                outer, fn, args, kwargs = task
+                if outer.cancelled():
+                    continue
+                self._running += 1
+            try:
+                inner = self._executor.submit(fn, *args, block=block, **kwargs)
+            except ExecutorSaturated as e:
+                with self._lock:
+                    self._running -= 1
+                    if not block:
+                        # Vuelve a la cabeza; la reintenta la próxima tarea que termine
+                        self._waiting.appendleft(task)
+                        idle = self._running == 0
+                if block:
+                    self._settle(outer, exception=e)
+                    continue
+                if idle:
+                    # No queda ninguna tarea que la reintente: la encola un hilo fuera del pool
+                    threading.Thread(target=self._drain, args=(True,), daemon=True).start()
+                return
+            except Exception as e:
+                with self._lock:
+                    self._running -= 1
+                self._settle(outer, exception=e)
+                continue
+            outer.add_done_callback(lambda f, inner=inner: f.cancelled() and inner.cancel())
+            inner.add_done_callback(partial(self._finish, outer))
+
+    @staticmethod
+    def _settle(outer: Future, result: Any = None, exception: BaseException = None):
+        # outer puede haberse cancelado entretanto; entonces el resultado se descarta
+        try:
+            if exception is not None:
+                outer.set_exception(exception)
+            else:
+                outer.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def _finish(self, outer: Future, inner: Future):
+        with self._lock:
+            self._running -= 1
+        if inner.cancelled():
+            outer.cancel()
+        elif inner.exception() is not None:
+            self._settle(outer, exception=inner.exception())
+        else:
+            self._settle(outer, result=inner.result())
+        # Desde el callback no se bloquea un hilo del pool esperando hueco
+        self._drain(block=False)
+
+
+io_executor = IOExecutor(
+    max_workers=Config.IO_EXECUTOR_WORKERS,
+    max_queue=Config.IO_EXECUTOR_QUEUE,
+    submit_timeout=Config.IO_SUBMIT_TIMEOUT,
+)
+
+background_executor = IOExecutor(
+    max_workers=Config.BACKGROUND_EXECUTOR_WORKERS,
+    max_queue=Config.BACKGROUND_EXECUTOR_QUEUE,
+    submit_timeout=Config.IO_SUBMIT_TIMEOUT,
+    name='background',
+)
@@ -77,7 +77,8 @@ def execute_paginated_query(base_query: dict,
                           rnd: bool = False,
                           min: int = None, 
                           max: int = None,
-                          collection_name: str = 'albums') -> tuple:
+                          collection_name: str = 'albums',
+                          sort: dict = None) -> tuple:
     """Ejecuta una query paginada con opción de orden aleatorio y filtro de duración"""
     try:
         # 1. Construir query de duración si es necesario
@@ -107,7 +108,7 @@ def execute_paginated_query(base_query: dict,
                 {"$project": {"_sort_field": 0}}
             ])
         else:
-            pipeline.append({"$sort": {"_id": 1}})
+            pipeline.append({"$sort": sort or {"_id": 1}})
         
         # 5. Paginación (siempre al final)
         pipeline.extend([
@@ -115,7 +116,8 @@ def execute_paginated_query(base_query: dict,
             {"$limit": per_page}
         ])
         
-        # 6. Ejecutar pipeline
+        # 6. Ejecutar pipeline (el enriquecimiento guardado solo se sirve en el detalle)
+        pipeline.append({"$project": {"enrichment": 0}})
         albums = list(mongo.db[collection_name].aggregate(pipeline))
         
         # 7. Convertir ObjectIds
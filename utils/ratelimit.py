@@ -0,0 +1,33 @@
+"""
+Limitador de ritmo compartido entre hilos (p.ej. MusicBrainz: 1 petición/segundo).
+
+Cada llamada reserva el siguiente hueco libre del intervalo y espera fuera del lock,
+así las peticiones salen espaciadas aunque las lancen varios hilos a la vez.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Espaciado estricto: como mucho una petición cada `interval` segundos."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a su hueco. Si la espera superaría `timeout` no reserva nada y devuelve False.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if timeout is not None and slot - now > timeout:
+                return False
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return True
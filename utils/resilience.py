@@ -0,0 +1,211 @@
+"""
+Resiliencia frente a proveedores externos (Spotify, Discogs, Last.fm, MusicBrainz).
+
+- Circuit breaker por proveedor: ventana deslizante con tasa de error y de llamadas lentas.
+  closed -> open cuando se supera el umbral; open -> half_open tras `CIRCUIT_OPEN_SECONDS`;
+  half_open deja pasar una sonda que cierra o vuelve a abrir el circuito.
+- Plazos por fuente para get_album_details, configurables con SOURCE_TIMEOUTS
+  (p.ej. "spotify=4,discogs=6,lastfm=4,musicbrainz=8").
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import requests
+
+from config import Config
+from logging_config import logger
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Plazos por defecto (segundos) si SOURCE_TIMEOUTS no define la fuente
+DEFAULT_SOURCE_TIMEOUTS = {
+    'spotify': 4.0,
+    'lastfm': 4.0,
+    'discogs': 6.0,
+    'musicbrainz': 6.0,
+}
+
+
+def parse_source_map(raw: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    """Convierte "spotify=4,discogs=6" en {'spotify': 4.0, 'discogs': 6.0} sobre los valores por defecto."""
+    values = dict(defaults)
+    for item in (raw or "").split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            values[name.strip().lower()] = float(value)
+        except ValueError:
+            logger.warning("Valor inválido para %s: %s", name, value)
+    return values
+
+
+SOURCE_TIMEOUTS = parse_source_map(Config.SOURCE_TIMEOUTS, DEFAULT_SOURCE_TIMEOUTS)
+
+
+def get_source_timeout(source: str) -> float:
+    """Plazo (segundos) de una fuente externa."""
+    return SOURCE_TIMEOUTS.get(source, Config.SOURCE_TIMEOUT_DEFAULT)
+
+
+class CircuitBreaker:
+    """Circuit breaker thread-safe para un proveedor."""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._calls = deque()  # (timestamp, ok, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def _refresh(self, now: float):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_started_at = None
+        # Si la sonda nunca informó (p.ej. la llamada no llegó a salir), se permite otra
+        if self._state == HALF_OPEN and self._probe_started_at is not None \
+                and now - self._probe_started_at >= self.open_seconds:
+            self._probe_started_at = None
+
+    def _prune(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self, now: float):
+        if self._state != OPEN:
+            logger.warning("Circuit breaker '%s' abierto durante %ss", self.name, self.open_seconds)
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_started_at = None
+        self._calls.clear()
+
+    def _close(self):
+        if self._state != CLOSED:
+            logger.info("Circuit breaker '%s' cerrado", self.name)
+        self._state = CLOSED
+        self._probe_started_at = None
+        self._calls.clear()
+
+    def allow_request(self) -> bool:
+        """True si se puede llamar al proveedor (en half_open solo una sonda a la vez)."""
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probe_started_at is None:
+                self._probe_started_at = now
+                return True
+            return False
+
+    def record(self, ok: bool, latency: float):
+        """Registra el resultado de una llamada al proveedor."""
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            self._refresh(now)
+            if self._state == HALF_OPEN:
+                if ok and not slow:
+                    self._close()
+                else:
+                    self._open(now)
+                return
+            if self._state == OPEN:
+                return
+            self._calls.append((now, ok, slow))
+            self._prune(now)
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+            slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures / total >= self.failure_rate or slow_calls / total >= self.slow_call_rate:
+                self._open(now)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            self._prune(now)
+            total = len(self._calls)
+            return {
+                "state": self._state,
+                "calls": total,
+                "failures": sum(1 for _, ok, _ in self._calls if not ok),
+                "slow_calls": sum(1 for _, _, slow in self._calls if slow),
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Devuelve (creándolo si hace falta) el breaker del proveedor."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                window_seconds=Config.CIRCUIT_WINDOW_SECONDS,
+                min_calls=Config.CIRCUIT_MIN_CALLS,
+                failure_rate=Config.CIRCUIT_FAILURE_RATE,
+                slow_call_seconds=get_source_timeout(name),
+                open_seconds=Config.CIRCUIT_OPEN_SECONDS,
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def breakers_status() -> Dict[str, Dict[str, object]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """Los 4xx (salvo 429) son errores de la petición, no del proveedor."""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+@contextmanager
+def track_provider_call(name: str):
+    """Mide una llamada HTTP al proveedor y registra el resultado en su breaker."""
+    breaker = get_breaker(name)
+    start = time.monotonic()
+    try:
+        yield breaker
+    except Exception as e:
+        breaker.record(not _is_provider_failure(e), time.monotonic() - start)
+        raise
+    breaker.record(True, time.monotonic() - start)
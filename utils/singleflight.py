@@ -0,0 +1,66 @@
+"""
+Single-flight: agrupa llamadas concurrentes con la misma clave en una sola ejecución.
+
+El primer llamante ejecuta la función; el resto espera y recibe el mismo resultado
+(o la misma excepción). Opcionalmente guarda los resultados "no encontrado" durante
+un TTL corto para no repetir la consulta a los proveedores.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from utils.cache import MISSING, TTLCache
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, negative_ttl: float = 0, is_negative: Optional[Callable[[Any], bool]] = None):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._is_negative = is_negative or (lambda result: not result)
+        self._negative = TTLCache(ttl=negative_ttl, maxsize=4096) if negative_ttl > 0 else None
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self._negative is not None:
+            cached = self._negative.get(key)
+            if cached is not MISSING:
+                return cached
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            if self._negative is not None and self._is_negative(call.result):
+                self._negative.set(key, call.result)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def forget(self, key: Hashable):
+        """Descarta el "no encontrado" cacheado de una clave."""
+        if self._negative is not None:
+            self._negative.delete(key)